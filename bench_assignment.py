@@ -0,0 +1,122 @@
+"""
+bench_assignment.py
+Benchmark de la política de asignación "optimal" (EQCProtocol._assign_optimal):
+- Referencia: núcleo de _assign_load_balancing (rondas, mejor urgency/dist por
+  VQC, list.remove sobre pending).
+- Optimal: matriz (hueco × PoI) y scipy.optimize.linear_sum_assignment.
+Compara CPU por tick de asignación y la calidad (suma de urgency/dist y
+distancia media VQC→PoI asignado), para varios N (VQCs) y tamaños de pending.
+
+    python bench_assignment.py
+    python bench_assignment.py --vqcs 4 16 --pending 100 1000 --reps 20
+"""
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+import config
+
+
+def _lb(states, pending):
+    # Copia del bucle por rondas de _assign_load_balancing (sin logs ni envíos)
+    pending = list(pending)
+    candidates = list(pending)
+    free = {vid: st["huecos"] for vid, st in states.items()}
+    out = []
+    while candidates:
+        eligibles = sorted(((vid, f) for vid, f in free.items() if f > 0), key=lambda x: x[1], reverse=True)
+        if not eligibles:
+            break
+        any_assigned = False
+        for vid, _ in eligibles:
+            if free[vid] <= 0:
+                continue
+            pos = states[vid]["pos"]
+            best, best_score = None, -1.0
+            for poi in candidates:
+                dist = max(1e-6, math.hypot(pos[0] - poi["coord"][0], pos[1] - poi["coord"][1]))
+                score = poi["urgency"] / dist
+                if score > best_score:
+                    best_score, best = score, poi
+            if best is None:
+                continue
+            pending.remove(best)
+            candidates.remove(best)
+            free[vid] -= 1
+            out.append((vid, best))
+            any_assigned = True
+            if not candidates:
+                break
+        if not any_assigned:
+            break
+    return out
+
+
+def _optimal(states, pending):
+    # Núcleo de _assign_optimal
+    slot_vids, slot_pos = [], []
+    for vid, st in states.items():
+        cap = min(st["huecos"], len(pending))
+        slot_vids.extend([vid] * cap)
+        slot_pos.extend([st["pos"][:2]] * cap)
+    sp = np.asarray(slot_pos, dtype=float)
+    cp = np.asarray([p["coord"] for p in pending], dtype=float)
+    urg = np.asarray([p["urgency"] for p in pending], dtype=float)
+    dist = np.maximum(1e-6, np.hypot(sp[:, None, 0] - cp[None, :, 0], sp[:, None, 1] - cp[None, :, 1]))
+    rows, cols = linear_sum_assignment(-(urg[None, :] / dist))
+    return [(slot_vids[r], pending[c]) for r, c in zip(rows, cols)]
+
+
+def _quality(states, pairs):
+    score = dsum = 0.0
+    for vid, poi in pairs:
+        pos = states[vid]["pos"]
+        d = max(1e-6, math.hypot(pos[0] - poi["coord"][0], pos[1] - poi["coord"][1]))
+        score += poi["urgency"] / d
+        dsum += d
+    return score, dsum / max(1, len(pairs))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de la política de asignación optimal")
+    ap.add_argument("--vqcs", type=int, nargs="+", default=[4, 8, 16])
+    ap.add_argument("--pending", type=int, nargs="+", default=[20, 100, 500, 2000])
+    ap.add_argument("--slots", type=int, default=5, help="huecos por VQC (M)")
+    ap.add_argument("--reps", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'N':>3} | {'pending':>7} | {'LB ms':>8} | {'opt ms':>8} | {'x':>6} | "
+          f"{'score LB':>9} | {'score opt':>9} | {'dist LB':>8} | {'dist opt':>8}")
+    for n in args.vqcs:
+        for n_pend in args.pending:
+            pois = config.get_pois(seed=rng.randrange(10**6), n=n_pend)
+            states = {v: {"huecos": args.slots, "pos": (rng.uniform(0, config.L), rng.uniform(0, config.L), config.h_vqc)}
+                      for v in range(n)}
+
+            t0 = time.perf_counter()
+            for _ in range(args.reps):
+                lb = _lb(states, pois)
+            t_lb = (time.perf_counter() - t0) / args.reps
+            t0 = time.perf_counter()
+            for _ in range(args.reps):
+                opt = _optimal(states, pois)
+            t_opt = (time.perf_counter() - t0) / args.reps
+
+            assert len(lb) == len(opt) == min(n * args.slots, n_pend)
+            assert len({p["label"] for _, p in opt}) == len(opt)
+            s_lb, d_lb = _quality(states, lb)
+            s_opt, d_opt = _quality(states, opt)
+            assert s_opt >= s_lb - 1e-9
+            print(f"{n:>3} | {n_pend:>7} | {t_lb*1e3:>8.3f} | {t_opt*1e3:>8.3f} | {t_lb/max(t_opt, 1e-12):>5.1f}x | "
+                  f"{s_lb:>9.3f} | {s_opt:>9.3f} | {d_lb:>8.1f} | {d_opt:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_codec.py
+Benchmark de los codecs de mensajes EQC ↔ VQC (message_codec.py):
+- Mensajes representativos de cada tipo (HELLO, HELLO_ACK, ASSIGN y DELIVER
+  con M PoIs, DELIVER_ACK, HELLO / HELLO_ACK con el reporte piggyback y
+  HELLO / HELLO_ACK / ASSIGN con la carga de los líderes de --reassoc load),
+  construidos igual que en los protocolos.
+- Verifica el round-trip (decode(encode(m)) == m, salvo list/tuple en coord)
+  y mide µs de encode/decode y bytes por mensaje para json y compact.
+
+    python bench_codec.py
+    python bench_codec.py --pois 4000 --m 10 --reps 20000
+"""
+
+import argparse
+import random
+import time
+
+import config
+from message_codec import JsonCodec, CompactCodec
+
+
+def _samples(pois, m, rng):
+    sel = rng.sample(pois, m)
+    msgs = {
+        "HELLO": {"type": "HELLO", "v_id": 7, "huecos": 3,
+                  "position": [rng.uniform(0, config.L), rng.uniform(0, config.L), config.h_vqc]},
+        "HELLO_ACK": {"type": "HELLO_ACK", "v_id": 7, "eqc_id": 1,
+                      "eqc_pos": [rng.uniform(0, config.L), rng.uniform(0, config.L), config.h_eqc],
+                      "eqc_time": rng.uniform(0, config.DURATION)},
+        "ASSIGN": {"type": "ASSIGN", "v_id": 7,
+                   "pois": [{"label": p["label"], "coord": p["coord"], "urgency": p["urgency"],
+                             "ts": rng.uniform(0, config.DURATION)} for p in sel]},
+        "DELIVER": {"type": "DELIVER", "v_id": 7,
+                    "pids": [{"id": p["id"], "label": p["label"], "t_arrive": rng.uniform(0, config.DURATION)}
+                             for p in sel]},
+        "DELIVER_ACK": {"type": "DELIVER_ACK", "v_id": 7, "pids": [p["id"] for p in sel]},
+    }
+    # --deliver piggyback: el reporte viaja en el HELLO y el ACK en el HELLO_ACK
+    msgs["HELLO+pids"] = dict(msgs["HELLO"], pids=msgs["DELIVER"]["pids"])
+    msgs["HELLO_ACK+pids"] = dict(msgs["HELLO_ACK"], pids=msgs["DELIVER_ACK"]["pids"])
+    # --reassoc load: carga de cada líder (backlog, huecos, followers, instante) en HELLO / HELLO_ACK / ASSIGN
+    loads = [[k, rng.randint(0, 500), rng.randint(0, 20), rng.randint(1, 8), rng.uniform(0, config.DURATION)]
+             for k in range(4)]
+    for mtype in ("HELLO", "HELLO_ACK", "ASSIGN", "HELLO_ACK+pids"):
+        msgs[f"{mtype}+loads"] = dict(msgs[mtype], loads=loads)
+    return msgs
+
+
+def _normalize(x):
+    # JSON devuelve listas donde el protocolo usa tuplas (coord): compara por valor
+    if isinstance(x, dict):
+        return {k: _normalize(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return [_normalize(v) for v in x]
+    return x
+
+
+def _timeit(fn, arg, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn(arg)
+    return (time.perf_counter() - t0) / reps
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de los codecs de mensajes")
+    ap.add_argument("--pois", type=int, default=2500)
+    ap.add_argument("--m", type=int, default=5, help="PoIs por ASSIGN/DELIVER (buffer M)")
+    ap.add_argument("--reps", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    pois = config.get_pois(seed=args.seed, n=args.pois)
+    codecs = [JsonCodec(), CompactCodec(pois)]
+    msgs = _samples(pois, args.m, rng)
+
+    print(f"{'tipo':<20} | {'codec':<8} | {'bytes':>6} | {'enc µs':>7} | {'dec µs':>7}")
+    for mtype, msg in msgs.items():
+        for codec in codecs:
+            data = codec.encode(msg)
+            assert _normalize(codec.decode(data)) == _normalize(msg), (codec.name, mtype)
+            enc = _timeit(codec.encode, msg, args.reps)
+            dec = _timeit(codec.decode, data, args.reps)
+            print(f"{mtype:<20} | {codec.name:<8} | {len(data):>6} | {enc*1e6:>7.2f} | {dec*1e6:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+bench_detection_schedule.py
+Benchmark del calendario analítico de detección (detection_schedule.py):
+- Referencia: muestreo de 1 s de la posición ideal del líder (ruta en bucle) y
+  consulta de la esfera de cámara en cada tick, como hace hoy el EQC.
+- Verifica que el modo "schedule" reproduzca el primer tick de detección de
+  cada PoI de la referencia, y que "schedule_exact" nunca detecte más tarde
+  (puede detectar antes: pasadas cortas entre dos ticks que el muestreo pierde).
+- Compara el coste: construir el calendario una vez vs. escanear cada tick.
+
+    python bench_detection_schedule.py
+    python bench_detection_schedule.py --pois 1000 4000 10000 --route 1
+"""
+
+import argparse
+import math
+import time
+
+import config
+from detection_schedule import build_schedule
+from poi_index import POIGridIndex
+
+
+def _looped_position(wps, speed, t):
+    # Posición ideal con LoopMission.RESTART (último → primero → ...)
+    pts = list(wps) + [wps[0]]
+    durs = [max(1e-9, math.dist(a, b) / speed) for a, b in zip(pts, pts[1:])]
+    t = t % sum(durs)
+    for (a, b), d in zip(zip(pts, pts[1:]), durs):
+        if t <= d:
+            f = t / d
+            return tuple(a[k] + f * (b[k] - a[k]) for k in range(3))
+        t -= d
+    return pts[-1]
+
+
+def _sampled_first_ticks(wps, speed, pois, index, reach, horizon):
+    """Primer tick (t = 1, 2, ...) en que cada PoI está a distancia 3D <= reach."""
+    first = {}
+    r_ground_max = reach
+    for k in range(1, int(horizon) + 1):
+        x, y, z = _looped_position(wps, speed, float(k))
+        for i in index.query_radius(x, y, r_ground_max):
+            if i in first:
+                continue
+            px, py = pois[i]["coord"]
+            if math.dist((x, y, z), (px, py, 0.0)) <= reach:
+                first[i] = float(k)
+    return first
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark del calendario analítico de detección")
+    ap.add_argument("--pois", type=int, nargs="+", default=[1000, 2500, 4000, 10000])
+    ap.add_argument("--route", type=int, default=0, help="clave de config.EQC_WAYPOINTS")
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    wps = config.EQC_WAYPOINTS[args.route]
+    speed, reach, horizon = config.EQC_SPEED, config.R_CAMERA, config.DURATION
+    print(f"{'P':>6} | {'scan ms':>9} | {'schedule ms':>11} | {'x':>6} | {'PoIs':>5} | "
+          f"{'tick ≠':>6} | {'exact tarde':>11} | {'exact antes':>11}")
+    for n in args.pois:
+        pois = config.get_pois(seed=args.seed, n=n)
+        index = POIGridIndex(pois, cell_size=config.POI_GRID_CELL)
+
+        t0 = time.perf_counter()
+        ref = _sampled_first_ticks(wps, speed, pois, index, reach, horizon)
+        t_scan = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        sched = build_schedule(wps, speed, pois, index, reach, horizon, mode="schedule")
+        t_sched = time.perf_counter() - t0
+        exact = build_schedule(wps, speed, pois, index, reach, horizon, mode="schedule_exact")
+
+        first_q, first_x = {}, {}
+        for t, i in sched.due(horizon):
+            first_q.setdefault(i, t)
+        for t, i in exact.due(horizon):
+            first_x.setdefault(i, t)
+
+        # Diferencias de tick: solo esperables en roces tangentes (|d − R| ~ 1e-9)
+        mismatch = sum(1 for i in set(ref) | set(first_q) if ref.get(i) != first_q.get(i))
+        late = sum(1 for i, t in first_q.items() if first_x.get(i, math.inf) > t)
+        earlier = sum(1 for i, t in first_x.items() if t <= first_q.get(i, math.inf) - 1.0)
+        print(f"{n:>6} | {t_scan*1e3:>9.1f} | {t_sched*1e3:>11.1f} | {t_scan/max(t_sched, 1e-12):>5.1f}x | "
+              f"{len(ref):>5} | {mismatch:>6} | {late:>11} | {earlier:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+bench_poi_index.py
+Benchmark del índice espacial de PoIs (poi_index.POIGridIndex):
+- Coste por tick del filtro de cámara del EQC (detecciones → PoIs): doble bucle
+  original, consulta por detección al grid, y emparejamiento NumPy por lotes.
+- Coste por telemetría de la detección casual del VQC.
+Compara el barrido lineal original sobre la lista de PoIs con el índice,
+verifica que ambos devuelvan los mismos PoIs, y escala P de 1k a 50k.
+
+    python bench_poi_index.py
+    python bench_poi_index.py --pois 1000 4000 50000 --ticks 100
+"""
+
+import argparse
+import math
+import random
+import time
+
+import numpy as np
+
+import config
+from poi_index import POIGridIndex
+
+EPS = 0.2
+
+
+def _linear_camera(pois, detected):
+    # Copia del doble bucle original de EQCProtocol.handle_timer("assign")
+    out = []
+    for i, poi in enumerate(pois):
+        px, py = poi["coord"]
+        for node in detected:
+            x, y, z = node["position"]
+            if abs(x-px) < EPS and abs(y-py) < EPS and abs(z-0.0) < EPS:
+                out.append(i)
+                break
+    return out
+
+
+def _index_camera(index, detected):
+    matched = set()
+    for node in detected:
+        x, y, z = node["position"]
+        if abs(z-0.0) < EPS:
+            matched.update(index.query_exact(x, y, EPS))
+    return sorted(matched)
+
+
+def _numpy_camera(index, detected):
+    # Bloque actual de EQCProtocol: snapshot → arrays → POIGridIndex.match_exact
+    pos = np.array([node["position"] for node in detected], dtype=float).reshape(-1, 3)
+    ground = np.abs(pos[:, 2] - 0.0) < EPS
+    return index.match_exact(pos[ground, 0], pos[ground, 1], EPS)
+
+
+def _linear_casual(pois, pos, r):
+    out = []
+    for i, poi in enumerate(pois):
+        px, py = poi["coord"]
+        dx, dy, dz = pos[0]-px, pos[1]-py, pos[2]-0.0
+        if math.sqrt(dx*dx + dy*dy + dz*dz) <= r:
+            out.append(i)
+    return out
+
+
+def _index_casual(index, pois, pos, r):
+    out = []
+    for i in index.query_radius(pos[0], pos[1], r * (1 + 1e-9)):
+        px, py = pois[i]["coord"]
+        dx, dy, dz = pos[0]-px, pos[1]-py, pos[2]-0.0
+        if math.sqrt(dx*dx + dy*dy + dz*dz) <= r:
+            out.append(i)
+    return out
+
+
+def _camera_snapshot(pois, rng, n_other=20):
+    """Lo que devolvería take_picture(): PoIs bajo la huella de la cámara + algunos VQCs."""
+    ex, ey = rng.uniform(0.0, config.L), rng.uniform(0.0, config.L)
+    r_ground = math.sqrt(max(0.0, config.R_CAMERA**2 - config.h_eqc**2))
+    detected = []
+    for p in pois:
+        px, py = p["coord"]
+        if math.hypot(px - ex, py - ey) <= r_ground:
+            detected.append({"position": (px, py, 0.0), "type": "node"})
+    for _ in range(n_other):
+        detected.append({"position": (ex + rng.uniform(-20, 20), ey + rng.uniform(-20, 20), config.h_vqc),
+                         "type": "node"})
+    return detected
+
+
+def _timeit(fn, reps):
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - t0) / reps
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark del índice espacial de PoIs")
+    ap.add_argument("--pois", type=int, nargs="+", default=[1000, 2500, 4000, 10000, 25000, 50000])
+    ap.add_argument("--ticks", type=int, default=20, help="ticks simulados por tamaño")
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'P':>7} | {'build ms':>9} | {'cam lin ms':>10} | {'cam idx ms':>10} | {'x':>7} | "
+          f"{'cam np ms':>9} | {'x':>7} | "
+          f"{'casual lin ms':>13} | {'casual idx ms':>13} | {'x':>7}")
+    for n in args.pois:
+        pois = config.get_pois(seed=args.seed, n=n)
+        t0 = time.perf_counter()
+        index = POIGridIndex(pois, cell_size=config.POI_GRID_CELL)
+        build = time.perf_counter() - t0
+
+        snaps = [_camera_snapshot(pois, rng) for _ in range(args.ticks)]
+        spots = [(pois[rng.randrange(n)]["coord"][0], pois[rng.randrange(n)]["coord"][1], 0.0)
+                 for _ in range(args.ticks)]
+
+        for d in snaps:
+            assert _linear_camera(pois, d) == _index_camera(index, d) == _numpy_camera(index, d)
+        for s in spots:
+            assert _linear_casual(pois, s, config.R_DETECT) == _index_casual(index, pois, s, config.R_DETECT)
+
+        it = iter(range(10**9))
+        cam_lin = _timeit(lambda: _linear_camera(pois, snaps[next(it) % len(snaps)]), args.ticks)
+        cam_idx = _timeit(lambda: _index_camera(index, snaps[next(it) % len(snaps)]), args.ticks)
+        cam_np = _timeit(lambda: _numpy_camera(index, snaps[next(it) % len(snaps)]), args.ticks)
+        cas_lin = _timeit(lambda: _linear_casual(pois, spots[next(it) % len(spots)], config.R_DETECT), args.ticks)
+        cas_idx = _timeit(lambda: _index_casual(index, pois, spots[next(it) % len(spots)], config.R_DETECT), args.ticks)
+
+        print(f"{n:>7} | {build*1e3:>9.2f} | {cam_lin*1e3:>10.3f} | {cam_idx*1e3:>10.3f} | "
+              f"{cam_lin/max(cam_idx, 1e-12):>6.1f}x | {cam_np*1e3:>9.3f} | {cam_lin/max(cam_np, 1e-12):>6.1f}x | "
+              f"{cas_lin*1e3:>13.3f} | {cas_idx*1e3:>13.4f} | "
+              f"{cas_lin/max(cas_idx, 1e-12):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
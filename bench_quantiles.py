@@ -0,0 +1,70 @@
+"""
+bench_quantiles.py
+Benchmark de los acumuladores de latencia (quantiles.py):
+- Muestras sintéticas (lognormal, como las latencias de servicio) repartidas
+  entre K "EQCs" y combinadas con merge(), igual que en EQC.finish().
+- Verifica que SketchStats quede dentro de su error relativo α respecto a
+  ExactStats en p50/p95/p99 (mismo rango), y que mean/max sean idénticos.
+- Compara µs por add(), coste del cálculo de percentiles y memoria
+  (muestras guardadas vs. buckets del sketch).
+
+    python bench_quantiles.py
+    python bench_quantiles.py --n 1000 100000 1000000 --k 4
+"""
+
+import argparse
+import random
+import time
+
+from quantiles import ExactStats, SketchStats
+
+QS = (0.50, 0.95, 0.99)
+
+
+def _fill(cls, parts):
+    acc = []
+    t0 = time.perf_counter()
+    for vals in parts:
+        st = cls()
+        for x in vals:
+            st.add(x)
+        acc.append(st)
+    t_add = time.perf_counter() - t0
+    total = cls()
+    for st in acc:
+        total.merge(st)
+    return total, t_add
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de los acumuladores de latencia")
+    ap.add_argument("--n", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    ap.add_argument("--k", type=int, default=4, help="acumuladores por corrida (EQCs)")
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'n':>8} | {'add µs ex':>9} | {'add µs sk':>9} | {'q ms ex':>8} | {'q ms sk':>8} | "
+          f"{'err máx':>7} | {'muestras':>8} | {'buckets':>7}")
+    for n in args.n:
+        vals = [rng.lognormvariate(2.5, 0.8) for _ in range(n)]
+        parts = [vals[i::args.k] for i in range(args.k)]
+        ex, t_ex = _fill(ExactStats, parts)
+        sk, t_sk = _fill(SketchStats, parts)
+
+        t0 = time.perf_counter()
+        q_ex = ex.quantiles(QS)
+        tq_ex = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        q_sk = sk.quantiles(QS)
+        tq_sk = time.perf_counter() - t0
+
+        err = max(abs(q_sk[q] - q_ex[q]) / abs(q_ex[q]) for q in QS)
+        assert err <= sk.alpha + 1e-12, (n, q_ex, q_sk)
+        assert ex.max == sk.max and abs(ex.mean - sk.mean) <= 1e-9 * abs(ex.mean)
+        print(f"{n:>8} | {t_ex/n*1e6:>9.3f} | {t_sk/n*1e6:>9.3f} | {tq_ex*1e3:>8.2f} | {tq_sk*1e3:>8.2f} | "
+              f"{err*100:>6.2f}% | {len(ex.values):>8} | {len(sk.pos) + len(sk.neg):>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+bench_route_planner.py
+Benchmark de los planificadores de orden de visita (route_planner.py):
+- Por cada M (paradas en next2visit): posición del VQC y M PoIs al azar en el
+  área L×L. Dos casos, como en VQCProtocol.handle_packet("ASSIGN"):
+  "full" (ruta vacía, M paradas nuevas) e "incr" (M-2 paradas ya ordenadas
+  por el mismo planificador + 2 nuevas de un ASSIGN).
+- Mide µs por llamada a plan_route y la longitud media del camino resultante
+  (relativa a fifo) para fifo, insertion y nn_2opt.
+
+    python bench_route_planner.py
+    python bench_route_planner.py --m 5 10 20 50 --reps 200 --urgency_weight 0.5
+"""
+
+import argparse
+import random
+import time
+
+import config
+from route_planner import ROUTE_PLANNERS, plan_route, route_cost
+
+
+def _case(rng, m):
+    start = (rng.uniform(0, config.L), rng.uniform(0, config.L), config.h_vqc)
+    stops = [((rng.uniform(0, config.L), rng.uniform(0, config.L), 0.0), rng.randint(1, 3)) for _ in range(m)]
+    return start, stops
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de los planificadores de ruta de los VQC")
+    ap.add_argument("--m", type=int, nargs="+", default=[3, 5, 10, 20, 40])
+    ap.add_argument("--reps", type=int, default=100, help="casos aleatorios por M")
+    ap.add_argument("--urgency_weight", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    w = args.urgency_weight
+    print(f"{'M':>3} | {'caso':<5} | {'planner':<9} | {'µs/plan':>9} | {'longitud':>9} | {'vs fifo':>7}")
+    for m in args.m:
+        rng = random.Random(args.seed + m)
+        cases = [_case(rng, m) for _ in range(args.reps)]
+        for mode in ("full", "incr"):
+            base_len = None
+            for method in ROUTE_PLANNERS:
+                if mode == "full":
+                    inputs = [(start, [], stops) for start, stops in cases]
+                else:
+                    # ruta vigente ya planificada con el mismo método, luego llega un ASSIGN con 2 PoIs
+                    inputs = [(start, plan_route(start, [], stops[:-2], method, w), stops[-2:])
+                              for start, stops in cases]
+                t0 = time.perf_counter()
+                routes = [plan_route(start, kept, new, method, w) for start, kept, new in inputs]
+                dt = (time.perf_counter() - t0) / len(inputs)
+                assert all(sorted(r) == sorted(kept + new) for r, (_, kept, new) in zip(routes, inputs))
+                length = sum(route_cost(start, r) for r, (start, _, _) in zip(routes, inputs)) / len(inputs)
+                base_len = base_len or length
+                print(f"{m:>3} | {mode:<5} | {method:<9} | {dt*1e6:>9.1f} | {length:>9.1f} | {length/base_len:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
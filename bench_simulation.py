@@ -0,0 +1,195 @@
+"""
+bench_simulation.py
+Benchmark end-to-end del simulador sobre escenarios representativos del grid
+del paper (P ∈ {1000, 2500, 4000}, K ∈ {1, 4}, ρ ∈ {1, 4}), headless
+(equivalente a --no_rt --no_vis), cada escenario en su propio proceso:
+- wall time total del proceso, arranque (imports + construcción de nodos),
+  tiempo del bucle de eventos, segundos simulados por segundo de pared,
+  eventos procesados (y eventos/s) y pico de RSS.
+- Resultados en JSON (--out); con --baseline compara contra un JSON anterior
+  y sale con código 1 si algún escenario empeora más de --tolerance.
+
+    python bench_simulation.py --out bench_base.json
+    python bench_simulation.py --out bench_new.json --baseline bench_base.json
+    python bench_simulation.py --pois 1000 --k 1 --rho 1 --duration 300 --set codec=json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Métricas comparables con la línea base: (clave, True si "más alto es mejor")
+COMPARE = (
+    ("sim_per_wall", True),
+    ("events_per_s", True),
+    ("wall_s", False),
+    ("startup_s", False),
+    ("peak_rss_mb", False),
+)
+
+
+def _child(spec: dict) -> None:
+    """Corre UN escenario en este proceso y emite una línea BENCH_JSON en stdout."""
+    import resource
+
+    t0 = time.perf_counter()
+    sys.path.insert(0, _HERE)
+    from run_simulation import ScenarioParams, run_scenario
+    import_s = time.perf_counter() - t0
+
+    res = run_scenario(ScenarioParams(**spec))
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss     # KiB en Linux
+    if sys.platform == "darwin":
+        rss /= 1024.0                                             # bytes en macOS
+    out = {
+        "import_s": import_s,
+        "setup_s": res.setup_s,
+        "sim_wall_s": res.sim_wall_s,
+        "sim_events": res.sim_events,
+        "sim_time": res.sim_time,
+        "peak_rss_mb": rss / 1024.0,
+        "coverage": res.coverage,
+        "assigns_sent": res.assigns_sent,
+    }
+    print("BENCH_JSON " + json.dumps(out))
+
+
+def _parse_set(items):
+    extra = {}
+    for it in items or []:
+        key, _, val = it.partition("=")
+        try:
+            extra[key] = json.loads(val)
+        except ValueError:
+            extra[key] = val        # strings sin comillas (p.ej. codec=json)
+    return extra
+
+
+def _run_one(spec: dict, timeout):
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--_child", json.dumps(spec)],
+        capture_output=True, text=True, timeout=timeout, cwd=_HERE,
+    )
+    wall = time.perf_counter() - t0
+    line = next((ln for ln in proc.stdout.splitlines() if ln.startswith("BENCH_JSON ")), None)
+    if proc.returncode != 0 or line is None:
+        raise RuntimeError(f"escenario falló (rc={proc.returncode}):\n{proc.stderr[-2000:]}")
+    r = json.loads(line[len("BENCH_JSON "):])
+    r["wall_s"] = wall
+    r["startup_s"] = wall - r["sim_wall_s"]     # proceso + imports + construcción (todo menos el bucle)
+    r["sim_per_wall"] = r["sim_time"] / max(r["sim_wall_s"], 1e-9)
+    r["events_per_s"] = r["sim_events"] / max(r["sim_wall_s"], 1e-9)
+    return r
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=_HERE, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _compare(results, baseline_path, tol):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        base = {r["name"]: r for r in json.load(f)["results"]}
+    worse = []
+    print(f"\nComparación con {baseline_path} (tolerancia {tol:.0%}):")
+    print(f"{'escenario':<22} | " + " | ".join(f"{k:>14}" for k, _ in COMPARE))
+    for r in results:
+        b = base.get(r["name"])
+        if b is None:
+            print(f"{r['name']:<22} | (sin línea base)")
+            continue
+        cells = []
+        for key, higher_better in COMPARE:
+            ratio = r[key] / b[key] if b.get(key) else float("nan")
+            bad = (ratio < 1 - tol) if higher_better else (ratio > 1 + tol)
+            if bad:
+                worse.append((r["name"], key, ratio))
+            cells.append(f"{ratio:>12.2f}x{'!' if bad else ' '}")
+        print(f"{r['name']:<22} | " + " | ".join(cells))
+    return worse
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark end-to-end del simulador")
+    ap.add_argument("--pois", type=int, nargs="+", default=[1000, 2500, 4000])
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--rho", type=int, nargs="+", default=[1, 4])
+    ap.add_argument("--seed", type=int, default=123)
+    ap.add_argument("--buffer_size", type=int, default=5)
+    ap.add_argument("--camera_reach", type=float, default=84.9)
+    ap.add_argument("--policy", default="load_balancing")
+    ap.add_argument("--duration", type=float, default=None, help="horizonte simulado (s); por defecto el de config")
+    ap.add_argument("--set", nargs="*", metavar="CLAVE=VALOR",
+                    help="campos extra de ScenarioParams para todos los escenarios (p.ej. codec=json)")
+    ap.add_argument("--repeat", type=int, default=1, help="repeticiones por escenario (se reporta la mediana)")
+    ap.add_argument("--timeout", type=float, default=None, help="timeout (s) por escenario")
+    ap.add_argument("--out", default="bench_simulation.json")
+    ap.add_argument("--baseline", default=None, help="JSON de una corrida anterior para comparar")
+    ap.add_argument("--tolerance", type=float, default=0.10, help="empeoramiento relativo tolerado")
+    ap.add_argument("--_child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args._child is not None:
+        _child(json.loads(args._child))
+        return
+
+    extra = _parse_set(args.set)
+    results = []
+    logdir = tempfile.mkdtemp(prefix="bench_sim_")
+    print(f"{'escenario':<22} | {'wall s':>8} | {'arranque s':>10} | {'sim-s/s':>8} | "
+          f"{'eventos':>9} | {'ev/s':>8} | {'RSS MB':>7}")
+    for P in args.pois:
+        for K in args.k:
+            for rho in args.rho:
+                name = f"P{P}_K{K}_rho{rho}"
+                spec = dict(
+                    seed=args.seed, num_pois=P, num_eqcs=K, num_vqcs=K * rho,
+                    buffer_size=args.buffer_size, camera_reach=args.camera_reach,
+                    policy=args.policy, duration=args.duration, no_rt=True, no_vis=True, quiet=True,
+                    fig_prefix=os.path.join(logdir, name),
+                )
+                spec.update(extra)
+                runs = [_run_one(spec, args.timeout) for _ in range(max(1, args.repeat))]
+                r = {k: statistics.median(run[k] for run in runs) for k in runs[0]}
+                r.update({"name": name, "P": P, "K": K, "rho": rho, "runs": len(runs)})
+                results.append(r)
+                print(f"{name:<22} | {r['wall_s']:>8.2f} | {r['startup_s']:>10.2f} | {r['sim_per_wall']:>8.1f} | "
+                      f"{int(r['sim_events']):>9} | {r['events_per_s']:>8.0f} | {r['peak_rss_mb']:>7.1f}")
+
+    doc = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k != "_child"},
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
+    print(f"\n📄 Resultados: {args.out}")
+
+    if args.baseline:
+        worse = _compare(results, args.baseline, args.tolerance)
+        if worse:
+            print("\n❌ Regresiones: " + ", ".join(f"{n}:{k} ({x:.2f}x)" for n, k, x in worse))
+            sys.exit(1)
+        print("\n✅ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
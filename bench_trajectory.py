@@ -0,0 +1,135 @@
+"""
+bench_trajectory.py
+Benchmark de las tablas de trayectoria de líder (trajectory.LeaderTrajectory):
+- predict_eqc_position: recorrido lineal original (scipy euclidean por tramo en
+  cada llamada) vs. lookup con bisect sobre la tabla precomputada.
+- compute_intercept: 6 predicciones originales vs. fixed_point / closed_form.
+Verifica que las posiciones (y la intercepción fixed_point) coincidan con las
+originales sobre la ruta cerrada (con el tramo de regreso y t mod vuelta, como
+vuela el líder) y que closed_form cumpla |p − L(T)| = v·(T − now).
+
+    python bench_trajectory.py
+    python bench_trajectory.py --calls 20000 --route 1
+"""
+
+import argparse
+import math
+import random
+import time
+
+from scipy.spatial.distance import euclidean
+
+import config
+from trajectory import LeaderTrajectory
+
+TOL = 1e-6
+
+
+def _orig_predict(waypoints, v_eqc, t):
+    # Copia de VQCProtocol.predict_eqc_position original
+    durations = [max(1e-9, euclidean(a, b) / v_eqc)
+                 for a, b in zip(waypoints, waypoints[1:])]
+    total = sum(durations)
+    if t <= 0:
+        return waypoints[0]
+    if t >= total:
+        return waypoints[-1]
+    elapsed = 0.0
+    for (a, b), dur in zip(zip(waypoints, waypoints[1:]), durations):
+        if elapsed + dur >= t:
+            frac = (t - elapsed) / dur
+            return (
+                a[0] + frac * (b[0] - a[0]),
+                a[1] + frac * (b[1] - a[1]),
+                a[2] + frac * (b[2] - a[2]),
+            )
+        elapsed += dur
+    return waypoints[-1]
+
+
+def _looped_predict(waypoints, v_eqc, period, t):
+    # Predicción original sobre la ruta cerrada, en t mod vuelta (LoopMission.RESTART)
+    return _orig_predict(waypoints, v_eqc, t % period if t >= period else t)
+
+
+def _orig_intercept(waypoints, v_eqc, period, p, v_vqc, now):
+    # Núcleo de VQCProtocol.compute_intercept original (sin el offset en V)
+    pred = _looped_predict(waypoints, v_eqc, period, now)
+    dt = euclidean(p, pred) / v_vqc
+    for _ in range(5):
+        pred = _looped_predict(waypoints, v_eqc, period, now + dt)
+        dt = euclidean(p, pred) / v_vqc
+    return pred
+
+
+def _timeit(fn, args_list):
+    t0 = time.perf_counter()
+    for a in args_list:
+        fn(*a)
+    return (time.perf_counter() - t0) / len(args_list)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark de las tablas de trayectoria de líder")
+    ap.add_argument("--route", type=int, default=0, help="clave de config.EQC_WAYPOINTS")
+    ap.add_argument("--calls", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=123)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    wps = config.EQC_WAYPOINTS[args.route]
+    v_eqc, v_vqc = config.EQC_SPEED, config.VQC_SPEED
+    t0 = time.perf_counter()
+    traj = LeaderTrajectory(wps, v_eqc)
+    build = time.perf_counter() - t0
+    closed, period = traj.waypoints, traj.total
+    horizon = period * 2.5
+
+    # --- paridad de posiciones (incluye t <= 0, varias vueltas y los vértices exactos) ---
+    ts = [rng.uniform(-10.0, horizon) for _ in range(args.calls)] + [0.0, period] + traj.t_end
+    worst = max(math.dist(_looped_predict(closed, v_eqc, period, t), traj.position(t)) for t in ts)
+    assert worst <= TOL, f"posiciones difieren: {worst}"
+
+    # --- paridad de intercepción ---
+    cases = []
+    for _ in range(max(1, args.calls // 10)):
+        now = rng.uniform(0.0, horizon)
+        lp = traj.position(now)
+        p = (lp[0] + rng.uniform(-300, 300), lp[1] + rng.uniform(-300, 300), config.h_vqc)
+        cases.append((p, now))
+    worst_fp = 0.0
+    worst_cf = 0.0
+    gap_fp_cf = 0.0
+    for p, now in cases:
+        orig = _orig_intercept(closed, v_eqc, period, p, v_vqc, now)
+        fp, _ = traj.intercept_fixed_point(p, v_vqc, now)
+        cf, tau = traj.intercept_closed_form(p, v_vqc, now)
+        worst_fp = max(worst_fp, math.dist(orig, fp))
+        # closed_form: el VQC llega justo cuando llega el líder
+        worst_cf = max(worst_cf, abs(math.dist(p, cf) - v_vqc * tau))
+        gap_fp_cf = max(gap_fp_cf, math.dist(fp, cf))
+    assert worst_fp <= TOL, f"intercepción fixed_point difiere: {worst_fp}"
+    assert worst_cf <= 1e-6 * max(1.0, config.L), f"closed_form no intercepta: {worst_cf}"
+
+    # --- tiempos ---
+    t_args = [(t,) for t in ts[:args.calls]]
+    pred_orig = _timeit(lambda t: _looped_predict(closed, v_eqc, period, t), t_args)
+    pred_tab = _timeit(traj.position, t_args)
+    ic_orig = _timeit(lambda p, now: _orig_intercept(closed, v_eqc, period, p, v_vqc, now), cases)
+    ic_fp = _timeit(lambda p, now: traj.intercept_fixed_point(p, v_vqc, now), cases)
+    ic_cf = _timeit(lambda p, now: traj.intercept_closed_form(p, v_vqc, now), cases)
+
+    print(f"ruta {args.route}: {len(wps)} waypoints, vuelta {period:.0f} s, tabla en {build*1e3:.3f} ms")
+    print(f"paridad: posición máx |Δ| = {worst:.2e}, intercepción fixed_point máx |Δ| = {worst_fp:.2e}, "
+          f"residuo closed_form = {worst_cf:.2e}, |fixed_point − closed_form| máx = {gap_fp_cf:.2f} u")
+    print(f"{'operación':<26} | {'original µs':>11} | {'tabla µs':>9} | {'x':>7}")
+    print(f"{'predict_eqc_position':<26} | {pred_orig*1e6:>11.2f} | {pred_tab*1e6:>9.2f} | "
+          f"{pred_orig/max(pred_tab, 1e-12):>6.1f}x")
+    print(f"{'intercept fixed_point':<26} | {ic_orig*1e6:>11.2f} | {ic_fp*1e6:>9.2f} | "
+          f"{ic_orig/max(ic_fp, 1e-12):>6.1f}x")
+    print(f"{'intercept closed_form':<26} | {ic_orig*1e6:>11.2f} | {ic_cf*1e6:>9.2f} | "
+          f"{ic_orig/max(ic_cf, 1e-12):>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Cross-leader PoI claim registry (config.CLAIM_MODE = "registry"):
+- With K > 1 leaders several of them can detect the same PoI and keep it in
+  their own pending; each one may then assign it to its followers, and the
+  global collection lock only stops the duplicate once a follower is
+  already over the PoI.
+- A leader claims a PoI when it sends the ASSIGN. The claim lasts `lease`
+  seconds (config.CLAIM_LEASE); other leaders leave the PoI out of their
+  assignment candidates while it holds. Once the lease runs out (the
+  follower dropped it or is too slow) any leader may assign it again.
+- A delivered PoI is closed for good: other leaders drop it from pending.
+- Counters: skips (PoIs a leader left out because another one claimed them,
+  once per leader and PoI) and takeovers (claims taken after a lease of
+  another leader expired).
+"""
+
+import math
+from typing import Dict, Optional, Set, Tuple
+
+CLAIM_MODES = ("off", "registry")
+
+
+class ClaimRegistry:
+
+    def __init__(self, lease: float) -> None:
+        self.lease = float(lease)
+        self._claims: Dict[str, Tuple[int, float]] = {}   # label → (líder, expira)
+        self.done: Set[str] = set()                        # entregados (claim sin expiración)
+        self._skipped: Set[Tuple[int, str]] = set()        # (líder, label) ya contados
+        self.takeovers = 0
+
+    def owner(self, label: str, now: float) -> Optional[int]:
+        """Líder con claim vigente sobre `label` en `now`, o None."""
+        c = self._claims.get(label)
+        if c is None or c[1] <= now:
+            return None
+        return c[0]
+
+    def claim(self, label: str, leader: int, now: float) -> None:
+        """ASSIGN de `leader`: toma (o renueva) el claim por `lease` s."""
+        if label in self.done:
+            return
+        c = self._claims.get(label)
+        if c is not None and c[0] != leader:
+            self.takeovers += 1
+        self._claims[label] = (leader, now + self.lease)
+
+    def close(self, label: str, leader: int) -> None:
+        """DELIVER recibido por `leader`: el PoI queda cerrado para todos."""
+        self.done.add(label)
+        self._claims[label] = (leader, math.inf)
+
+    def skip(self, label: str, leader: int) -> None:
+        self._skipped.add((leader, label))
+
+    @property
+    def skips(self) -> int:
+        return len(self._skipped)
@@ -28,38 +28,102 @@ VQC_SPEED = VQC_SPEED_BASE * SCALE
 DURATION  = DURATION_BASE   # mantenemos segundos “reales” (ya escalamos distance/speed)
 
 # ---------- OTROS PARÁMETROS DE MISIÓN ----------
-POIS: List[Dict] = []
 ASSIGNMENT_POLICY = 'load_balancing'
+# load_balancing: True → un solo paquete ASSIGN por VQC y tick con todos sus PoIs (False = uno por PoI, original)
+BATCH_ASSIGN_MESSAGES = True
 M = 5
 NUM_VQCS = 5
 MAX_ASSIGN_PER_ENCOUNTER = 9999999999999999999999999999999999999999999
 
-# ---------- Métricas globales ----------
-METRICS = {
-    "unique_ids": set(),
-    "redundant": 0,
-    "collected_but_not_delivered": 0,
-    "global_score": 0.0,
-    "eqc_reports": [],
-    "lat_service_all": [],
-    "lat_contact_all": [],
-    "lat_e2e_all": [],
-    "t_detect_all": [],
-    "cam_raw_all": 0,
-    "cam_hits_all": 0,
-    "eqc_finished": 0,
-}
+# Estado por corrida (PoIs, métricas, lock global, LEADER_OF, mapas POI_*):
+# vive en run_context.RunContext, no en este módulo.
 
 BUMP_FREE_ON_ASSIGNED_DELIVER = False
 USE_GLOBAL_COLLECTION_LOCK = True
 WARN_XY_VS_3D = True
 XY3D_MAX_SAMPLES = 5
-COLLECTED_LABELS = set()
-LEADER_OF: Dict[int, int] = {}
 
 MAX_POIS = 100
 URGENCY_WEIGHTS = {1: 0.2, 2: 0.5, 3: 1.0}
 
+# ---------- Índice espacial de PoIs (poi_index.POIGridIndex) ----------
+POI_GRID_CELL = 40.0   # lado de celda (u); se construye en run_simulation tras get_pois()
+
+# ---------- PoIs virtuales (poi_field.POIField) ----------
+# True → los PoIs no se crean como nodos POIProtocol; la cámara del EQC consulta el campo.
+VIRTUAL_POIS = False
+
+# ---------- Trayectorias de líder (trajectory.LeaderTrajectory) ----------
+# Solver de intercepción de los VQC: "fixed_point" (5 refinamientos, comportamiento original)
+# o "closed_form" (primer instante exacto de intercepción, una cuadrática por tramo).
+INTERCEPT_SOLVER = "fixed_point"
+
+# ---------- Detección de PoIs del EQC (detection_schedule.py) ----------
+# "camera"         → take_picture() cada tick de 1 s (original)
+# "schedule"       → eventos de entrada precalculados, cuantizados a los ticks de 1 s
+# "schedule_exact" → eventos de entrada precalculados con el instante exacto de entrada
+DETECTION_MODE = "camera"
+
+# ---------- Codec de mensajes EQC ↔ VQC (message_codec.py) ----------
+# "compact" → registros binarios con índices de PoI; "json" → texto legible (depuración)
+MESSAGE_CODEC = "compact"
+
+# ---------- Acumuladores de latencia (quantiles.py) ----------
+# "exact"  → todas las muestras, percentiles por rango exacto (reproducción del paper)
+# "sketch" → sketch logarítmico en streaming, memoria acotada, error relativo <= 1 %
+LATENCY_STATS = "exact"
+
+# ---------- Planificación de timers (eqc_protocol / vqc_protocol) ----------
+# "tick"  → EQC sondea detección + asignación cada 1 s y VQC check_roam cada 0.5 s (original)
+# "event" → pase de asignación solo tras HELLO / DELIVER / detección nueva; check_roam al terminar misión
+SCHEDULER = "tick"
+
+# ---------- Beacon HELLO de los VQC (vqc_protocol) ----------
+# "periodic" → HELLO cada 1 s durante toda la misión (original)
+# "adaptive" → HELLO solo si cambian los huecos, hay descubrimientos por entregar, el VQC
+#              re-entra en el rango del líder o pasan HELLO_KEEPALIVE s sin HELLO confirmado
+HELLO_MODE = "periodic"
+HELLO_KEEPALIVE = 5.0   # s
+
+# ---------- Entrega de hallazgos VQC → EQC (vqc_protocol / eqc_protocol) ----------
+# "separate"  → HELLO → HELLO_ACK → DELIVER → DELIVER_ACK (original)
+# "piggyback" → el HELLO lleva el buffer discovered y el HELLO_ACK confirma todo; un
+#               descubrimiento nuevo manda el HELLO en el acto si el líder está en rango
+DELIVER_MODE = "separate"
+
+# ---------- Orden de visita de next2visit (route_planner.py) ----------
+# "fifo" → nuevos del ASSIGN primero y luego los antiguos (original)
+# "insertion" → inserción más barata incremental; "nn_2opt" → vecino más cercano / inserción + 2-opt
+ROUTE_PLANNER = "fifo"
+ROUTE_URGENCY_WEIGHT = 0.0   # 0 → solo longitud; > 0 adelanta las paradas urgentes
+
+# ---------- Score de asignación en el EQC (eqc_protocol) ----------
+# "distance" → urgency / distancia desde la posición del último HELLO (original)
+# "eta"      → urgency / s estimados hasta llegar, con la ruta comprometida de cada VQC
+#              (PoIs asignados y no entregados, mismo ROUTE_PLANNER) y su posición extrapolada
+ASSIGN_SCORING = "distance"
+
+# ---------- Claims entre líderes (claim_registry.py) ----------
+# "off"      → cada líder asigna lo que tenga en pending (original)
+# "registry" → un ASSIGN reserva el PoI CLAIM_LEASE s; los demás líderes no lo asignan mientras tanto
+CLAIM_MODE = "off"
+CLAIM_LEASE = 300.0  # s (del orden del p99 de service latency: más corto deja reasignar PoIs aún en camino)
+
+# ---------- Re-asociación VQC → líder (vqc_protocol / eqc_protocol) ----------
+# "static" → LEADER_OF fijo, i % K (original)
+# "load"   → HELLO_ACK / ASSIGN llevan la carga de los líderes (backlog, huecos libres de sus followers,
+#            nº de followers); un VQC ocioso (satélite, sin ruta ni hallazgos por entregar) pasa al líder con
+#            más backlog sin cubrir por follower si la ganancia, menos la distancia hasta ese líder /
+#            REASSOC_DIST_PER_POI, es >= REASSOC_HYSTERESIS y lleva >= REASSOC_DWELL s con el actual.
+#            Sin ganancia conocida, el último de la V de un líder con más followers que el reparto parejo
+#            va una vez a conocer al líder sin datos más cercano tras REASSOC_EXPLORE_IDLE s sin ASSIGN
+REASSOC_MODE = "static"
+REASSOC_PERIOD = 5.0        # s entre evaluaciones (además de tras cada DELIVER_ACK)
+REASSOC_HYSTERESIS = 3.0    # PoIs por follower
+REASSOC_DWELL = 30.0        # s
+REASSOC_DIST_PER_POI = 200.0   # u de vuelo que "cuestan" un PoI de ganancia (~17 s a VQC_SPEED = 12)
+REASSOC_EXPLORE_IDLE = 120.0   # s sin ASSIGN antes de ir a conocer a un líder sin datos
+
 # ---------- POSICIONES / RUTAS (en BASE y luego se escalan) ----------
 # Define los waypoints en COORDENADAS BASE (0..L_BASE y alturas H_*_BASE):
 EQC_INIT_POS_BASE: Tuple[float, float, float] = (0.0, 0.0, H_EQC_BASE)
@@ -111,6 +175,12 @@ def _scale_wp_dict(wp_dict):
 EQC_INIT_POS = tuple(v * SCALE for v in EQC_INIT_POS_BASE)
 EQC_WAYPOINTS: Dict[int, List[Tuple[float, float, float]]] = _scale_wp_dict(EQC_WAYPOINTS_BASE)
 
+# Rutas de los líderes (route_generator.py): "legacy" → las 4 de EQC_WAYPOINTS_BASE (cada una barre
+# todo el área, K <= 4); "strips" / "cells" → K regiones disjuntas de igual área, cada una en
+# boustrophedon con carriles separados por la huella de la cámara (run_simulation.apply_params)
+EQC_ROUTE_LAYOUT = "legacy"
+EQC_ROUTE_OVERLAP = 0.0   # fracción de solape entre carriles contiguos (0 → huellas tangentes)
+
 # ---------- PoIs ----------
 def get_pois(seed: int, n: int) -> List[Dict]:
     rng = random.Random(seed)
@@ -0,0 +1,187 @@
+"""
+Analytical camera-detection schedule:
+- The leaders fly fixed looping routes (LoopMission.RESTART: last waypoint →
+  first waypoint → ...) at constant EQC_SPEED, so the intervals in which each
+  PoI lies inside a leader's camera sphere (3D distance <= R_CAMERA) follow
+  from segment geometry: one quadratic per (segment, PoI) pair near the segment.
+- Built once per run (run_simulation.run_scenario) for every active leader; the EQC
+  pops the (time, PoI) entry events that are due at each "assign" tick
+  instead of calling take_picture() and matching detections against PoIs.
+- With the event scheduler (EQC "detect" timer), next_time() tells the leader
+  when to wake up for the next entry instead of ticking every second.
+- Two timings:
+    "schedule"        → 1 s sampling quantization: the event fires at the first
+                        "assign" tick (t = 1, 2, ...) inside the interval, as the
+                        polling camera would see it; intervals shorter than the
+                        gap between ticks are missed, as today.
+    "schedule_exact"  → the event carries the exact entry time.
+- Assumes an omnidirectional camera (camera_theta >= 180°, as configured in
+  EQCProtocol); a narrower cone is not modelled.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from poi_index import POIGridIndex
+
+DETECTION_MODES = ("camera", "schedule", "schedule_exact")
+
+
+def _sphere_interval(a, u, q, r2: float, dur: float):
+    """
+    Sub-intervalo [s0, s1] ⊆ [0, dur] con |a + u·s − q|² <= r2, o None.
+    a: inicio del tramo, u: velocidad, q: PoI.
+    """
+    wx, wy, wz = a[0] - q[0], a[1] - q[1], a[2] - q[2]
+    qa = u[0] * u[0] + u[1] * u[1] + u[2] * u[2]
+    qb = 2.0 * (wx * u[0] + wy * u[1] + wz * u[2])
+    qc = wx * wx + wy * wy + wz * wz - r2
+    if qa < 1e-18:                      # tramo degenerado (líder quieto)
+        return (0.0, dur) if qc <= 0 else None
+    disc = qb * qb - 4.0 * qa * qc
+    if disc < 0:
+        return None
+    sq = math.sqrt(disc)
+    s0 = max(0.0, (-qb - sq) / (2.0 * qa))
+    s1 = min(dur, (-qb + sq) / (2.0 * qa))
+    return (s0, s1) if s0 <= s1 else None
+
+
+class DetectionSchedule:
+    """Eventos (t, índice de PoI) de UN líder, ordenados por tiempo, con cursor de consumo."""
+
+    def __init__(self, events: List[Tuple[float, int]]) -> None:
+        events.sort()
+        self.times = [t for t, _ in events]
+        self.pois = [i for _, i in events]
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def next_time(self) -> Optional[float]:
+        """Instante del próximo evento sin consumir (None si ya no quedan)."""
+        return self.times[self._cursor] if self._cursor < len(self.times) else None
+
+    def due(self, now: float) -> List[Tuple[float, int]]:
+        """Eventos (t, índice de PoI) con t <= now aún no consumidos, en orden de tiempo."""
+        start = end = self._cursor
+        times = self.times
+        while end < len(times) and times[end] <= now:
+            end += 1
+        self._cursor = end
+        return list(zip(times[start:end], self.pois[start:end]))
+
+
+def visibility_intervals(
+    waypoints: Sequence[Sequence[float]],
+    speed: float,
+    pois: Sequence[dict],
+    index: POIGridIndex,
+    reach: float,
+    horizon: float,
+    poi_z: float = 0.0,
+) -> Dict[int, List[Tuple[float, float]]]:
+    """
+    Intervalos [t_in, t_out] (fusionados entre tramos contiguos) en que cada PoI está
+    dentro de la esfera de cámara del líder, para t en [0, horizon], con la ruta en bucle.
+    """
+    wps = [tuple(float(c) for c in w) for w in waypoints]
+    if len(wps) > 1:
+        wps.append(wps[0])              # RESTART: vuelve al primer waypoint y repite
+    segs = []
+    for a, b in zip(wps, wps[1:]):
+        length = math.dist(a, b)
+        dur = max(1e-9, length / speed)
+        u = tuple((b[k] - a[k]) / dur for k in range(3))
+        segs.append((a, b, u, dur))
+    period = sum(s[3] for s in segs)
+    r2 = reach * reach
+
+    # Candidatos por tramo (independientes de la vuelta): caja del tramo ± radio en el suelo
+    cand = []
+    for a, b, u, dur in segs:
+        dz = min(abs(a[2] - poi_z), abs(b[2] - poi_z))
+        rg = math.sqrt(max(0.0, r2 - dz * dz))
+        if r2 < dz * dz:
+            cand.append([])
+            continue
+        cand.append(index.query_box(min(a[0], b[0]) - rg, min(a[1], b[1]) - rg,
+                                    max(a[0], b[0]) + rg, max(a[1], b[1]) + rg))
+
+    # Intervalos de una vuelta (tiempo relativo al inicio de la vuelta)
+    lap: Dict[int, List[Tuple[float, float]]] = {}
+    t0 = 0.0
+    for (a, b, u, dur), idxs in zip(segs, cand):
+        for i in idxs:
+            px, py = pois[i]["coord"]
+            iv = _sphere_interval(a, u, (px, py, poi_z), r2, dur)
+            if iv is None:
+                continue
+            lo, hi = t0 + iv[0], t0 + iv[1]
+            lst = lap.setdefault(i, [])
+            if lst and lo <= lst[-1][1] + 1e-9:         # continúa en el tramo siguiente
+                lst[-1] = (lst[-1][0], max(lst[-1][1], hi))
+            else:
+                lst.append((lo, hi))
+        t0 += dur
+
+    # Repetir la vuelta hasta cubrir el horizonte (y fusionar a través del cierre del bucle)
+    out: Dict[int, List[Tuple[float, float]]] = {}
+    laps = 1 if period <= 0 else int(math.ceil(horizon / period))
+    for i, lst in lap.items():
+        merged: List[Tuple[float, float]] = []
+        for n in range(laps):
+            off = n * period
+            for lo, hi in lst:
+                lo, hi = lo + off, hi + off
+                if lo > horizon:
+                    break
+                if merged and lo <= merged[-1][1] + 1e-9:
+                    merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+                else:
+                    merged.append((lo, hi))
+        out[i] = merged
+    return out
+
+
+def build_schedule(
+    waypoints: Sequence[Sequence[float]],
+    speed: float,
+    pois: Sequence[dict],
+    index: POIGridIndex,
+    reach: float,
+    horizon: float,
+    mode: str = "schedule",
+    tick: float = 1.0,
+    first_tick: float = 1.0,
+) -> DetectionSchedule:
+    """Un evento de entrada por intervalo de visibilidad (ver docstring del módulo para `mode`)."""
+    if mode not in ("schedule", "schedule_exact"):
+        raise ValueError(f"modo de detección no soportado: {mode}")
+    events: List[Tuple[float, int]] = []
+    for i, ivs in visibility_intervals(waypoints, speed, pois, index, reach, horizon).items():
+        for lo, hi in ivs:
+            if mode == "schedule_exact":
+                events.append((lo, i))
+                continue
+            # primer tick first_tick + k·tick dentro de [lo, hi]
+            k = max(0, math.ceil((lo - first_tick) / tick - 1e-9))
+            t = first_tick + k * tick
+            if t <= hi:
+                events.append((t, i))
+    return DetectionSchedule(events)
+
+
+def build_schedules(
+    routes: Dict[int, Sequence[Sequence[float]]],
+    leaders: Sequence[int],
+    speed: float,
+    pois: Sequence[dict],
+    index: POIGridIndex,
+    reach: float,
+    horizon: float,
+    mode: str = "schedule",
+) -> Dict[int, DetectionSchedule]:
+    """Un DetectionSchedule por líder activo (claves de config.EQC_WAYPOINTS)."""
+    return {k: build_schedule(routes[k], speed, pois, index, reach, horizon, mode) for k in leaders}
@@ -4,14 +4,36 @@ Exploration Quadcopter (E-QC) protocol:
 - Captures and filters PoI detections.
 - Coordinates with V-QCs by sending ASSIGN messages.
 - Limits total ASSIGNs per physical encounter (not per timer tick)
+- Scheduling (config.SCHEDULER): "tick" polls detection + assignment in one
+  "assign" timer every second (original). "event" runs an assignment pass
+  only when a HELLO, DELIVER or new detection triggers it, and a "detect"
+  timer only at the next scheduled camera entry (detection_schedule.py) or,
+  with the polling camera, every second.
+- Delivery (config.DELIVER_MODE): a HELLO may carry the follower's findings
+  ("pids", piggyback mode); they are processed like a DELIVER and
+  acknowledged inside the HELLO_ACK instead of a separate DELIVER_ACK.
+- Assignment scoring (config.ASSIGN_SCORING): "distance" scores a PoI by
+  urgency / XY distance from the follower's last HELLO position (original);
+  "eta" keeps a route_planner.FollowerRouteModel per follower (assigned, not
+  yet served PoIs, dead-reckoned position) and scores by urgency / estimated
+  time until the follower would reach the PoI.
+- Cross-leader claims (config.CLAIM_MODE = "registry", claim_registry.py):
+  an ASSIGN claims its PoIs for CLAIM_LEASE s in ctx.claims; other leaders
+  leave claimed PoIs out of their candidates and drop delivered ones.
+- Follower re-association (config.REASSOC_MODE = "load"): HELLO_ACK and
+  ASSIGN carry the leader's load (backlog, free slots, followers) plus the
+  loads it learned from followers' HELLOs; it forgets followers that left.
 """
 
 import json                                                   
 import math                                                  
 import logging
-from typing import List
+from typing import Dict, List
 from collections import Counter        #
 
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
 from gradysim.protocol.interface import IProtocol
 from gradysim.protocol.messages.communication import CommunicationCommand, CommunicationCommandType
 from gradysim.protocol.messages.telemetry import Telemetry
@@ -19,31 +41,47 @@ from gradysim.protocol.plugin.mission_mobility import MissionMobilityPlugin, Mis
 from gradysim.simulator.extension.camera import CameraHardware, CameraConfiguration
 
 import config
+import run_context
+from quantiles import make_stats
+from message_codec import merge_loads
+from route_planner import FollowerRouteModel
 from config import MAX_ASSIGN_PER_ENCOUNTER
 from config import EQC_WAYPOINTS 
+
+SCHEDULER_MODES = ("tick", "event")
+SCORING_MODES = ("distance", "eta")
 # --- dentro de EQCProtocol ---
 
 class EQCProtocol(IProtocol):
 
     def initialize(self) -> None:
         self.id = self.provider.get_id()
+        self.ctx = run_context.current()
         self.log = logging.getLogger(f"EQC-{self.id}")
         self.log.info(f"Current handlers: s{self.log.handlers}")
-        self.assignment_policy = config.ASSIGNMENT_POLICY # or "round_robin" or "load_balancing"  greedy
+        self.assignment_policy = config.ASSIGNMENT_POLICY # or "round_robin" or "load_balancing" or "optimal"  greedy
         self.encounter_assigned = {vid: 0 for vid in range(config.NUM_VQCS)}
         self.last_hello_time = {}
         # === Assignment scheduler (Pattern B) ===
         self._assign_triggered = False          # flag coalescido de "quiero asignar"
         self._next_assign_earliest = 0.0        # cooldown opcional (timestamp sim en segundos)
+        self.scheduler = config.SCHEDULER       # "tick" (poll 1 s) | "event"
+        self._assign_timer_at = None            # (event) pase de asignación ya programado
+        self.assign_scoring = config.ASSIGN_SCORING   # "distance" | "eta"
+        self.vqc_models: Dict[int, FollowerRouteModel] = {}   # (eta) ruta comprometida estimada por VQC
+        self.reassoc_mode = config.REASSOC_MODE       # "static" | "load"
+        self.load_view: Dict[int, list] = {}          # (load) otros líderes → última entrada "loads" oída
+        self._loads_sent: Dict[int, float] = {}       # (load) VQC → última vez que se le mandó la carga
 
         self._last_wp = None
         self.pos = (0.0, 0.0, 0.0)
 
         #### [LATENCY] nuevas métricas desglosadas
-        self.lat_service = []    # (label, t_arrive - t_detect)
-        self.lat_contact = []    # (label, t_deliver_ack - t_arrive)
-        self.lat_e2e     = []    # (label, t_deliver_ack - t_spawn)  # t_spawn ~ self.start_time
-        self.t_detect_list = []  # (t_detect - t_spawn)
+        # quantiles.ExactStats (listas, paper) o SketchStats (streaming) según config.LATENCY_STATS
+        self.lat_service = make_stats(config.LATENCY_STATS)    # t_arrive - t_detect
+        self.lat_contact = make_stats(config.LATENCY_STATS)    # t_deliver_ack - t_arrive
+        self.lat_e2e     = make_stats(config.LATENCY_STATS)    # t_deliver_ack - t_spawn  # t_spawn ~ self.start_time
+        self.t_detect_list = make_stats(config.LATENCY_STATS)  # t_detect - t_spawn
         #### [/LATENCY]
 
         waypoints = config.EQC_WAYPOINTS[self.id]
@@ -65,6 +103,7 @@ class EQCProtocol(IProtocol):
         # ---------- Métricas ----------
         self.start_time        = self.provider.current_time()
         self.assign_count      = 0                # total ASSIGNs enviadas
+        self.assign_msgs       = 0                # paquetes ASSIGN enviados (un paquete puede llevar varios PoIs)
         self.assign_success    = 0
         self.global_score      = 0                # PoIs de ASSIGN que efectivamente se entregaron
         self.assign_times      = {}               # mapa poi_label → t_assign
@@ -72,10 +111,6 @@ class EQCProtocol(IProtocol):
         self.coverage_timeline = []               # lista de (elapsed_time, unique_count)
         self.redundant_delivers = 0
         
-        config.METRICS.setdefault("unique_ids", set())
-        config.METRICS.setdefault("redundant", 0)
-        config.METRICS.setdefault("global_score", 0)
-        
         self.cam_raw_count     = 0   # cada nodo detectado por take_picture()
         self.cam_poi_matches   = 0   # cuántos de esos nodes eran PoIs
         # Flags
@@ -86,7 +121,7 @@ class EQCProtocol(IProtocol):
         }
     
         # Configurar cámara
-        cam_cfg = CameraConfiguration(
+        cam_cfg = self.cam_cfg = CameraConfiguration(
             camera_reach=config.R_CAMERA,
             camera_theta=180.0, #########################no filtra por anguñp
             facing_elevation=180.0,
@@ -96,13 +131,16 @@ class EQCProtocol(IProtocol):
         self.log.info(f"📷 Camera configured: reach={config.R_CAMERA}, theta={cam_cfg.camera_theta}")
 
         # Estados internos
-        self.pending: List[dict] = []
+        self.pending: Dict[str, dict] = {}     # label → PoI, en orden de detección (dict ordenado)
         self.detect_ts: dict = {}
         self.vqc_states: dict = {}
         self.assign_counts = {}  
-        # Programar muestreo de detección y asignación cada 1s
+        # Programar muestreo de detección y asignación cada 1s (tick) o solo la detección (event)
         next_t = self.provider.current_time() + 1
-        self.provider.schedule_timer("assign", next_t)
+        if self.scheduler == "tick":
+            self.provider.schedule_timer("assign", next_t)
+        else:
+            self._schedule_detect(next_t)
                 # === [LOG] Resumen inicial del EQC ===
         try:
             self.log.info(
@@ -113,7 +151,7 @@ class EQCProtocol(IProtocol):
             self.log.warning(f"[EQC-{self.id}] init log failed: {e}")
         # =====================================
 
-        self.log.info(f"✅ First ‘assign’ timer scheduled for t={next_t:.2f}s")
+        self.log.info(f"✅ First ‘assign’ timer scheduled for t={next_t:.2f}s (scheduler={self.scheduler})")
         self.log.debug(f"⏱️ Scheduled first 'assign' at t={next_t:.2f}")
 
     # === [VISUALIZACIÓN] Publicar variables al panel ===""""
@@ -128,10 +166,10 @@ class EQCProtocol(IProtocol):
                 tv["eqc_id"] = None
 
             # Métricas globales (conserva lo que ya publicabas)
-            uniq = config.METRICS.get("unique_ids", set())
+            uniq = self.ctx.metrics.get("unique_ids", set())
             tv["ids_collected"] = sorted(list(uniq))                 # lista de labels únicos
             tv["unique_count"]  = len(uniq)                          # cuántos únicos
-            tv["redundant"]     = int(config.METRICS.get("redundant", 0))
+            tv["redundant"]     = int(self.ctx.metrics.get("redundant", 0))
 
             # Contadores de asignación en este EQC
             tv["assigns"] = int(getattr(self, "assign_count", 0))
@@ -140,7 +178,7 @@ class EQCProtocol(IProtocol):
             try:
                 pending_list = [
                     (p.get("label") if isinstance(p, dict) and "label" in p else str(p))
-                    for p in getattr(self, "pending", [])
+                    for p in getattr(self, "pending", {}).values()
                 ]
             except Exception:
                 pending_list = []
@@ -184,9 +222,23 @@ class EQCProtocol(IProtocol):
 
     # === Assignment scheduler (Pattern B) ===
     def trigger_assign(self, reason: str) -> None:
-        """Marca intención de asignar; no asigna aquí."""
+        """Marca intención de asignar; no asigna aquí. En modo event programa un único pase."""
         self._assign_triggered = True
         self.log.debug(f"trigger_assign ← {reason} (pending={len(getattr(self,'pending',[]))}, vqc_states={len(getattr(self,'vqc_states',{}))})")
+        if self.scheduler == "event" and self._assign_timer_at is None:
+            # Coalesce: varios HELLO/DELIVER en el mismo instante → un solo pase (respetando el cooldown)
+            self._assign_timer_at = max(self.provider.current_time(), self._next_assign_earliest)
+            self.provider.schedule_timer("assign", self._assign_timer_at)
+
+    def _schedule_detect(self, earliest: float) -> None:
+        """(event) Próximo timer 'detect': siguiente entrada programada del schedule, o muestreo de cámara en `earliest`."""
+        schedule = self.ctx.detection_schedules.get(self.id)
+        if schedule is None:
+            self.provider.schedule_timer("detect", earliest)
+            return
+        t = schedule.next_time()
+        if t is not None:
+            self.provider.schedule_timer("detect", max(t, earliest))
 
 
     def _any_vqc_has_free(self) -> bool:
@@ -228,6 +280,9 @@ class EQCProtocol(IProtocol):
 
     def handle_timer(self, timer: str) -> None: # lo que hace es actualizar self.pending con las coordenadas detectadas
         self.log.debug(f"handle_timer invoked with timer='{timer}'")
+        if self.scheduler == "event":
+            self._handle_timer_event(timer)
+            return
         if timer == "assign":
             self._executed["handle_timer.assign"] = True
             now = self.provider.current_time()
@@ -237,9 +292,7 @@ class EQCProtocol(IProtocol):
 
             # [ADD] — Antes de todo: purga de pendientes ya bloqueados globalmente
             if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-                before = len(self.pending)
-                self.pending = [p for p in self.pending if p["label"] not in config.COLLECTED_LABELS]
-                removed = before - len(self.pending)
+                removed = self._drop_pending(self.ctx.collected_labels)
                 if removed > 0:
                     self.log.debug(f"🧹 Pruned {removed} pending by global lock")
             # [STATE] foto de estado al entrar
@@ -252,42 +305,7 @@ class EQCProtocol(IProtocol):
                 f"vqc_free={vqc_free_snapshot}, triggered={self._assign_triggered}"
             )
 
-            detected = self.camera.take_picture()
-            # Métrica raw
-            self.cam_raw_count += len(detected)
-            self.log.debug(f"⚙️  assign @ t={now:.2f}: {len(detected)} nodos detectados")
-
-            # Log raw detections (agrupados)
-            self._log_raw_detections(detected)
-
-            # Filtrar PoIs
-            new_cnt = 0
-            eps = 0.2
-            for poi in config.POIS:
-                px, py = poi["coord"]
-                for node in detected:
-                    x, y, z = node["position"]
-                    if abs(x-px)<eps and abs(y-py)<eps and abs(z-0.0)<eps:
-                        label = poi["label"]
-
-                        # [ADD] — Si el VQC ya “bloqueó” globalmente este PoI, no lo metas a pending
-                        if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (label in config.COLLECTED_LABELS):
-                            self.log.debug(f"⛔ Skip adding {label}: globally collected by a VQC")
-                            break  # pasamos al siguiente poi
-
-                        # Tu lógica original para registrar detección válida 1ª vez
-                        if label not in self.detect_ts:
-                            self.cam_poi_matches += 1
-                            self.detect_ts[label] = now
-
-                            self.t_detect_list.append(now - self.start_time)
-
-                            # [ADD] — Evitar duplicados en pending por seguridad (por label)
-                            if all(p["label"] != label for p in self.pending):
-                                self.pending.append(poi)
-                            new_cnt += 1
-                            self.log.info(f"🔍 {label} detectado @ {poi['coord']} t={now:.2f}")
-                        break  # ya casó con este poi, sale del for node
+            new_cnt = self._detect(now)
 
             self.log.debug(f"🗂️ pending size /relacionado con new_cnt: {len(self.pending)} (+{new_cnt})")
             self.log.debug(
@@ -334,10 +352,91 @@ class EQCProtocol(IProtocol):
                         msg += f" | vqc_free={vqc_free_snapshot}"
                     self.log.info(msg)
 
+    def _handle_timer_event(self, timer: str) -> None:
+        """Scheduler "event": 'detect' en las entradas de cámara, 'assign' solo cuando trigger_assign lo pidió."""
+        now = self.provider.current_time()
+        if timer == "detect":
+            new_cnt = self._detect(now)
+            if new_cnt:
+                self.log.debug(f"[EQC-{self.id}] detect_summary: new_pending={new_cnt}, pending_now={len(self.pending)}")
+                self.trigger_assign("DETECT")
+            # schedule: siguiente entrada (> now); cámara: siguiente muestreo de 1 s
+            self._schedule_detect(now if self.ctx.detection_schedules.get(self.id) is not None else now + 1)
+        elif timer == "assign":
+            self._executed["handle_timer.assign"] = True
+            self._assign_timer_at = None
+            if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
+                removed = self._drop_pending(self.ctx.collected_labels)
+                if removed > 0:
+                    self.log.debug(f"🧹 Pruned {removed} pending by global lock")
+            if self._should_assign_now(now):
+                self._next_assign_earliest = now + 0.1 #100ms
+                self._assign_triggered = False
+                self.log.info(
+                    f"[EQC-{self.id}] assign_exec @ t={now:.2f}: pending_pre={len(self.pending)}, "
+                    f"vqcs={len(self.vqc_states)}"
+                )
+                self.assign_to_vqcs()
+                self.log.info(
+                    f"[EQC-{self.id}] assign_done: pending_post={len(self.pending)}, "
+                    f"assigns_total={self.assign_count}"
+                )
+
+    def _detect(self, now: float) -> int:
+        """Detecciones de este instante (cámara o schedule) → pending. Devuelve cuántos PoIs nuevos."""
+        schedule = self.ctx.detection_schedules.get(self.id)
+        if schedule is not None:
+            # Modo schedule: eventos de entrada precalculados (detection_schedule.py), sin cámara
+            hits = schedule.due(now)
+            self.cam_raw_count += len(hits)
+            self.log.debug(f"⚙️  assign @ t={now:.2f}: {len(hits)} entradas de PoI programadas")
+        else:
+            detected = self.camera.take_picture()
+            # Modo PoIs virtuales: los PoIs no son nodos; se consultan en el campo (misma semántica de cámara)
+            if self.ctx.poi_field is not None:
+                detected += self.ctx.poi_field.take_picture(self.pos, self.cam_cfg)
+            # Métrica raw
+            self.cam_raw_count += len(detected)
+            self.log.debug(f"⚙️  assign @ t={now:.2f}: {len(detected)} nodos detectados")
+
+            # Log raw detections (agrupados)
+            self._log_raw_detections(detected)
+
+            # Filtrar PoIs: todas las detecciones a la vez contra el índice (NumPy, ctx.poi_index)
+            # en vez de recorrer ctx.pois × detected. Se procesan en el orden de ctx.pois.
+            eps = 0.2
+            pos = np.array([node["position"] for node in detected], dtype=float).reshape(-1, 3)
+            ground = np.abs(pos[:, 2] - 0.0) < eps
+            hits = [(now, i) for i in self.ctx.poi_index.match_exact(pos[ground, 0], pos[ground, 1], eps)]
+
+        new_cnt = 0
+        for t_seen, i in hits:
+            poi = self.ctx.pois[i]
+            label = poi["label"]
+
+            # [ADD] — Si el VQC ya “bloqueó” globalmente este PoI, no lo metas a pending
+            if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (label in self.ctx.collected_labels):
+                self.log.debug(f"⛔ Skip adding {label}: globally collected by a VQC")
+                continue  # pasamos al siguiente poi
+
+            # Tu lógica original para registrar detección válida 1ª vez
+            if label not in self.detect_ts:
+                self.cam_poi_matches += 1
+                self.detect_ts[label] = t_seen
+                self.ctx.poi_table.detect(i, t_seen, self.id)
+
+                self.t_detect_list.add(t_seen - self.start_time)
+
+                # [ADD] — Evitar duplicados en pending por seguridad (por label)
+                if label not in self.pending:
+                    self.pending[label] = poi
+                new_cnt += 1
+                self.log.info(f"🔍 {label} detectado @ {poi['coord']} t={t_seen:.2f}")
+        return new_cnt
 
     def handle_packet(self, message: str) -> None: #se activa con HELLO o deliver, actualiza vqc states, pendindg      y en deliver
-        self.log.debug(f"📥 [RAW] handle_packet recibido: {message}")
-        msg = json.loads(message)
+        msg = self.ctx.codec.decode(message)
+        self.log.debug(f"📥 [RAW] handle_packet recibido: {msg}")
         t = msg.get("type")
         vid = msg["v_id"]
         # Si aún no tenemos estado de este VQC y el mensaje no es HELLO, lo ignoramos
@@ -359,6 +458,16 @@ class EQCProtocol(IProtocol):
             #self.pending = [p for p in self.pending if p["label"] not in visited]
             #self.log.debug(f"🗑️ pending filtered: {before}→{len(self.pending)}")
             self.vqc_states[vid] = {"huecos": free, "pos": pos}
+            if "loads" in msg:
+                merge_loads(self.load_view, msg["loads"], skip=self.id)
+            if self.assign_scoring == "eta":
+                model = self.vqc_models.get(vid)
+                if model is None:
+                    model = self.vqc_models[vid] = FollowerRouteModel(
+                        config.VQC_SPEED, config.ROUTE_PLANNER, config.ROUTE_URGENCY_WEIGHT)
+                model.hello(pos, now, config.M - free)
+                if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
+                    model.drop(self.ctx.collected_labels)
             self._viz_push()
             # Resumen por HELLO (si no asignamos es por falta de pending / cooldown / sin huecos)
             try:
@@ -373,83 +482,28 @@ class EQCProtocol(IProtocol):
                     self.log.debug(f"→ VQC-{vid} buffer FULL tras assign")
 
             ack = {"type": "HELLO_ACK", "v_id": vid, "eqc_id": self.id ,"eqc_pos": list(self.pos), "eqc_time": self.provider.current_time()}
-            cmd_ack = CommunicationCommand(
-                CommunicationCommandType.SEND,
-                json.dumps(ack),
-                vid
-            )
-            self.provider.send_communication_command(cmd_ack)
+            delivered = msg.get("pids")
+            if delivered:
+                # Piggyback: el HELLO trae el reporte → se procesa como DELIVER y se confirma en el mismo ACK
+                self._process_deliver(vid, delivered, now)
+                ack["pids"] = [entry["id"] for entry in delivered]
+            if self.reassoc_mode == "load" and self._loads_due(vid, now):
+                ack["loads"] = self._loads(now)
+            self._send(ack, vid)
             self.log.info(f"📣 EQC envió HELLO_ACK a VQC-{vid}")
 
-            if self.pending and free > 0:
+            if delivered:
+                self.trigger_assign("DELIVER")
+            elif self.pending and free > 0:
                 self.log.info(f"[EQC-{self.id}] hello_unlock: vqc={vid}, free={free}, pending={len(self.pending)}")
 
                 self.trigger_assign("HELLO")
 
         elif t == "DELIVER":
-            self._executed["handle_packet.DELIVER"] = True
             now = self.provider.current_time()
             vid = msg["v_id"]
             delivered = msg.get("pids", [])  
-            self.log.info(f"📥 DELIVER from VQC-{vid}: {delivered}")
-            for entry in delivered:
-                label = entry.get("label")
-                poi_id = entry.get("id")
-                if label is None or poi_id is None:
-                    self.log.warning(f"DELIVER malformed: {entry!r}")
-                    continue
-
-                #### [LATENCY:calc] — nuevas métricas desglosadas
-                t_arrive = entry.get("t_arrive")   # viene piggybacked desde el VQC
-                t_detect = self.detect_ts.get(label)
-                if t_arrive is not None and t_detect is not None:
-                    self.lat_service.append((label, t_arrive - t_detect))   # “servicio” real
-                    self.lat_contact.append((label, now - t_arrive))        # overhead de contacto
-                else:
-                    self.log.debug(f"⏱️ métricas parciales: t_arrive={t_arrive}, t_detect={t_detect} para {label}")
-                self.lat_e2e.append((label, now - self.start_time))
-                #### [/LATENCY:calc]
-
-                t0 = self.assign_times.pop(label, None)
-                if t0 is not None:
-                    latency = now - t0
-                    self.latencies.append((label, latency))
-                    self.assign_success += 1
-                    poi = next(p for p in config.POIS if p["label"] == label or p["id"] == poi_id)
-                    w = config.URGENCY_WEIGHTS.get(poi["urgency"], 0)
-                    self.global_score += w
-                    if label not in config.METRICS["unique_ids"]:
-                        config.METRICS["unique_ids"].add(label)
-
-                    #### [FRESHNESS:optional bump free slots]
-                    if getattr(config, "BUMP_FREE_ON_ASSIGNED_DELIVER", False):
-                        st = self.vqc_states.get(vid)
-                        if st:
-                            st["huecos"] = min(config.M, st.get("huecos", 0) + 1)
-                            self.log.debug(f"↗️ huecos(VQC-{vid}) += 1 (now {st['huecos']}) por DELIVER asignado de {label}")
-                    #### [/FRESHNESS:optional bump free slots]
-
-                elif label not in config.METRICS["unique_ids"]:
-                    config.METRICS["unique_ids"].add(label)
-                    poi = next((p for p in config.POIS if p["label"] == label or p["id"] == poi_id), None)
-                    if poi: 
-                        self.global_score += config.URGENCY_WEIGHTS.get(poi["urgency"], 0)
-                    self.log.debug(f"ℹ️ First auto‐deliver for {label}")
-                else:
-                    self.redundant_delivers += 1
-                    config.METRICS["redundant"] += 1
-                    self._viz_push()
-
-                    self.log.debug(f"⚠️ Redundant DELIVER for {label}")
-
-                elapsed = now - self.start_time
-                self.coverage_timeline.append((elapsed, len(config.METRICS["unique_ids"])))
-
-            self.log.debug(f"🧮 Metrics: unique={len(config.METRICS['unique_ids'])}, redundant={config.METRICS['redundant']}")
-            delivered_labels = [e["label"] for e in delivered]
-            self.log.debug(f"DELIVER recibido de VQC-{vid}: {delivered_labels}")
-            self.pending = [p for p in self.pending if p["label"] not in delivered_labels]
-            self._viz_push()
+            self._process_deliver(vid, delivered, now)
 
             # ACK al VQC
             ack_payload = {
@@ -457,26 +511,146 @@ class EQCProtocol(IProtocol):
                 "v_id": vid,
                 "pids": [entry["id"] for entry in delivered]
             }
-            cmd_ack = CommunicationCommand(
-                CommunicationCommandType.SEND,
-                json.dumps(ack_payload),
-                vid
-            )
-            self.provider.send_communication_command(cmd_ack)
+            self._send(ack_payload, vid)
             self.log.info(f"📣 Enviado DELIVER_ACK a VQC-{vid}: {ack_payload['pids']}")
 
             self.trigger_assign("DELIVER")
 
+    def _process_deliver(self, vid, delivered, now: float) -> None:
+        """Métricas, lock y pending para los PoIs reportados por VQC-vid (DELIVER o HELLO con piggyback)."""
+        self._executed["handle_packet.DELIVER"] = True
+        self.log.info(f"📥 DELIVER from VQC-{vid}: {delivered}")
+        for entry in delivered:
+            label = entry.get("label")
+            poi_id = entry.get("id")
+            if label is None or poi_id is None:
+                self.log.warning(f"DELIVER malformed: {entry!r}")
+                continue
+
+            #### [LATENCY:calc] — nuevas métricas desglosadas
+            t_arrive = entry.get("t_arrive")   # viene piggybacked desde el VQC
+            t_detect = self.detect_ts.get(label)
+            if t_arrive is not None and t_detect is not None:
+                self.lat_service.add(t_arrive - t_detect)   # “servicio” real
+                self.lat_contact.add(now - t_arrive)        # overhead de contacto
+            else:
+                self.log.debug(f"⏱️ métricas parciales: t_arrive={t_arrive}, t_detect={t_detect} para {label}")
+            self.lat_e2e.add(now - self.start_time)
+            #### [/LATENCY:calc]
+
+            t0 = self.assign_times.pop(label, None)
+            if t0 is not None:
+                latency = now - t0
+                self.latencies.append((label, latency))
+                self.assign_success += 1
+                poi = self.ctx.poi_by_label.get(label) or self.ctx.poi_by_id[poi_id]
+                w = config.URGENCY_WEIGHTS.get(poi["urgency"], 0)
+                self.global_score += w
+                if label not in self.ctx.metrics["unique_ids"]:
+                    self.ctx.metrics["unique_ids"].add(label)
+                self.ctx.poi_table.deliver(label, now)
+
+                #### [FRESHNESS:optional bump free slots]
+                if getattr(config, "BUMP_FREE_ON_ASSIGNED_DELIVER", False):
+                    st = self.vqc_states.get(vid)
+                    if st:
+                        st["huecos"] = min(config.M, st.get("huecos", 0) + 1)
+                        self.log.debug(f"↗️ huecos(VQC-{vid}) += 1 (now {st['huecos']}) por DELIVER asignado de {label}")
+                #### [/FRESHNESS:optional bump free slots]
+
+            elif label not in self.ctx.metrics["unique_ids"]:
+                self.ctx.metrics["unique_ids"].add(label)
+                self.ctx.poi_table.deliver(label, now)
+                poi = self.ctx.poi_by_label.get(label) or self.ctx.poi_by_id.get(poi_id)
+                if poi: 
+                    self.global_score += config.URGENCY_WEIGHTS.get(poi["urgency"], 0)
+                self.log.debug(f"ℹ️ First auto‐deliver for {label}")
+            else:
+                self.redundant_delivers += 1
+                self.ctx.metrics["redundant"] += 1
+                self.ctx.poi_table.deliver(label, now, redundant=True)
+                self._viz_push()
+
+                self.log.debug(f"⚠️ Redundant DELIVER for {label}")
+
+            elapsed = now - self.start_time
+            self.coverage_timeline.append((elapsed, len(self.ctx.metrics["unique_ids"])))
+
+        self.log.debug(f"🧮 Metrics: unique={len(self.ctx.metrics['unique_ids'])}, redundant={self.ctx.metrics['redundant']}")
+        delivered_labels = [e["label"] for e in delivered]
+        self.log.debug(f"DELIVER recibido de VQC-{vid}: {delivered_labels}")
+        self._drop_pending(set(delivered_labels))
+        if vid in self.vqc_models:
+            self.vqc_models[vid].drop(set(delivered_labels))
+        if self.ctx.claims is not None:
+            for label in delivered_labels:
+                self.ctx.claims.close(label, self.id)
+        self._viz_push()
+
+    def _send_assign(self, vid, to_assign, tag: str) -> None:
+        """Un único paquete ASSIGN con todos los PoIs de `to_assign` para VQC-vid."""
+        payload = {
+            "type": "ASSIGN", "v_id": vid,
+            "pois": [{"label": p["label"], "coord": p["coord"], "urgency": p["urgency"], "ts": self.detect_ts[p["label"]]} for p in to_assign]
+        }
+        now = self.provider.current_time()
+        if self.reassoc_mode == "load" and self._loads_due(vid, now):
+            payload["loads"] = self._loads(now)
+        self.log.debug(f"🚀 ASSIGN payload for VQC-{vid} ({tag}): {payload}")
+        self._send(payload, vid)
+        self.assign_msgs += 1
+        for p in to_assign:
+            self.ctx.poi_table.assign(p["label"], now, vid)
+            if self.ctx.claims is not None:
+                self.ctx.claims.claim(p["label"], self.id, now)
+        if vid in self.vqc_models:
+            self.vqc_models[vid].assign(to_assign, now)
+
+    def _service_cost(self, vid, pos, poi, now: float) -> float:
+        """Denominador del score urgency/coste: distancia XY desde el último HELLO, o (eta) segundos estimados hasta llegar."""
+        if self.assign_scoring == "eta":
+            return max(1e-6, self.vqc_models[vid].eta(poi["coord"], now))
+        return max(1e-6, math.hypot(pos[0] - poi["coord"][0], pos[1] - poi["coord"][1]))
+
+    def _send(self, msg: dict, dest: int) -> None:
+        """Codifica con el codec de la corrida (ctx.codec), contabiliza bytes por tipo y envía."""
+        data = self.ctx.codec.encode(msg)
+        self.ctx.count_message(msg["type"], len(data))
+        self.provider.send_communication_command(CommunicationCommand(CommunicationCommandType.SEND, data, dest))
+
     def assign_to_vqcs(self) -> None:
+        if self.reassoc_mode == "load":
+            self._drop_departed()
         if self.assignment_policy == "greedy":
             self._assign_greedy()
         elif self.assignment_policy == "round_robin":
             self._assign_round_robin()
         elif self.assignment_policy == "load_balancing":
             self._assign_load_balancing()
+        elif self.assignment_policy == "optimal":
+            self._assign_optimal()
         else:
             self.log.error(f"Unknown assignment policy: {self.assignment_policy}")
 
+    def _loads_due(self, vid: int, now: float) -> bool:
+        """(load) Como mucho una carga por VQC cada REASSOC_PERIOD s: el follower no decide más a menudo."""
+        if now - self._loads_sent.get(vid, float("-inf")) < config.REASSOC_PERIOD:
+            return False
+        self._loads_sent[vid] = now
+        return True
+
+    def _loads(self, now: float) -> List[list]:
+        """(load) Entradas "loads" de HELLO_ACK / ASSIGN: la propia (pending, huecos y nº de followers conocidos) y las oídas."""
+        free = sum(int(st.get("huecos", 0)) for st in self.vqc_states.values())
+        return [[self.id, len(self.pending), free, len(self.vqc_states), now]] + list(self.load_view.values())
+
+    def _drop_departed(self) -> None:
+        """(load) Olvida los VQC que se re-asociaron a otro líder: no se les vuelve a asignar."""
+        for vid in [v for v in self.vqc_states if self.ctx.leader_of.get(v) != self.id]:
+            del self.vqc_states[vid]
+            self.vqc_models.pop(vid, None)
+            self.log.info(f"👋 VQC-{vid} pasó a EQC-{self.ctx.leader_of.get(vid)}")
+
     ########### editar aqui ###########
     # Método para política Greedy (tu implementación actual)
     def _assign_greedy(self) -> None:
@@ -496,9 +670,10 @@ class EQCProtocol(IProtocol):
 
             # [ADD] — Candidatos filtrados por candado global (re-evaluado por VQC)
             if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-                candidates = [p for p in self.pending if p["label"] not in config.COLLECTED_LABELS]
+                candidates = [p for p in self.pending.values() if p["label"] not in self.ctx.collected_labels]
             else:
-                candidates = list(self.pending)
+                candidates = list(self.pending.values())
+            candidates = self._skip_claimed(candidates, now)
 
             if not candidates:
                 self.log.debug("→ No PoIs candidates after global-lock filter")
@@ -506,7 +681,7 @@ class EQCProtocol(IProtocol):
 
             scored = []
             for poi in candidates:
-                dist = max(1e-6, math.hypot(pos[0] - poi["coord"][0], pos[1] - poi["coord"][1]))
+                dist = self._service_cost(vid, pos, poi, now)
                 score = poi["urgency"] / dist
                 scored.append((score, poi))
                 self.log.debug(f"    ⋅ {poi['label']} urg={poi['urgency']} dist={dist:.2f} score={score:.2f}")
@@ -518,25 +693,17 @@ class EQCProtocol(IProtocol):
 
             # [ADD] — Re-chequeo de carrera
             if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-                to_assign = [p for p in to_assign if p["label"] not in config.COLLECTED_LABELS]
+                to_assign = [p for p in to_assign if p["label"] not in self.ctx.collected_labels]
             if not to_assign:
                 self.log.debug(f"→ No PoIs for VQC-{vid} after race-check")
                 continue
 
             for p in to_assign:
                 self.assign_times[p["label"]] = now
-                if p in self.pending:
-                    self.pending.remove(p)
+                self.pending.pop(p["label"], None)
             self.assign_count += len(to_assign)
 
-            payload = {
-                "type": "ASSIGN", "v_id": vid,
-                "pois": [{"label": p["label"], "coord": p["coord"], "urgency": p["urgency"], "ts": self.detect_ts[p["label"]]} for p in to_assign]
-            }
-            self.log.debug(f"🚀 ASSIGN payload for VQC-{vid} (Greedy): {payload}")
-
-            cmd = CommunicationCommand(CommunicationCommandType.SEND, json.dumps(payload), vid)
-            self.provider.send_communication_command(cmd)
+            self._send_assign(vid, to_assign, "Greedy")
             self.assign_counts[vid] = self.assign_counts.get(vid, 0) + len(to_assign)
 
             self.encounter_assigned[vid] = self.encounter_assigned.get(vid, 0) + len(to_assign)
@@ -562,9 +729,11 @@ class EQCProtocol(IProtocol):
 
         # [ADD] — Candidatos filtrados por candado global
         if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-            candidates = [p for p in self.pending if p["label"] not in config.COLLECTED_LABELS]
+            candidates = [p for p in self.pending.values() if p["label"] not in self.ctx.collected_labels]
         else:
-            candidates = list(self.pending)
+            candidates = list(self.pending.values())
+        # label → PoI (orden de pending): sacar el asignado es O(1)
+        candidates = {p["label"]: p for p in self._skip_claimed(candidates, now)}
 
         if not candidates:
             self.log.debug("→ No PoIs candidates after global-lock filter")
@@ -586,31 +755,22 @@ class EQCProtocol(IProtocol):
                 self.log.debug("→ No PoIs pending/candidates")
                 break
 
-            to_assign = [candidates[0]]  # Solo un PoI por ronda
+            to_assign = [next(iter(candidates.values()))]  # Solo un PoI por ronda
 
             # [ADD] — Re-chequeo de carrera
             if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-                to_assign = [p for p in to_assign if p["label"] not in config.COLLECTED_LABELS]
+                to_assign = [p for p in to_assign if p["label"] not in self.ctx.collected_labels]
             if not to_assign:
                 self.log.debug("→ Candidate got collected meanwhile; continue RR")
                 continue
 
             for p in to_assign:
                 self.assign_times[p["label"]] = now
-                if p in self.pending:
-                    self.pending.remove(p)
-                if p in candidates:
-                    candidates.remove(p)
+                self.pending.pop(p["label"], None)
+                candidates.pop(p["label"], None)
             self.assign_count += len(to_assign)
 
-            payload = {
-                "type": "ASSIGN", "v_id": vid,
-                "pois": [{"label": p["label"], "coord": p["coord"], "urgency": p["urgency"], "ts": self.detect_ts[p["label"]]} for p in to_assign]
-            }
-            self.log.debug(f"🚀 ASSIGN payload for VQC-{vid} (Round-Robin): {payload}")
-
-            cmd = CommunicationCommand(CommunicationCommandType.SEND, json.dumps(payload), vid)
-            self.provider.send_communication_command(cmd)
+            self._send_assign(vid, to_assign, "Round-Robin")
             self.assign_counts[vid] = self.assign_counts.get(vid, 0) + len(to_assign)
 
             self.log.info(f"🚀 ASSIGN {len(to_assign)} to VQC-{vid}: {[p['label'] for p in to_assign]}")
@@ -633,14 +793,19 @@ class EQCProtocol(IProtocol):
 
         # Candidatos (filtro inicial por lock global si aplica)
         if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-            candidates = [p for p in self.pending if p["label"] not in config.COLLECTED_LABELS]
+            candidates = [p for p in self.pending.values() if p["label"] not in self.ctx.collected_labels]
         else:
-            candidates = list(self.pending)
+            candidates = list(self.pending.values())
+        # label → PoI (orden de pending): sacar el asignado es O(1) y el recorrido sigue en el mismo orden
+        candidates = {p["label"]: p for p in self._skip_claimed(candidates, now)}
 
         if not candidates:
             self.log.debug("→ No PoIs candidates after global-lock filter")
             return
 
+        # config.BATCH_ASSIGN_MESSAGES → los PoIs elegidos en todas las rondas viajan en un ASSIGN por VQC
+        batch = {} if getattr(config, "BATCH_ASSIGN_MESSAGES", False) else None
+
         # Asignación por rondas: cada ronda intenta dar ≤1 PoI a cada VQC elegible (ordenados por free desc).
         while candidates:
             # Elegibles = VQCs con huecos y sin superar el throttle del encuentro
@@ -678,11 +843,11 @@ class EQCProtocol(IProtocol):
                 # Elige el mejor PoI para ESTE VQC (urgency/dist)
                 best = None
                 best_score = -1.0
-                for poi in candidates:
+                for poi in candidates.values():
                     # Re-chequeo carrera/lock por si otro VQC lo marcó
-                    if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (poi["label"] in config.COLLECTED_LABELS):
+                    if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (poi["label"] in self.ctx.collected_labels):
                         continue
-                    dist = max(1e-6, math.hypot(pos[0] - poi["coord"][0], pos[1] - poi["coord"][1]))
+                    dist = self._service_cost(vid, pos, poi, now)
                     score = poi["urgency"] / dist
                     if score > best_score:
                         best_score = score
@@ -693,29 +858,22 @@ class EQCProtocol(IProtocol):
 
                 # Asigna SOLO 1 a este VQC en esta ronda
                 self.assign_times[best["label"]] = now
-                if best in self.pending:
-                    self.pending.remove(best)
-                if best in candidates:
-                    candidates.remove(best)
+                self.pending.pop(best["label"], None)
+                candidates.pop(best["label"], None)
                 self.assign_count += 1
                 self.assign_counts[vid] = self.assign_counts.get(vid, 0) + 1
                 self.encounter_assigned[vid] = self.encounter_assigned.get(vid, 0) + 1
                 st["huecos"] = max(0, free - 1)
 
-                payload = {
-                    "type": "ASSIGN",
-                    "v_id": vid,
-                    "pois": [{
-                        "label": best["label"],
-                        "coord": best["coord"],      # ⇐ usa coord (x,y) del PoI; el VQC añade su z
-                        "urgency": best["urgency"],
-                        "ts": self.detect_ts[best["label"]],
-                    }],
-                }
-                self.log.debug(f"🚀 ASSIGN payload for VQC-{vid} (LB): {payload}")
-                cmd = CommunicationCommand(CommunicationCommandType.SEND, json.dumps(payload), vid)
-                self.provider.send_communication_command(cmd)
-                self.log.info(f"🚀 ASSIGN 1 to VQC-{vid}: {best['label']}")
+                if batch is not None:
+                    # Se acumula: un solo ASSIGN por VQC al final del tick
+                    batch.setdefault(vid, []).append(best)
+                    if vid in self.vqc_models:
+                        # (eta) la siguiente ronda ya ve este PoI en la ruta del VQC
+                        self.vqc_models[vid].assign([best], now)
+                else:
+                    self._send_assign(vid, [best], "LB")
+                    self.log.info(f"🚀 ASSIGN 1 to VQC-{vid}: {best['label']}")
 
                 any_assigned_this_round = True
                 if not candidates:
@@ -729,10 +887,86 @@ class EQCProtocol(IProtocol):
                 )                
                 break
 
+        if batch:
+            for vid, to_assign in batch.items():
+                self._send_assign(vid, to_assign, "LB")
+                self.log.info(f"🚀 ASSIGN {len(to_assign)} to VQC-{vid}: {[p['label'] for p in to_assign]}")
+
+    ########### editar aqui ###########
+    # Método para política Optimal (asignación en lote, Hungarian)
+    def _assign_optimal(self) -> None:
+        """
+        Una sola asignación global por tick: matriz (hueco de VQC × PoI) con coste
+        -urgency/dist (mismo score que greedy/LB) resuelta con linear_sum_assignment.
+        Cada VQC aporta min(huecos, throttle del encuentro) filas; un ASSIGN por VQC.
+        """
+        now = self.provider.current_time()
+        self.log.debug(f"🔍 assign_to_vqcs (Optimal): pending={len(self.pending)}, states={self.vqc_states}")
+
+        if not self.vqc_states or not self.pending:
+            self.log.debug("→ No VQCs or no PoIs pending")
+            return
+
+        if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
+            candidates = [p for p in self.pending.values() if p["label"] not in self.ctx.collected_labels]
+        else:
+            candidates = list(self.pending.values())
+        candidates = self._skip_claimed(candidates, now)
+        if not candidates:
+            self.log.debug("→ No PoIs candidates after global-lock filter")
+            return
+
+        # Filas = huecos utilizables (VQC repetido tantas veces como huecos le queden)
+        slot_vids, slot_pos = [], []
+        for vid, st in self.vqc_states.items():
+            free = int(st.get("huecos", 0))
+            remaining = MAX_ASSIGN_PER_ENCOUNTER - self.encounter_assigned.get(vid, 0)
+            cap = min(free, remaining)
+            if cap <= 0:
+                continue
+            cap = min(cap, len(candidates))      # nunca hacen falta más filas que PoIs
+            slot_vids.extend([vid] * cap)
+            slot_pos.extend([st["pos"][:2]] * cap)
+        if not slot_vids:
+            self.log.info(f"[EQC-{self.id}] opt:no_assign (pending={len(self.pending)}, eligibles=0)")
+            return
+
+        sp = np.asarray(slot_pos, dtype=float)                       # (S, 2)
+        cp = np.asarray([p["coord"] for p in candidates], dtype=float)  # (C, 2)
+        urg = np.asarray([p["urgency"] for p in candidates], dtype=float)
+        if self.assign_scoring == "eta":
+            # Coste por VQC (todas sus filas-hueco comparten ETA): segundos estimados hasta cada PoI
+            eta = {vid: [self._service_cost(vid, None, p, now) for p in candidates] for vid in set(slot_vids)}
+            dist = np.asarray([eta[vid] for vid in slot_vids], dtype=float)
+        else:
+            dist = np.maximum(1e-6, np.hypot(sp[:, None, 0] - cp[None, :, 0], sp[:, None, 1] - cp[None, :, 1]))
+        score = urg[None, :] / dist
+        rows, cols = linear_sum_assignment(-score)
+
+        by_vid: dict = {}
+        for r, c in zip(rows, cols):
+            by_vid.setdefault(slot_vids[r], []).append((score[r, c], candidates[c]))
+
+        assigned_labels = set()
+        for vid, scored in by_vid.items():
+            scored.sort(key=lambda x: x[0], reverse=True)
+            to_assign = [p for _, p in scored]
+            for p in to_assign:
+                self.assign_times[p["label"]] = now
+                assigned_labels.add(p["label"])
+            self.assign_count += len(to_assign)
+
+            self._send_assign(vid, to_assign, "Optimal")
+            self.assign_counts[vid] = self.assign_counts.get(vid, 0) + len(to_assign)
+            self.encounter_assigned[vid] = self.encounter_assigned.get(vid, 0) + len(to_assign)
+            self.vqc_states[vid]["huecos"] = max(0, int(self.vqc_states[vid]["huecos"]) - len(to_assign))
+            self.log.info(f"🚀 ASSIGN {len(to_assign)} to VQC-{vid}: {[p['label'] for p in to_assign]}")
+
+        self._drop_pending(assigned_labels)
+
     def finish(self) -> None:
         # === Latencia principal del paper: L_service = t_arrive - t_detect
-        Ls = [x for _, x in self.lat_service]
-        avg_service = (sum(Ls) / len(Ls)) if Ls else float('nan')
+        avg_service = self.lat_service.mean
 
         self.log.info(f"✔️ assign_success    = {self.assign_success}")
         self.log.info(f"ℹ️ redundant_delivers = {self.redundant_delivers}")
@@ -746,8 +980,8 @@ class EQCProtocol(IProtocol):
 
 
         total_time = self.provider.current_time() - self.start_time
-        unique = len(config.METRICS["unique_ids"])
-        redundant = config.METRICS["redundant"]
+        unique = len(self.ctx.metrics["unique_ids"])
+        redundant = self.ctx.metrics["redundant"]
         success = self.assign_success
         assigns = self.assign_count
         avg_latency = sum(l for _, l in self.latencies) / len(self.latencies) if self.latencies else float('nan')
@@ -758,7 +992,7 @@ class EQCProtocol(IProtocol):
         self.log.info(f"   Assigns sent={assigns}, successful delivers={success} (rate={success_rate:.2f})")
         self.log.info(f"   Avg. service latency={avg_service:.2f}s, discovery rate={discovery_rate:.2f} PoIs/s")
         self.log.info(f"⭐ Global mission score = {self.global_score:.2f}")
-        config.METRICS["global_score"] += self.global_score
+        self.ctx.metrics["global_score"] += self.global_score
         self.log.info(f"📷 Cámara hizo {self.cam_raw_count} detecciones totales, "
                       f"{self.cam_poi_matches} coincidencias con PoIs")
        
@@ -766,36 +1000,27 @@ class EQCProtocol(IProtocol):
         if never_called:
             self.log.warning(f"⚠️ Métodos nunca ejecutados: {never_called}")
         #### [LATENCY] resumen
-        def p95(vals):
-            if not vals:
-                return float('nan')
-            vs = sorted(vals)
-            return vs[int(0.95 * (len(vs) - 1))]
-
-        mean = lambda v: (sum(v) / len(v)) if v else float('nan')
-
-        Ls   = [x for _, x in self.lat_service]
-        Lc   = [x for _, x in self.lat_contact]
-        Le2e = [x for _, x in self.lat_e2e]
-
-        self.log.info(f"⏱️ service_latency: mean={mean(Ls):.3f}s p95={p95(Ls):.3f}s  (t_arrive - t_detect)")
-        self.log.info(f"📡 contact_overhead: mean={mean(Lc):.3f}s p95={p95(Lc):.3f}s  (t_deliver_ack - t_arrive)")
-        self.log.info(f"🔚 e2e_latency:      mean={mean(Le2e):.3f}s p95={p95(Le2e):.3f}s  (t_deliver_ack - t_spawn)")
-        self.log.info(f"👁️ time_to_detect:   mean={mean(self.t_detect_list):.3f}s p95={p95(self.t_detect_list):.3f}s  (t_detect - t_spawn)")
+        Ls, Lc, Le2e, Td = self.lat_service, self.lat_contact, self.lat_e2e, self.t_detect_list
+
+        self.log.info(f"⏱️ service_latency: mean={_mean(Ls):.3f}s p95={_p95(Ls):.3f}s  (t_arrive - t_detect)")
+        self.log.info(f"📡 contact_overhead: mean={_mean(Lc):.3f}s p95={_p95(Lc):.3f}s  (t_deliver_ack - t_arrive)")
+        self.log.info(f"🔚 e2e_latency:      mean={_mean(Le2e):.3f}s p95={_p95(Le2e):.3f}s  (t_deliver_ack - t_spawn)")
+        self.log.info(f"👁️ time_to_detect:   mean={_mean(Td):.3f}s p95={_p95(Td):.3f}s  (t_detect - t_spawn)")
         # --- Acumular al global ---
         try:
-            config.METRICS["lat_service_all"].extend([x for _, x in self.lat_service])
-            config.METRICS["lat_contact_all"].extend([x for _, x in self.lat_contact])
-            config.METRICS["lat_e2e_all"].extend([x for _, x in self.lat_e2e])
-            config.METRICS["t_detect_all"].extend(self.t_detect_list)
+            self.ctx.metrics["lat_service_all"].merge(self.lat_service)
+            self.ctx.metrics["lat_contact_all"].merge(self.lat_contact)
+            self.ctx.metrics["lat_e2e_all"].merge(self.lat_e2e)
+            self.ctx.metrics["t_detect_all"].merge(self.t_detect_list)
 
-            config.METRICS["cam_raw_all"]  += self.cam_raw_count
-            config.METRICS["cam_hits_all"] += self.cam_poi_matches
+            self.ctx.metrics["cam_raw_all"]  += self.cam_raw_count
+            self.ctx.metrics["cam_hits_all"] += self.cam_poi_matches
 
-            config.METRICS["eqc_reports"].append({
+            self.ctx.metrics["eqc_reports"].append({
                 "eqc_id": self.id,
                 "assigns": self.assign_count,
                 "success": self.assign_success,
+                "assign_msgs": self.assign_msgs,
             })
             emit_tables_and_glossary(self)
 
@@ -820,17 +1045,41 @@ class EQCProtocol(IProtocol):
         
     def _is_globally_collected(self, label: str) -> bool:
         """Devuelve True si el PoI ya fue colectado por algún VQC en campo."""
-        return getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (label in config.COLLECTED_LABELS)
+        return getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (label in self.ctx.collected_labels)
+
+    def _skip_claimed(self, candidates, now: float) -> list:
+        """(claims) Quita de candidates los PoIs con claim vigente de otro líder; los ya entregados salen de pending."""
+        claims = self.ctx.claims
+        if claims is None:
+            return candidates
+        keep = []
+        for p in candidates:
+            owner = claims.owner(p["label"], now)
+            if owner is None or owner == self.id:
+                keep.append(p)
+                continue
+            claims.skip(p["label"], self.id)
+            if p["label"] in claims.done:
+                self.pending.pop(p["label"], None)
+        return keep
+
+    def _drop_pending(self, labels) -> int:
+        """Quita de pending los labels dados (set/dict) recorriendo el lado más pequeño; devuelve cuántos."""
+        if len(labels) < len(self.pending):
+            gone = [label for label in labels if label in self.pending]
+        else:
+            gone = [label for label in self.pending if label in labels]
+        for label in gone:
+            del self.pending[label]
+        return len(gone)
 
     def _prune_pending_by_global_lock(self) -> None:
         """Saca de self.pending los PoIs que ya estén bloqueados globalmente."""
         if not getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
             return
-        before = len(self.pending)
-        if before == 0:
+        if not self.pending:
             return
-        self.pending = [p for p in self.pending if p["label"] not in config.COLLECTED_LABELS]
-        removed = before - len(self.pending)
+        removed = self._drop_pending(self.ctx.collected_labels)
         if removed > 0:
             self.log.debug(f"🧹 Pruned {removed} pending by global lock")
 
@@ -849,13 +1098,11 @@ def _fmt_table(rows, headers=("Métrica", "Valor", "Notas")) -> str:
     out += [line(r) for r in rows]
     return "\n".join(out)
 
-def _mean(vals):
-    return (sum(vals) / len(vals)) if vals else float('nan')
+def _mean(stats):
+    return stats.mean
 
-def _p95(vals):
-    if not vals: return float('nan')
-    vs = sorted(vals)
-    return vs[int(0.95 * (len(vs) - 1))]
+def _p95(stats):
+    return stats.quantile(0.95)
 
 def emit_tables_and_glossary(eqc):
     """
@@ -863,17 +1110,15 @@ def emit_tables_and_glossary(eqc):
     y cuando termina el último EQC, tabla global + glosario.
     Usa lo que YA calculaste y acumulaste en finish().
     """
-    import config
     log = eqc.log
+    m = eqc.ctx.metrics
 
     # ---- LOCAL (por este EQC) ----
-    Ls   = [x for _, x in eqc.lat_service]
-    Lc   = [x for _, x in eqc.lat_contact]
-    Le2e = [x for _, x in eqc.lat_e2e]
+    Ls, Lc, Le2e = eqc.lat_service, eqc.lat_contact, eqc.lat_e2e
 
     total_time     = eqc.provider.current_time() - eqc.start_time
-    unique         = len(config.METRICS.get("unique_ids", []))
-    redundant      = config.METRICS.get("redundant", 0)
+    unique         = len(m.get("unique_ids", []))
+    redundant      = m.get("redundant", 0)
     assigns        = eqc.assign_count
     success        = eqc.assign_success
     success_rate   = (success/assigns) if assigns>0 else float('nan')
@@ -883,6 +1128,7 @@ def emit_tables_and_glossary(eqc):
         ("Unique PoIs (global)",       unique,                    "PoIs únicos entregados"),
         ("Redundant reports (global)", redundant,                 "Reportes duplicados"),
         ("Assigns sent",               assigns,                   "ASSIGN de este EQC"),
+        ("ASSIGN messages",            eqc.assign_msgs,           "paquetes ASSIGN enviados"),
         ("Successful delivers",        success,                   "DELIVER de estas assigns"),
         ("Success rate",               f"{success_rate:.2f}",     "successful/assigns"),
         ("Avg service latency (s)",    f"{_mean(Ls):.3f}",        "t_arrive - t_detect"),
@@ -909,16 +1155,16 @@ def emit_tables_and_glossary(eqc):
         log.info("ℹ️ Contact overhead apreciable respecto a L_service.")
 
     # ---- GLOBAL (solo cuando termina el último EQC) ----
-    m = config.METRICS
     m["eqc_finished"] = m.get("eqc_finished", 0) + 1
-    if m["eqc_finished"] >= getattr(config, "NUM_EQCS", 1):
-        Ls_all   = m.get("lat_service_all", [])
-        Lc_all   = m.get("lat_contact_all", [])
-        Le2e_all = m.get("lat_e2e_all", [])
+    if m["eqc_finished"] >= eqc.ctx.num_eqcs:
+        Ls_all   = m["lat_service_all"]
+        Lc_all   = m["lat_contact_all"]
+        Le2e_all = m["lat_e2e_all"]
         rows_global = [
             ("Unique PoIs (global)",       len(m.get("unique_ids", [])), ""),
             ("Redundant reports (global)", m.get("redundant", 0),         ""),
             ("Assigns sent (sum EQCs)",    sum(r["assigns"] for r in m.get("eqc_reports", [])), ""),
+            ("ASSIGN messages (sum)",      sum(r.get("assign_msgs", 0) for r in m.get("eqc_reports", [])), ""),
             ("Successful delivers (sum)",  sum(r["success"] for r in m.get("eqc_reports", [])), ""),
             ("Avg service latency (s)",    f"{_mean(Ls_all):.3f}", "t_arrive - t_detect"),
             ("p95 service latency (s)",    f"{_p95(Ls_all):.3f}",  ""),
@@ -933,7 +1179,7 @@ def emit_tables_and_glossary(eqc):
 
         if Ls_all and _mean(Lc_all) == _mean(Lc_all) and _mean(Ls_all) == _mean(Ls_all) and _mean(Lc_all) > 0.3 * _mean(Ls_all):
             log.info("🌐 GLOBAL: el overhead de contacto es una fracción importante de L_service.")
-        if len(m.get("unique_ids", [])) < 0.8 * len(getattr(config, "POIS", [])):
+        if len(m.get("unique_ids", [])) < 0.8 * len(eqc.ctx.pois):
             log.info("🌐 GLOBAL: cobertura moderada; prueba subir K, R_COMM o velocidad.")
 
         log.info("""
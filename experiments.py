@@ -1,18 +1,57 @@
 # experiments.py — barrido (K, rho) con MULTI-seed → un solo Excel
-import subprocess, re, os, datetime, csv
+import subprocess, re, os, datetime, csv, time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
 import pandas as pd  # <- necesitas: pip install pandas openpyxl
+import config
+from result_cache import ResultCache, code_version, scenario_key
+import profiling
 import argparse
 parser = argparse.ArgumentParser()
 parser.add_argument("--seed", type=int, help="run only this seed")
 args, _ = parser.parse_known_args()
 
 # ---------- Parámetros globales ----------
+# Timeout por caso por defecto: CASE_TIMEOUT_FACTOR × lo que tarda el caso más caro del grid
+# (K=4, ρ=4, P=2500, DURATION s simulados) a CASE_SIM_SPEED s simulados por s de reloj (medido)
+CASE_SIM_SPEED      = 1.0   # s simulados / s de reloj
+CASE_TIMEOUT_FACTOR = 3.0
+CASE_TIMEOUT_DEFAULT = CASE_TIMEOUT_FACTOR * config.DURATION / CASE_SIM_SPEED
+
 DEFAULT_SEEDS = [123,114,115,116,117,118,119,120,121,122]
 SEEDS = DEFAULT_SEEDS[:]  # copia
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--seed", type=int, help="run only this seed")
+parser.add_argument("--workers", type=int, default=1,
+                    help="casos en paralelo (cada caso es su propio proceso run_simulation.py); 1 = secuencial")
+parser.add_argument("--case_timeout", type=float, default=CASE_TIMEOUT_DEFAULT,
+                    help="timeout (s) por caso; un caso colgado se marca ok=0 y no bloquea al resto "
+                         f"(por defecto {CASE_TIMEOUT_DEFAULT:.0f} s: {CASE_TIMEOUT_FACTOR:g}× el caso más caro; "
+                         "<= 0 desactiva)")
+parser.add_argument("--in_process", action="store_true",
+                    help="corre cada caso con run_simulation.run_scenario() dentro de un pool de procesos "
+                         "persistentes (sin intérprete nuevo ni parseo del log por caso); un caso que supera "
+                         "--case_timeout mata los workers y el resto de casos sigue en un pool nuevo")
+parser.add_argument("--cache_dir", default="results_cache",
+                    help="caché de resultados por escenario (hash de parámetros + versión del código); "
+                         "los casos ya calculados se reutilizan")
+parser.add_argument("--no_cache", action="store_true", help="ignora la caché y recalcula todos los casos")
+parser.add_argument("--profile", action="store_true",
+                    help="perfila cada caso con cProfile (<caso>.prof junto a su log) y agrega todo el barrido "
+                         "en profile_sweep_hotspots.txt / profile_sweep.folded (entrada de flamegraph); "
+                         "ignora las lecturas de caché para que todos los casos se ejecuten")
+parser.add_argument("--deliver", choices=("separate", "piggyback"), default="separate",
+                    help="entrega de hallazgos de run_simulation.py: separate (DELIVER tras HELLO_ACK, original) "
+                         "o piggyback (reporte dentro del HELLO, ACK combinado)")
+parser.add_argument("--eqc_routes", choices=("legacy", "strips", "cells"), default="legacy",
+                    help="rutas de los líderes de run_simulation.py: legacy (las 4 manuales, K <= 4) o strips / cells "
+                         "(K regiones de igual área en boustrophedon, cualquier K)")
+parser.add_argument("--outdir", default=None,
+                    help="carpeta de salida (p.ej. la de un barrido interrumpido para reanudarlo); "
+                         "por defecto runs_<tag>_<timestamp>")
 args, _ = parser.parse_known_args()
+if args.case_timeout is not None and args.case_timeout <= 0:
+    args.case_timeout = None
 
 
 # 3) override por variable de entorno (si viene)
@@ -27,8 +66,6 @@ if _env:
 if args.seed is not None:
     SEEDS = [args.seed]
 
-print(f"→ SEEDS en uso: {SEEDS}")  # ayuda a verificar rápidamente
-
 POIS              = 2500
 BUFFER_M          = 5
 R_CAM             = 84.9
@@ -40,15 +77,6 @@ POLICY            = "load_balancing"
 K_LIST   = [1, 2, 3, 4]
 RHO_LIST = [1, 2, 3, 4]
 
-# ---------- Salidas ----------
-STAMP  = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
-OUTTAG = f"seed{SEEDS[0]}" if len(SEEDS) == 1 else None
-OUTDIR = f"runs_{OUTTAG+'_' if OUTTAG else ''}{STAMP}"
-
-os.makedirs(OUTDIR, exist_ok=True)
-CSV_PATH = os.path.join(OUTDIR, "results_all.csv")
-XLSX_PATH = os.path.join(OUTDIR, "results_all.xlsx")
-
 RESULT_RE = re.compile(
     r"RESULT .*?"
     r"assigns_sent=(\d+)\s+assign_success=(\d+)\s+"
@@ -62,11 +90,30 @@ RESULT_RE = re.compile(
     re.IGNORECASE
 )
 
-def run_case(seed, K, rho):
+ASSIGN_MSGS_RE = re.compile(r"RESULT .*?assign_msgs=(\d+)")
+MSG_BYTES_RE = re.compile(r"RESULT .*?msg_bytes=(\d+)")
+TAIL_LAT_RE = re.compile(r"RESULT .*?p50_latency=([\d\.naN]+)s\s+p99_latency=([\d\.naN]+)s\s+max_latency=([\d\.naN]+)s")
+
+def _base_row(seed, K, rho, log_path):
+    return {
+        "seed": seed, "K": K, "rho": rho, "num_pois": POIS, "num_vqcs": K * rho, "M": BUFFER_M,
+        "eqc_speed": EQC_SPEED_DEFAULT, "vqc_speed": VQC_SPEED_DEFAULT, "R_CAM": R_CAM, "policy": POLICY,
+        "ok": 0, "log_path": log_path
+    }
+
+def _scenario(seed, K, rho):
+    """Escenario completo de un caso: todo lo que cambia el resultado entra en la clave de caché."""
+    return {
+        "seed": seed, "num_pois": POIS, "num_eqcs": K, "num_vqcs": K * rho, "buffer_size": BUFFER_M,
+        "eqc_speed": EQC_SPEED_DEFAULT, "vqc_speed": VQC_SPEED_DEFAULT, "camera_reach": R_CAM,
+        "policy": POLICY, "deliver": args.deliver, "eqc_routes": args.eqc_routes,
+    }
+
+def run_case(seed, K, rho, outdir, profile=False):
     num_vqcs = K * rho
     prefix   = f"seed{seed}_K{K}_rho{rho}_pois{POIS}_M{BUFFER_M}"
-    fig_prefix_full = os.path.join(OUTDIR, prefix)
-    log_path = os.path.join(OUTDIR, f"{prefix}.txt")
+    fig_prefix_full = os.path.join(outdir, prefix)
+    log_path = os.path.join(outdir, f"{prefix}.txt")
 
     cmd = (
         f"python run_simulation.py"
@@ -79,22 +126,28 @@ def run_case(seed, K, rho):
         f" --camera_reach {R_CAM}"
         f" --policy {POLICY}"
         f" --num_eqcs {K}"
+        f" --deliver {args.deliver}"
+        f" --eqc_routes {args.eqc_routes}"
         f" --no_rt --no_vis"
         f" --fig_prefix \"{fig_prefix_full}\""
+        f"{' --profile' if profile else ''}"
     )
 
     print(f"\n🏃 Ejecutando: {cmd}")
-    proc = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    base = _base_row(seed, K, rho, log_path)
+    try:
+        proc = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=args.case_timeout)
+    except subprocess.TimeoutExpired as e:
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write(f"{e.stdout or ''}\n{e.stderr or ''}\nTIMEOUT tras {args.case_timeout}s\n")
+        print(f"⏰ Timeout en {prefix} (ver {log_path})")
+        return base
     log  = proc.stdout + "\n" + proc.stderr
 
     with open(log_path, "w", encoding="utf-8") as f:
         f.write(log)
 
-    base = {
-        "seed": seed, "K": K, "rho": rho, "num_pois": POIS, "num_vqcs": num_vqcs, "M": BUFFER_M,
-        "eqc_speed": EQC_SPEED_DEFAULT, "vqc_speed": VQC_SPEED_DEFAULT, "R_CAM": R_CAM, "policy": POLICY,
-        "ok": int(proc.returncode == 0), "log_path": log_path
-    }
+    base["ok"] = int(proc.returncode == 0)
     if proc.returncode != 0:
         print(f"❌ Error en {prefix} (ver {log_path})")
         return base
@@ -138,40 +191,208 @@ def run_case(seed, K, rho):
         "cam_raw": cam_raw,
         "cam_matches": cam_matches,
     })
+    m_msgs = ASSIGN_MSGS_RE.search(log)
+    if m_msgs:
+        base["assign_msgs"] = int(m_msgs.group(1))
+    m_bytes = MSG_BYTES_RE.search(log)
+    if m_bytes:
+        base["msg_bytes"] = int(m_bytes.group(1))
+    m_tail = TAIL_LAT_RE.search(log)
+    if m_tail:
+        base["p50_latency_s"], base["p99_latency_s"], base["max_latency_s"] = (float(g) for g in m_tail.groups())
+    return base
+
+def run_case_in_process(seed, K, rho, outdir, profile=False):
+    """
+    Igual que run_case, pero la simulación corre en ESTE proceso vía run_simulation.run_scenario()
+    y las métricas llegan como RunResult (sin lanzar intérprete ni parsear la línea RESULT).
+    """
+    from run_simulation import ScenarioParams, run_scenario   # import caro: solo en los workers
+
+    prefix = f"seed{seed}_K{K}_rho{rho}_pois{POIS}_M{BUFFER_M}"
+    fig_prefix_full = os.path.join(outdir, prefix)
+    base = _base_row(seed, K, rho, f"{fig_prefix_full}.txt")
+
+    print(f"\n🏃 Ejecutando in-process: {prefix}")
+    res = run_scenario(ScenarioParams(
+        seed=seed, num_pois=POIS, num_vqcs=K * rho, buffer_size=BUFFER_M,
+        eqc_speed=EQC_SPEED_DEFAULT, vqc_speed=VQC_SPEED_DEFAULT, camera_reach=R_CAM,
+        policy=POLICY, num_eqcs=K, deliver=args.deliver, eqc_routes=args.eqc_routes, fig_prefix=fig_prefix_full, quiet=True, profile=profile,
+    ))
+    base.update({
+        "ok": 1,
+        "assign_success": res.assign_success,
+        "assigns_sent": res.assigns_sent,
+        "assign_rate": res.assign_rate if res.assigns_sent > 0 else None,
+        "redundant_delivers": res.redundant_delivers,
+        "avg_latency_s": res.avg_latency,
+        "p95_latency_s": res.p95_latency,
+        "ack_mean_s": res.ack_delay_mean,
+        "ack_p95_s": res.ack_delay_p95,
+        "e2e_mean_s": res.e2e_mean,
+        "e2e_p95_s": res.e2e_p95,
+        "coverage": f"{res.coverage}/{res.num_pois}",
+        "coverage_rate": res.coverage_rate,
+        "global_score": res.global_score,
+        "cam_raw": res.cam_raw,
+        "cam_matches": res.cam_matches,
+        "assign_msgs": res.assign_msgs,
+        "msg_bytes": res.msg_bytes,
+        "p50_latency_s": res.p50_latency,
+        "p99_latency_s": res.p99_latency,
+        "max_latency_s": res.max_latency,
+    })
     return base
 
 # ---------- Ejecuta TODO y escribe CSV + Excel ----------
-rows = []
 header = [
     "seed","K","rho","num_pois","num_vqcs","M",
     "eqc_speed","vqc_speed","R_CAM","policy",
     "assign_success","assigns_sent","assign_rate",
     "redundant_delivers",
-    "avg_latency_s","p95_latency_s",
+    "avg_latency_s","p95_latency_s","p50_latency_s","p99_latency_s","max_latency_s",
     "ack_mean_s","ack_p95_s",
     "e2e_mean_s","e2e_p95_s",
     "coverage","coverage_rate",
-    "global_score","cam_raw","cam_matches",
+    "global_score","cam_raw","cam_matches","assign_msgs","msg_bytes",
     "ok","log_path"
 ]
 
-for seed in SEEDS:
-    for K in K_LIST:
-        for rho in RHO_LIST:
-            res = run_case(seed, K, rho)
-            # Garantiza todas las columnas:
-            row = [res.get(col, "") for col in header]
-            rows.append(row)
-
-# CSV
-with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
-    writer = csv.writer(f)
-    writer.writerow(header)
-    writer.writerows(rows)
-
-# Excel (mismas columnas, una sola hoja)
-df = pd.DataFrame(rows, columns=header)
-with pd.ExcelWriter(XLSX_PATH, engine="openpyxl") as xw:
-    df.to_excel(xw, sheet_name="results", index=False)
-
-print(f"\n✅ Terminado.\n📄 CSV:   {CSV_PATH}\n📊 Excel: {XLSX_PATH}\n📁 Carpeta: {OUTDIR}")
+def _safe_run_case(seed, K, rho, outdir, in_process=False, profile=False):
+    # Un fallo inesperado en un caso no debe tumbar el barrido entero
+    try:
+        if in_process:
+            return run_case_in_process(seed, K, rho, outdir, profile)
+        return run_case(seed, K, rho, outdir, profile)
+    except Exception as e:
+        print(f"❌ Excepción en seed={seed} K={K} rho={rho}: {e!r}")
+        return _base_row(seed, K, rho, "")
+
+def _run_jobs(jobs, outdir, workers, on_result):
+    """
+    Corre los casos en el pool y llama on_result(case, row) al terminar cada uno.
+    Con --in_process, un caso que pasa de --case_timeout se da por fallido (ok=0): sus workers se matan
+    (un run_scenario colgado no se puede cancelar) y los casos sin terminar se reenvían a un pool nuevo.
+    En modo subproceso el timeout lo aplica subprocess.run en run_case, que mata al hijo.
+    """
+    todo = list(jobs)
+    while todo:
+        Pool = ProcessPoolExecutor if args.in_process else ThreadPoolExecutor
+        pool = Pool(max_workers=workers)
+        futures = {pool.submit(_safe_run_case, *case, outdir, args.in_process, args.profile): case for case in todo}
+        started = {}          # future → instante en que lo vimos en ejecución
+        pending = set(futures)
+        todo = []
+        while pending:
+            done, pending = wait(pending, timeout=1.0, return_when=FIRST_COMPLETED)
+            for fut in done:
+                case = futures[fut]
+                try:
+                    row = fut.result()
+                except Exception as e:   # p.ej. un worker muerto (BrokenProcessPool)
+                    print(f"❌ Worker caído en seed={case[0]} K={case[1]} rho={case[2]}: {e!r}")
+                    row = _base_row(*case, "")
+                on_result(case, row)
+            if not (args.in_process and args.case_timeout):
+                continue
+            now = time.time()
+            for fut in pending:
+                if fut.running():
+                    started.setdefault(fut, now)
+            late = [fut for fut in pending if now - started.get(fut, now) > args.case_timeout]
+            if not late:
+                continue
+            for fut in late:
+                case = futures[fut]
+                print(f"⏰ Timeout en seed={case[0]} K={case[1]} rho={case[2]} tras {args.case_timeout:.0f}s")
+                on_result(case, _base_row(*case, ""))
+            for proc in list(getattr(pool, "_processes", {}).values()):
+                proc.terminate()
+            todo = [futures[fut] for fut in pending if fut not in late]
+            break
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def main():
+    print(f"→ SEEDS en uso: {SEEDS}")  # ayuda a verificar rápidamente
+
+    # ---------- Salidas ----------
+    STAMP  = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    OUTTAG = f"seed{SEEDS[0]}" if len(SEEDS) == 1 else None
+    OUTDIR = args.outdir or f"runs_{OUTTAG+'_' if OUTTAG else ''}{STAMP}"
+
+    os.makedirs(OUTDIR, exist_ok=True)
+    CSV_PATH = os.path.join(OUTDIR, "results_all.csv")
+    XLSX_PATH = os.path.join(OUTDIR, "results_all.xlsx")
+
+    # Casos más caros primero (mayor K, rho, P): acortan la cola al final del barrido
+    grid = [(seed, K, rho) for seed in SEEDS for K in K_LIST for rho in RHO_LIST]
+    jobs = sorted(grid, key=lambda c: (c[1], c[2], POIS), reverse=True)
+    results = {}
+
+    # Caché: los casos ya calculados (misma clave) no se vuelven a correr
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    version = code_version()
+    keys = {case: scenario_key(_scenario(*case), version) for case in grid}
+    if cache is not None and not args.profile:
+        for case in grid:
+            row = cache.get(keys[case])
+            if row is not None:
+                results[case] = row
+        jobs = [case for case in jobs if case not in results]
+        print(f"♻️ Caché {args.cache_dir} (código {version}): {len(results)} casos reutilizados, "
+              f"{len(jobs)} por calcular")
+
+    t_start = time.time()
+    workers = max(1, args.workers)
+    # in-process: procesos persistentes que encadenan corridas (run_scenario no arrastra estado)
+    timeout = f"{args.case_timeout:.0f}s" if args.case_timeout else "sin límite"
+    print(f"→ {len(jobs)} casos, workers={workers}, in_process={args.in_process}, timeout por caso={timeout}")
+
+    def on_result(case, row):
+        results[case] = row
+        if cache is not None and row.get("ok"):
+            # solo casos OK: un fallo/timeout se reintenta en la próxima pasada
+            cache.put(keys[case], _scenario(*case), row)
+        n_done = len(results) - (len(grid) - len(jobs))
+        elapsed = time.time() - t_start
+        eta = elapsed / n_done * (len(jobs) - n_done)
+        status = "OK" if row.get("ok") else "FAIL"
+        print(f"[{n_done}/{len(jobs)}] seed={case[0]} K={case[1]} rho={case[2]} → {status} "
+              f"(transcurrido {elapsed:.0f}s, ETA {eta:.0f}s)")
+
+    _run_jobs(jobs, OUTDIR, workers, on_result)
+
+    # Filas en el orden del grid (seed, K, rho), igual que el barrido secuencial
+    rows = []
+    for case in grid:
+        res = results[case]
+        # Garantiza todas las columnas:
+        row = [res.get(col, "") for col in header]
+        rows.append(row)
+
+    # CSV
+    with open(CSV_PATH, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+    # Excel (mismas columnas, una sola hoja)
+    df = pd.DataFrame(rows, columns=header)
+    with pd.ExcelWriter(XLSX_PATH, engine="openpyxl") as xw:
+        df.to_excel(xw, sheet_name="results", index=False)
+
+    # Perfil agregado de todo el barrido (un .prof por caso, junto a su log)
+    if args.profile:
+        prof_paths = [os.path.join(OUTDIR, f"seed{s}_K{k}_rho{r}_pois{POIS}_M{BUFFER_M}.prof") for s, k, r in grid]
+        out = profiling.aggregate([p for p in prof_paths if os.path.exists(p)], os.path.join(OUTDIR, "profile_sweep"))
+        if out is None:
+            print("⚠️ --profile: no se generó ningún .prof")
+        else:
+            print(f"📈 Perfil agregado: {out['hotspots']} | flamegraph: {out['folded']}")
+
+    print(f"\n✅ Terminado.\n📄 CSV:   {CSV_PATH}\n📊 Excel: {XLSX_PATH}\n📁 Carpeta: {OUTDIR}")
+
+
+if __name__ == "__main__":
+    main()
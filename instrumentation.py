@@ -0,0 +1,156 @@
+"""
+Opt-in hot-path timing of the protocol callbacks (run_simulation.py --instrument):
+- install() wraps, at class level and only for the duration of one run, the
+  callbacks gradysim drives (handle_timer, handle_packet, handle_telemetry)
+  plus the EQC/VQC internals that usually dominate (_viz_push, assign_to_vqcs,
+  take_picture). uninstall() puts the original functions back, so with the
+  flag off nothing is wrapped and the cost is exactly zero.
+- Wrappers must be installed before the simulator initializes the nodes:
+  gradysim's plugin dispatcher captures the class function in initialize().
+- Per (role, callback) we keep calls, total/max ns and a log-spaced histogram
+  (4 buckets per octave, ≈ ±10 %) from which p50/p99 are estimated.
+  handle_packet is split by message type and assign_to_vqcs by policy.
+- Times are inclusive: handle_timer of the EQC contains its take_picture and
+  assign_to_vqcs, handle_telemetry of the VQC contains its _viz_push, etc.
+"""
+
+import functools
+import time
+from typing import Dict, List, Optional, Tuple
+
+_SUB = 2    # bits de sub-bucket: 2**_SUB buckets por octava
+
+
+def _bucket(ns: int) -> int:
+    b = ns.bit_length()
+    if b <= _SUB + 1:
+        return ns
+    return (b << _SUB) | ((ns >> (b - _SUB - 1)) & ((1 << _SUB) - 1))
+
+
+def _bucket_mid(key: int) -> float:
+    if key < (_SUB + 2) << _SUB:
+        return float(key)
+    b, sub = key >> _SUB, key & ((1 << _SUB) - 1)
+    lo = ((1 << _SUB) | sub) << (b - _SUB - 1)
+    return lo + (1 << (b - _SUB - 1)) / 2.0
+
+
+class CallStats:
+    __slots__ = ("calls", "total_ns", "max_ns", "hist")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.hist: Dict[int, int] = {}
+
+    def add(self, ns: int) -> None:
+        self.calls += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        k = _bucket(ns)
+        self.hist[k] = self.hist.get(k, 0) + 1
+
+    def quantile(self, q: float) -> float:
+        """Cuantil aproximado (ns) a partir del histograma."""
+        if not self.calls:
+            return float("nan")
+        rank = q * (self.calls - 1)
+        seen = 0
+        for k in sorted(self.hist):
+            seen += self.hist[k]
+            if seen > rank:
+                return min(_bucket_mid(k), float(self.max_ns))
+        return float(self.max_ns)
+
+
+class Instrumentation:
+    """Acumula CallStats por (rol, callback) de una corrida."""
+
+    def __init__(self) -> None:
+        self.stats: Dict[Tuple[str, str], CallStats] = {}
+        self._patches: List[Tuple[type, str, object]] = []
+
+    def _get(self, role: str, name: str) -> CallStats:
+        st = self.stats.get((role, name))
+        if st is None:
+            st = self.stats[(role, name)] = CallStats()
+        return st
+
+    # ---------- wrappers ----------
+    def _wrap(self, cls, attr: str, role: str, key=None) -> None:
+        orig = cls.__dict__.get(attr)
+        if orig is None:
+            return
+        clock = time.perf_counter_ns
+        get = self._get
+        if key is None:
+            st = get(role, attr)
+
+            @functools.wraps(orig)
+            def wrapper(obj, *args, **kwargs):
+                t0 = clock()
+                try:
+                    return orig(obj, *args, **kwargs)
+                finally:
+                    st.add(clock() - t0)
+        else:
+            @functools.wraps(orig)
+            def wrapper(obj, *args, **kwargs):
+                st = get(role, f"{attr}[{key(obj, *args)}]")
+                t0 = clock()
+                try:
+                    return orig(obj, *args, **kwargs)
+                finally:
+                    st.add(clock() - t0)
+
+        self._patches.append((cls, attr, orig))
+        setattr(cls, attr, wrapper)
+
+    def install(self, codec) -> None:
+        """Envuelve los callbacks de EQC/VQC/PoI (llamar ANTES de builder.build())."""
+        from gradysim.simulator.extension.camera import CameraHardware
+        from eqc_protocol import EQCProtocol
+        from vqc_protocol import VQCProtocol
+        from poi_protocol import POIProtocol
+        from poi_field import POIField
+
+        msg_type = lambda _obj, data: codec.message_type(data)
+        for cls, role in ((EQCProtocol, "EQC"), (VQCProtocol, "VQC"), (POIProtocol, "PoI")):
+            self._wrap(cls, "handle_timer", role)
+            self._wrap(cls, "handle_packet", role, key=msg_type)
+            self._wrap(cls, "handle_telemetry", role)
+            self._wrap(cls, "_viz_push", role)
+        self._wrap(EQCProtocol, "assign_to_vqcs", "EQC", key=lambda obj: obj.assignment_policy)
+        # Cámara física y campo virtual: solo el EQC toma fotos
+        self._wrap(CameraHardware, "take_picture", "EQC")
+        self._wrap(POIField, "take_picture", "EQC")
+
+    def uninstall(self) -> None:
+        for cls, attr, orig in reversed(self._patches):
+            setattr(cls, attr, orig)
+        self._patches.clear()
+
+    # ---------- salida ----------
+    def rows(self, loop_s: Optional[float] = None) -> List[dict]:
+        """Filas ordenadas por tiempo total (desc); tiempos en µs salvo total_s."""
+        out = []
+        for (role, name), st in self.stats.items():
+            if not st.calls:
+                continue
+            total_s = st.total_ns / 1e9
+            out.append({
+                "role": role,
+                "callback": name,
+                "calls": st.calls,
+                "total_s": total_s,
+                "pct_loop": (100.0 * total_s / loop_s) if loop_s else float("nan"),
+                "mean_us": st.total_ns / st.calls / 1e3,
+                "p50_us": st.quantile(0.50) / 1e3,
+                "p99_us": st.quantile(0.99) / 1e3,
+                "max_us": st.max_ns / 1e3,
+            })
+        out.sort(key=lambda r: r["total_s"], reverse=True)
+        return out
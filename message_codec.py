@@ -0,0 +1,171 @@
+"""
+Message codecs for EQC ↔ VQC traffic (HELLO, HELLO_ACK, ASSIGN, DELIVER, DELIVER_ACK):
+- Both codecs turn the protocol dicts into the `str` payload that gradysim's
+  CommunicationCommand carries, and back into the same dicts, so the protocol
+  handlers do not depend on the wire format.
+- JsonCodec: json.dumps / json.loads (readable; kept as the debug codec).
+- CompactCodec: struct-packed records with integer PoI indices (position in
+  the run's PoI list) instead of label/id strings; coord and urgency are
+  rebuilt from the PoI table on decode. The bytes travel as a latin-1 str
+  (1 char = 1 byte), so len(payload) is the size on the wire for both codecs.
+- HELLO / HELLO_ACK may carry an optional "pids" list (piggybacked delivery,
+  config.DELIVER_MODE); in CompactCodec it is appended after the fixed part
+  as a count + records, so a HELLO without it keeps its original size.
+- HELLO, HELLO_ACK and ASSIGN may carry an optional "loads" list
+  (config.REASSOC_MODE = "load"): one [leader, backlog, free slots,
+  followers, t] entry per leader, as last known by the sender. In
+  CompactCodec it follows the "pids" part (written with count 0 if needed).
+- Select with run_simulation.py --codec json|compact (config.MESSAGE_CODEC).
+"""
+
+import json
+import struct
+from typing import Dict, Iterable, Sequence
+
+CODECS = ("compact", "json")
+
+# Códigos de tipo (primer byte del registro compacto)
+_TYPES = ("HELLO", "HELLO_ACK", "ASSIGN", "DELIVER", "DELIVER_ACK")
+_CODE = {t: i + 1 for i, t in enumerate(_TYPES)}
+_NAME = {i + 1: t for i, t in enumerate(_TYPES)}
+
+_HEAD = struct.Struct("<BI")            # tipo, v_id
+_HELLO = struct.Struct("<h3d")          # huecos, position
+_HELLO_ACK = struct.Struct("<I4d")      # eqc_id, eqc_pos, eqc_time
+_COUNT = struct.Struct("<H")            # nº de registros que siguen
+_POI_T = struct.Struct("<Id")           # índice de PoI + instante (ts / t_arrive)
+_POI = struct.Struct("<I")              # índice de PoI
+_LOAD = struct.Struct("<HIHHd")         # líder, backlog, huecos libres, followers, instante
+
+
+def merge_loads(view: Dict[int, list], entries: Iterable[Sequence], skip=None) -> None:
+    """Funde entradas "loads" en view (líder → entrada): gana la más reciente; `skip` = líder propio."""
+    for e in entries:
+        lid = int(e[0])
+        if lid == skip:
+            continue
+        old = view.get(lid)
+        if old is None or e[4] > old[4]:
+            view[lid] = list(e)
+
+
+class JsonCodec:
+    name = "json"
+
+    def encode(self, msg: dict) -> str:
+        return json.dumps(msg)
+
+    def decode(self, data: str) -> dict:
+        return json.loads(data)
+
+    def message_type(self, data: str) -> str:
+        return json.loads(data).get("type", "?")
+
+
+class CompactCodec:
+    name = "compact"
+
+    def __init__(self, pois: Sequence[dict]) -> None:
+        self.pois = pois
+        self.label2idx: Dict[str, int] = {p["label"]: i for i, p in enumerate(pois)}
+        self.id2idx: Dict[str, int] = {p["id"]: i for i, p in enumerate(pois)}
+
+    def encode(self, msg: dict) -> str:
+        t = msg["type"]
+        code = _CODE.get(t)
+        if code is None:
+            raise ValueError(f"Tipo de mensaje no soportado por CompactCodec: {t!r}")
+        parts = [_HEAD.pack(code, msg["v_id"])]
+        if t == "HELLO":
+            parts.append(_HELLO.pack(msg["huecos"], *msg["position"]))
+            if "pids" in msg or "loads" in msg:   # DELIVER piggyback
+                pids = msg.get("pids", ())
+                parts.append(_COUNT.pack(len(pids)))
+                parts.extend(_POI_T.pack(self.id2idx[e["id"]], e["t_arrive"]) for e in pids)
+        elif t == "HELLO_ACK":
+            parts.append(_HELLO_ACK.pack(msg["eqc_id"], *msg["eqc_pos"], msg["eqc_time"]))
+            if "pids" in msg or "loads" in msg:   # ACK combinado
+                pids = msg.get("pids", ())
+                parts.append(_COUNT.pack(len(pids)))
+                parts.extend(_POI.pack(self.id2idx[pid]) for pid in pids)
+        elif t == "ASSIGN":
+            pois = msg["pois"]
+            parts.append(_COUNT.pack(len(pois)))
+            parts.extend(_POI_T.pack(self.label2idx[p["label"]], p["ts"]) for p in pois)
+        elif t == "DELIVER":
+            pids = msg["pids"]
+            parts.append(_COUNT.pack(len(pids)))
+            parts.extend(_POI_T.pack(self.id2idx[e["id"]], e["t_arrive"]) for e in pids)
+        else:   # DELIVER_ACK
+            pids = msg["pids"]
+            parts.append(_COUNT.pack(len(pids)))
+            parts.extend(_POI.pack(self.id2idx[pid]) for pid in pids)
+        if "loads" in msg:
+            parts.append(_COUNT.pack(len(msg["loads"])))
+            parts.extend(_LOAD.pack(*e) for e in msg["loads"])
+        return b"".join(parts).decode("latin-1")
+
+    def message_type(self, data: str) -> str:
+        """Tipo del mensaje sin decodificarlo entero (primer byte)."""
+        return _NAME.get(ord(data[0]), "?") if data else "?"
+
+    def decode(self, data: str) -> dict:
+        buf = data.encode("latin-1")
+        code, vid = _HEAD.unpack_from(buf, 0)
+        off = _HEAD.size
+        t = _NAME[code]
+        msg = {"type": t, "v_id": vid}
+        if t == "HELLO":
+            free, x, y, z = _HELLO.unpack_from(buf, off)
+            msg["huecos"] = free
+            msg["position"] = [x, y, z]
+            off += _HELLO.size
+            if off < len(buf):
+                pids, off = self._decode_pids(buf, off, _POI_T)
+                if pids:
+                    msg["pids"] = pids
+        elif t == "HELLO_ACK":
+            eqc_id, x, y, z, eqc_time = _HELLO_ACK.unpack_from(buf, off)
+            msg.update({"eqc_id": eqc_id, "eqc_pos": [x, y, z], "eqc_time": eqc_time})
+            off += _HELLO_ACK.size
+            if off < len(buf):
+                pids, off = self._decode_pids(buf, off, _POI)
+                if pids:
+                    msg["pids"] = pids
+        elif t == "ASSIGN":
+            (n,) = _COUNT.unpack_from(buf, off)
+            off += _COUNT.size
+            pois = self.pois
+            msg["pois"] = [
+                {"label": pois[i]["label"], "coord": pois[i]["coord"], "urgency": pois[i]["urgency"], "ts": ts}
+                for i, ts in _POI_T.iter_unpack(buf[off:off + n * _POI_T.size])
+            ]
+            off += n * _POI_T.size
+        else:   # DELIVER / DELIVER_ACK
+            msg["pids"], off = self._decode_pids(buf, off, _POI_T if t == "DELIVER" else _POI)
+        if off < len(buf):
+            (n,) = _COUNT.unpack_from(buf, off)
+            off += _COUNT.size
+            msg["loads"] = [list(e) for e in _LOAD.iter_unpack(buf[off:off + n * _LOAD.size])]
+        return msg
+
+    def _decode_pids(self, buf: bytes, off: int, rec: struct.Struct):
+        """Lista "pids" (count + registros desde off): entradas de DELIVER (_POI_T) o ids de un ACK (_POI), y el offset siguiente."""
+        (n,) = _COUNT.unpack_from(buf, off)
+        off += _COUNT.size
+        end = off + n * rec.size
+        pois = self.pois
+        if rec is _POI_T:
+            return [
+                {"id": pois[i]["id"], "label": pois[i]["label"], "t_arrive": t_arr}
+                for i, t_arr in _POI_T.iter_unpack(buf[off:end])
+            ], end
+        return [pois[i]["id"] for (i,) in _POI.iter_unpack(buf[off:end])], end
+
+
+def make_codec(name: str, pois: Sequence[dict]):
+    if name == "json":
+        return JsonCodec()
+    if name == "compact":
+        return CompactCodec(pois)
+    raise ValueError(f"codec desconocido: {name!r} (opciones: {', '.join(CODECS)})")
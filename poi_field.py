@@ -0,0 +1,64 @@
+"""
+Virtual PoI field:
+- Keeps the PoIs in compact arrays (x, y, z) instead of one POIProtocol node each.
+- Emulates CameraHardware.take_picture() for the PoIs as a range query over the
+  spatial index, with the same reach / cone-angle semantics as CameraConfiguration.
+- Used when run_simulation.py is launched with --virtual_pois.
+"""
+
+import math
+from array import array
+from typing import List, Sequence, Tuple
+
+from gradysim.simulator.extension.camera import CameraConfiguration
+
+from poi_index import POIGridIndex
+
+
+class POIField:
+
+    def __init__(self, pois: Sequence[dict], index: POIGridIndex, z: float = 0.0) -> None:
+        self.index = index
+        self.xs = array("d", (p["coord"][0] for p in pois))
+        self.ys = array("d", (p["coord"][1] for p in pois))
+        self.z = float(z)   # todos los PoIs están en el suelo (mismo z que los nodos POIProtocol)
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    @staticmethod
+    def _facing_vector(cfg: CameraConfiguration) -> Tuple[float, float, float]:
+        # Mismo convenio que CameraHardware: elevación 0 = arriba, 180 = abajo; rotación desde el eje x
+        el = math.radians(cfg.facing_elevation)
+        rot = math.radians(cfg.facing_rotation)
+        return (math.sin(el) * math.cos(rot), math.sin(el) * math.sin(rot), math.cos(el))
+
+    def take_picture(self, position: Tuple[float, float, float], cfg: CameraConfiguration) -> List[dict]:
+        """
+        PoIs vistos por una cámara en `position` con la configuración `cfg`:
+        distancia 3D <= camera_reach y ángulo respecto a la dirección de la cámara
+        <= camera_theta. Devuelve el mismo formato que take_picture() (DetectedNode).
+        """
+        cx, cy, cz = position
+        reach = float(cfg.camera_reach)
+        dz = self.z - cz
+        if abs(dz) > reach:
+            return []
+        r_xy = math.sqrt(reach * reach - dz * dz)
+
+        fx, fy, fz = self._facing_vector(cfg)
+        theta = math.radians(cfg.camera_theta)
+        xs, ys, z = self.xs, self.ys, self.z
+
+        detected = []
+        for i in self.index.query_radius(cx, cy, r_xy * (1 + 1e-9)):
+            rx, ry = xs[i] - cx, ys[i] - cy
+            dist = math.sqrt(rx * rx + ry * ry + dz * dz)
+            if dist > reach:
+                continue
+            if dist > 0.0:
+                cos_a = (rx * fx + ry * fy + dz * fz) / dist
+                if math.acos(max(-1.0, min(1.0, cos_a))) > theta:
+                    continue
+            detected.append({"position": (xs[i], ys[i], z), "type": "node"})
+        return detected
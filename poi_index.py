@@ -0,0 +1,102 @@
+"""
+PoI spatial index:
+- Uniform grid over the run's PoIs, built once per run after config.get_pois().
+- Radius queries (casual detection of the V-QCs) and exact-coordinate
+  lookups (matching camera detections of the E-QCs against PoIs).
+- Queries return indices into the PoI list, sorted, so callers keep the
+  same processing order as a linear scan over the PoI list.
+- match_exact(): batched NumPy variant of query_exact for a whole camera
+  snapshot (PoIs sorted by x + searchsorted), used by the EQC camera filter.
+"""
+
+import math
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class POIGridIndex:
+
+    def __init__(self, pois: Sequence[dict], cell_size: float = 40.0) -> None:
+        if cell_size <= 0:
+            raise ValueError(f"cell_size debe ser > 0 (recibido {cell_size})")
+        self.pois = pois
+        self.cell = float(cell_size)
+        self._xs: List[float] = []
+        self._ys: List[float] = []
+        self._cells: Dict[Tuple[int, int], List[int]] = {}
+        for i, p in enumerate(pois):
+            x, y = p["coord"]
+            self._xs.append(x)
+            self._ys.append(y)
+            self._cells.setdefault(self._key(x, y), []).append(i)
+        # Copia ordenada por x para el emparejamiento vectorizado (match_exact)
+        xs_np = np.asarray(self._xs, dtype=float)
+        self._order = np.argsort(xs_np, kind="stable")
+        self._sx = xs_np[self._order]
+        self._sy = np.asarray(self._ys, dtype=float)[self._order]
+
+    def __len__(self) -> int:
+        return len(self._xs)
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+
+    def query_box(self, xmin: float, ymin: float, xmax: float, ymax: float) -> List[int]:
+        """Índices (ordenados) de los PoIs con xmin<=x<=xmax e ymin<=y<=ymax."""
+        cx0, cy0 = self._key(xmin, ymin)
+        cx1, cy1 = self._key(xmax, ymax)
+        xs, ys = self._xs, self._ys
+        out = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for i in self._cells.get((cx, cy), ()):
+                    if xmin <= xs[i] <= xmax and ymin <= ys[i] <= ymax:
+                        out.append(i)
+        out.sort()
+        return out
+
+    def query_radius(self, x: float, y: float, r: float) -> List[int]:
+        """Índices (ordenados) de los PoIs a distancia XY <= r de (x, y)."""
+        r2 = r * r
+        xs, ys = self._xs, self._ys
+        return [
+            i for i in self.query_box(x - r, y - r, x + r, y + r)
+            if (xs[i] - x) ** 2 + (ys[i] - y) ** 2 <= r2
+        ]
+
+    def query_exact(self, x: float, y: float, eps: float) -> List[int]:
+        """
+        Índices (ordenados) de los PoIs con |x-px| < eps y |y-py| < eps
+        (mismo criterio estricto que el filtro original de la cámara).
+        """
+        xs, ys = self._xs, self._ys
+        return [
+            i for i in self.query_box(x - eps, y - eps, x + eps, y + eps)
+            if abs(x - xs[i]) < eps and abs(y - ys[i]) < eps
+        ]
+
+    def match_exact(self, xs: np.ndarray, ys: np.ndarray, eps: float) -> List[int]:
+        """
+        Versión vectorizada de query_exact para N detecciones a la vez: índices (ordenados,
+        sin repetir) de los PoIs con |x-px| < eps y |y-py| < eps para ALGUNA detección.
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if xs.size == 0 or self._sx.size == 0:
+            return []
+        # Rango [lo, hi) de PoIs (ordenados por x) candidatos; margen 2·eps para que el
+        # redondeo de x±eps no deje fuera casos frontera: el filtro exacto va después
+        lo = np.searchsorted(self._sx, xs - 2 * eps, side="left")
+        hi = np.searchsorted(self._sx, xs + 2 * eps, side="right")
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        if total == 0:
+            return []
+        # Aplana todos los candidatos (detección, posición en el orden por x)
+        det = np.repeat(np.arange(xs.size), counts)
+        starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        pos = starts + np.arange(total)
+        # Mismo criterio (y misma aritmética) que query_exact: |x-px| < eps y |y-py| < eps
+        keep = (np.abs(xs[det] - self._sx[pos]) < eps) & (np.abs(ys[det] - self._sy[pos]) < eps)
+        return np.unique(self._order[pos[keep]]).tolist()
@@ -0,0 +1,103 @@
+"""
+Per-PoI lifecycle table of a run (one row per PoI, indexed by the PoI's
+position in ctx.pois):
+- A NumPy structured array with t_detect / detecting leader, t_assign /
+  assigned follower (last assignment) / number of ASSIGNs that carried the
+  PoI (> 1 = duplicate work), t_arrive / arriving follower, t_ack,
+  delivery kind (assigned / casual) and deliveries / redundant deliveries.
+  Times are NaN and node ids -1 until the event happens.
+- The protocols record events on ctx.poi_table as they happen (EQC
+  detection, ASSIGN, DELIVER; VQC arrival); nothing is parsed from the logs.
+- save() writes <fig_prefix>.poi.npz: the table under "pois" plus the run
+  identification columns of the REPRODUCIBILITY/poi_*_all_seeds.xlsx raw
+  rows (seed, K, rho, num_pois, num_vqcs, M, eqc_speed, vqc_speed, R_CAM,
+  policy) as scalars, so per-PoI data joins directly with the per-run rows.
+
+    d = np.load("runs_x/seed123_K2_rho2_pois2500_M5.poi.npz")
+    t = d["pois"]; served = t[~np.isnan(t["t_arrive"])]
+    service = served["t_arrive"] - served["t_detect"]
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+
+KIND_NONE, KIND_ASSIGNED, KIND_CASUAL = 0, 1, 2
+KINDS = {"assigned": KIND_ASSIGNED, "casual": KIND_CASUAL}
+
+POI_DTYPE = np.dtype([
+    ("poi", "i4"),            # índice en ctx.pois
+    ("urgency", "i1"),
+    ("x", "f4"),
+    ("y", "f4"),
+    ("t_detect", "f8"),
+    ("leader", "i2"),         # EQC que lo vio primero
+    ("t_assign", "f8"),       # última asignación
+    ("follower", "i4"),       # VQC de la última asignación
+    ("assigns", "i2"),        # ASSIGNs que incluyeron el PoI (de cualquier líder)
+    ("t_arrive", "f8"),       # primera llegada de un VQC
+    ("arrived_by", "i4"),
+    ("t_ack", "f8"),          # primer DELIVER recibido por un EQC (= DELIVER_ACK)
+    ("kind", "i1"),           # 0 = no colectado, 1 = assigned, 2 = casual
+    ("delivers", "i4"),
+    ("redundant", "i4"),
+])
+
+# Columnas de identificación de la corrida (mismas que el raw de REPRODUCIBILITY/)
+META_COLUMNS = ("seed", "K", "rho", "num_pois", "num_vqcs", "M", "eqc_speed", "vqc_speed", "R_CAM", "policy")
+
+
+class POITable:
+    def __init__(self, pois: Sequence[dict]) -> None:
+        n = len(pois)
+        t = np.zeros(n, dtype=POI_DTYPE)
+        t["poi"] = np.arange(n)
+        if n:
+            t["urgency"] = [p["urgency"] for p in pois]
+            t["x"] = [p["coord"][0] for p in pois]
+            t["y"] = [p["coord"][1] for p in pois]
+        for col in ("t_detect", "t_assign", "t_arrive", "t_ack"):
+            t[col] = np.nan
+        for col in ("leader", "follower", "arrived_by"):
+            t[col] = -1
+        self.rows = t
+        self.label2idx: Dict[str, int] = {p["label"]: i for i, p in enumerate(pois)}
+
+    # ---------- eventos (protocolos) ----------
+    def detect(self, i: int, t: float, leader: int) -> None:
+        row = self.rows[i]
+        if np.isnan(row["t_detect"]):
+            row["t_detect"] = t
+            row["leader"] = leader
+
+    def assign(self, label: str, t: float, follower: int) -> None:
+        row = self.rows[self.label2idx[label]]
+        row["t_assign"] = t
+        row["follower"] = follower
+        row["assigns"] += 1
+
+    def arrive(self, label: str, t: float, follower: int, kind: str) -> None:
+        row = self.rows[self.label2idx[label]]
+        if np.isnan(row["t_arrive"]):
+            row["t_arrive"] = t
+            row["arrived_by"] = follower
+            row["kind"] = KINDS[kind]
+
+    def deliver(self, label: str, t: float, redundant: bool = False) -> None:
+        row = self.rows[self.label2idx[label]]
+        row["delivers"] += 1
+        if np.isnan(row["t_ack"]):
+            row["t_ack"] = t
+        if redundant:
+            row["redundant"] += 1
+
+    def duplicate_assigns(self) -> int:
+        """ASSIGNs de más: los que llevaron un PoI que ya había sido asignado antes."""
+        return int(np.maximum(self.rows["assigns"].astype(np.int64) - 1, 0).sum())
+
+    # ---------- salida ----------
+    def save(self, path: str, meta: dict) -> str:
+        """Escribe <path> (.npz comprimido) con la tabla y las columnas de la corrida."""
+        extra = {k: np.asarray(meta[k]) for k in META_COLUMNS if k in meta}
+        np.savez_compressed(path, pois=self.rows, **extra)
+        return path
@@ -0,0 +1,133 @@
+"""
+cProfile support for single runs and whole sweeps:
+- run_simulation.py --profile dumps a pstats file per run next to its log
+  (<fig_prefix>.prof), covering node construction, the event loop and the
+  summary.
+- merge() folds any number of those files into one pstats.Stats;
+  write_hotspots() prints the top functions by self and cumulative time;
+  write_collapsed() writes collapsed stacks ("a;b;c <µs>" per line), the
+  input format of flamegraph.pl / speedscope / inferno.
+- pstats only keeps caller → callee edges, not full stacks: each function's
+  self time is spread up the call graph in proportion to the cumulative time
+  of every caller edge. Stacks are therefore reconstructed, exact only when
+  every function has a single caller path.
+- experiments.py --profile uses this to aggregate a sweep; it can also be run
+  by hand:
+
+    python profiling.py runs_x/*.prof --out runs_x/profile
+"""
+
+import argparse
+import glob
+import io
+import os
+import pstats
+from collections import defaultdict
+from typing import Iterable, Optional
+
+
+def profile_path(log_base: str) -> str:
+    return f"{log_base}.prof"
+
+
+def merge(paths: Iterable[str]) -> Optional[pstats.Stats]:
+    stats = None
+    for p in paths:
+        if stats is None:
+            stats = pstats.Stats(p, stream=io.StringIO())
+        else:
+            stats.add(p)
+    return stats
+
+
+def write_hotspots(stats: pstats.Stats, path: str, top: int = 40, n_runs: Optional[int] = None) -> None:
+    buf = io.StringIO()
+    stats.stream = buf
+    if n_runs is not None:
+        buf.write(f"Perfiles agregados: {n_runs}\n")
+    buf.write(f"\n===== Top {top} por tiempo propio (tottime) =====\n")
+    stats.sort_stats("tottime").print_stats(top)
+    buf.write(f"\n===== Top {top} por tiempo acumulado (cumtime) =====\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(buf.getvalue())
+
+
+def _label(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":                       # builtins: "<built-in method time.sleep>"
+        label = name
+    else:
+        label = f"{os.path.basename(filename)}:{name}:{lineno}"
+    return label.replace(";", ",").replace(" ", "_")
+
+
+def write_collapsed(stats: pstats.Stats, path: str, max_depth: int = 64, min_frac: float = 1e-5) -> int:
+    """Escribe pilas colapsadas (µs de tiempo propio); devuelve el nº de líneas."""
+    st = stats.stats
+    total = sum(v[2] for v in st.values())
+    min_w = total * min_frac
+    folded = defaultdict(float)
+
+    def walk(func, weight, path):
+        edges = [(c, e[3]) for c, e in st[func][4].items() if c in st and c not in path and e[3] > 0]
+        norm = sum(w for _, w in edges)
+        if not edges or len(path) >= max_depth:
+            folded[path] += weight
+            return
+        for caller, w in edges:
+            share = weight * w / norm
+            if share < min_w:
+                folded[path] += share     # rama despreciable: se queda en la pila actual
+            else:
+                walk(caller, share, (caller,) + path)
+
+    for func, (_cc, _nc, tt, _ct, _callers) in st.items():
+        if tt > 0:
+            walk(func, tt, (func,))
+
+    lines = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, w in sorted(folded.items(), key=lambda kv: -kv[1]):
+            us = int(round(w * 1e6))
+            if us <= 0:
+                continue
+            f.write(";".join(_label(fn) for fn in stack) + f" {us}\n")
+            lines += 1
+    return lines
+
+
+def aggregate(paths, out_base: str, top: int = 40) -> Optional[dict]:
+    """Fusiona perfiles y escribe <out_base>.prof, _hotspots.txt y .folded; None si no hay perfiles."""
+    paths = sorted(paths)
+    stats = merge(paths)
+    if stats is None:
+        return None
+    out = {
+        "prof": f"{out_base}.prof",
+        "hotspots": f"{out_base}_hotspots.txt",
+        "folded": f"{out_base}.folded",
+    }
+    stats.dump_stats(out["prof"])
+    write_hotspots(stats, out["hotspots"], top=top, n_runs=len(paths))
+    write_collapsed(stats, out["folded"])
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Agrega perfiles cProfile (.prof) de varias corridas")
+    ap.add_argument("profiles", nargs="+", help="ficheros .prof o patrones glob")
+    ap.add_argument("--out", default="profile", help="prefijo de salida (.prof, _hotspots.txt, .folded)")
+    ap.add_argument("--top", type=int, default=40)
+    args = ap.parse_args()
+
+    paths = sorted({p for pat in args.profiles for p in (glob.glob(pat) or [pat])})
+    out = aggregate(paths, args.out, top=args.top)
+    if out is None:
+        print("⚠️ No hay perfiles que agregar")
+        return
+    print(f"📈 {len(paths)} perfiles → {out['hotspots']} | {out['folded']} | {out['prof']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Latency accumulators with mergeable state (one per EQC, merged into the run totals):
+- ExactStats keeps every value (the original lists) and answers quantiles
+  with the same nearest-rank rule the summaries always used,
+  sorted(v)[int(q * (n - 1))]. Use it to reproduce the paper numbers.
+- SketchStats is a streaming log-bucket sketch (DDSketch-style): value x > 0
+  goes to bucket ceil(log_γ x) with γ = (1 + α) / (1 − α), negatives to a
+  mirrored store and |x| < MIN_VALUE to a zero bucket. The answer for the
+  same rank lies within a relative error α of the exact one (α = 1 % by
+  default); memory is O(log(max/min) / α) buckets, independent of the
+  number of deliveries. count, mean, min and max stay exact.
+- Both expose add / merge / quantile / mean / min / max and len(), so the
+  protocol and the summaries do not care which one is active.
+- Select with run_simulation.py --latency_stats exact|sketch
+  (config.LATENCY_STATS).
+"""
+
+import math
+from typing import Dict, List
+
+LATENCY_STATS_MODES = ("exact", "sketch")
+
+MIN_VALUE = 1e-9        # |x| por debajo de esto cuenta como 0 en el sketch
+
+
+class LatencyStats:
+    """Parte común: contador, suma, mínimo y máximo exactos."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _track(self, x: float) -> None:
+        self.count += 1
+        self.total += x
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    def _merge_totals(self, other: "LatencyStats") -> None:
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    def quantiles(self, qs) -> Dict[float, float]:
+        return {q: self.quantile(q) for q in qs}
+
+
+class ExactStats(LatencyStats):
+    mode = "exact"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.values: List[float] = []
+        self._sorted = True
+
+    def add(self, x: float) -> None:
+        self._track(x)
+        if self.values and x < self.values[-1]:
+            self._sorted = False
+        self.values.append(x)
+
+    def merge(self, other: "ExactStats") -> None:
+        self._merge_totals(other)
+        self.values.extend(other.values)
+        self._sorted = False
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        if not self._sorted:
+            self.values.sort()        # una sola vez por ráfaga de consultas
+            self._sorted = True
+        return self.values[int(q * (self.count - 1))]
+
+
+class SketchStats(LatencyStats):
+    mode = "sketch"
+
+    def __init__(self, alpha: float = 0.01) -> None:
+        super().__init__()
+        self.alpha = alpha
+        self.gamma = (1.0 + alpha) / (1.0 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.pos: Dict[int, int] = {}
+        self.neg: Dict[int, int] = {}
+        self.zeros = 0
+
+    def _key(self, x: float) -> int:
+        return math.ceil(math.log(x) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Representante del bucket (γ^(k-1), γ^k]: error relativo <= α
+        return 2.0 * self.gamma ** key / (self.gamma + 1.0)
+
+    def add(self, x: float) -> None:
+        self._track(x)
+        if x > MIN_VALUE:
+            k = self._key(x)
+            self.pos[k] = self.pos.get(k, 0) + 1
+        elif x < -MIN_VALUE:
+            k = self._key(-x)
+            self.neg[k] = self.neg.get(k, 0) + 1
+        else:
+            self.zeros += 1
+
+    def merge(self, other: "SketchStats") -> None:
+        if other.gamma != self.gamma:
+            raise ValueError("SketchStats con α distinto no se pueden combinar")
+        self._merge_totals(other)
+        for k, n in other.pos.items():
+            self.pos[k] = self.pos.get(k, 0) + n
+        for k, n in other.neg.items():
+            self.neg[k] = self.neg.get(k, 0) + n
+        self.zeros += other.zeros
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        rank = int(q * (self.count - 1))     # misma regla de rango que ExactStats
+        seen = 0
+        for k in sorted(self.neg, reverse=True):
+            seen += self.neg[k]
+            if seen > rank:
+                return max(-self._value(k), self.min)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.pos):
+            seen += self.pos[k]
+            if seen > rank:
+                return min(self._value(k), self.max)
+        return self.max
+
+
+def make_stats(mode: str) -> LatencyStats:
+    if mode == "exact":
+        return ExactStats()
+    if mode == "sketch":
+        return SketchStats()
+    raise ValueError(f"modo de latencias desconocido: {mode!r} (opciones: {', '.join(LATENCY_STATS_MODES)})")
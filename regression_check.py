@@ -0,0 +1,138 @@
+"""
+regression_check.py
+Comprueba que un cambio de implementación no altera la simulación:
+- Corre un conjunto de escenarios (semillas × (K, ρ)) con run_simulation.py
+  de un árbol de código (--tree, por defecto este) en procesos separados.
+- Huella de cada caso: la línea RESULT completa y el hash del contenido de
+  la tabla por PoI (<prefix>.poi.npz: instantes de detección, asignación,
+  llegada y ACK de cada PoI), que detecta cambios que los agregados no ven.
+- --record guarda las huellas en JSON, junto con las columnas de la tabla por
+  PoI que entraron en el hash; --check hashea esas mismas columnas (una
+  columna añadida después no rompe la referencia, una que falta sí) y sale
+  con código 1 si algún caso difiere (muestra los campos distintos).
+
+    git worktree add /tmp/base HEAD~1
+    python regression_check.py --tree /tmp/base --record base.json
+    python regression_check.py --check base.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+RESULT_LINE_RE = re.compile(r"(RESULT seed=.*)$", re.MULTILINE)
+
+
+def _poi_table_hash(path, columns=None):
+    """(hash, columnas hasheadas) de la tabla por PoI; columns=None → todas las de la tabla."""
+    if not os.path.exists(path):
+        return None, None
+    import numpy as np
+    from numpy.lib import recfunctions
+    with np.load(path) as d:
+        t = d["pois"]
+    names = list(t.dtype.names) if columns is None else list(columns)
+    missing = [n for n in names if n not in t.dtype.names]
+    if missing:
+        return f"sin columnas {missing}", names
+    t = recfunctions.repack_fields(t[names])
+    return hashlib.sha256(t.tobytes()).hexdigest()[:16], names
+
+
+def _run_case(tree, outdir, seed, K, rho, args, columns=None):
+    name = f"seed{seed}_K{K}_rho{rho}"
+    prefix = os.path.join(outdir, name)
+    cmd = [
+        sys.executable, os.path.join(tree, "run_simulation.py"),
+        "--seed", str(seed), "--num_pois", str(args.pois), "--num_eqcs", str(K), "--num_vqcs", str(K * rho),
+        "--buffer_size", str(args.buffer_size), "--camera_reach", str(args.camera_reach),
+        "--policy", args.policy, "--duration", str(args.duration),
+        "--no_rt", "--no_vis", "--fig_prefix", prefix,
+    ] + (args.extra.split() if args.extra else [])
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=tree)
+    m = None
+    if os.path.exists(prefix + ".txt"):
+        with open(prefix + ".txt", "r", encoding="utf-8") as f:
+            m = RESULT_LINE_RE.search(f.read())
+    if proc.returncode != 0 or m is None:
+        return name, {"error": f"rc={proc.returncode}: {proc.stderr[-500:]}"}
+    digest, names = _poi_table_hash(prefix + ".poi.npz", columns)
+    return name, {"result": m.group(1).strip(), "poi_table": digest, "poi_columns": names}
+
+
+def _diff(a, b):
+    ta = dict(tok.split("=", 1) for tok in a.get("result", "").split()[1:] if "=" in tok)
+    tb = dict(tok.split("=", 1) for tok in b.get("result", "").split()[1:] if "=" in tok)
+    # Campos que la referencia no tiene (métricas añadidas después) no cuentan como diferencia
+    keys = sorted(set(ta) & set(tb)) if ta else sorted(tb)
+    out = [f"{k}: {ta.get(k)} → {tb.get(k)}" for k in keys if ta.get(k) != tb.get(k)]
+    if a.get("poi_table") != b.get("poi_table"):
+        out.append(f"poi_table: {a.get('poi_table')} → {b.get('poi_table')}")
+    if "error" in b:
+        out.append(f"error: {b['error']}")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Chequeo de regresión de resultados de simulación")
+    mode = ap.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", metavar="JSON", help="guarda las huellas de referencia")
+    mode.add_argument("--check", metavar="JSON", help="compara contra huellas guardadas")
+    ap.add_argument("--tree", default=_HERE, help="carpeta con el run_simulation.py a ejecutar")
+    ap.add_argument("--seeds", type=int, nargs="+", default=[123, 114, 115])
+    ap.add_argument("--cases", nargs="+", default=["1,1", "2,2", "4,1"], help="pares K,rho")
+    ap.add_argument("--pois", type=int, default=300)
+    ap.add_argument("--duration", type=float, default=300.0)
+    ap.add_argument("--buffer_size", type=int, default=5)
+    ap.add_argument("--camera_reach", type=float, default=84.9)
+    ap.add_argument("--policy", default="load_balancing")
+    ap.add_argument("--extra", default="", help="flags extra para run_simulation.py (p.ej. \"--codec json\")")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    ref = None
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as f:
+            ref = json.load(f)
+    # Con --check se hashean las columnas de la referencia (las que ella tenía al grabarse)
+    columns = ref.get("poi_columns") if ref else None
+
+    tree = os.path.abspath(args.tree)
+    outdir = tempfile.mkdtemp(prefix="regression_")
+    grid = [(seed, *map(int, case.split(","))) for seed in args.seeds for case in args.cases]
+    print(f"→ {len(grid)} casos desde {tree} (P={args.pois}, duración={args.duration}s, logs en {outdir})")
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        prints = dict(pool.map(lambda c: _run_case(tree, outdir, *c, args, columns), grid))
+    names = next((p["poi_columns"] for p in prints.values() if p.get("poi_columns")), None)
+    for p in prints.values():
+        p.pop("poi_columns", None)
+
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k not in ("record", "check")},
+                       "poi_columns": names, "cases": prints}, f, indent=2)
+        failed = [n for n, p in prints.items() if "error" in p]
+        print(f"📄 Huellas guardadas en {args.record}" + (f" (con errores: {failed})" if failed else ""))
+        sys.exit(1 if failed else 0)
+
+    if columns is None:
+        print("⚠️ La referencia no guarda poi_columns: se hashean todas las columnas (vuelve a grabarla si difiere)")
+    ref = ref["cases"]
+    bad = 0
+    for name in sorted(prints):
+        diffs = _diff(ref.get(name, {}), prints[name]) if name in ref else ["(sin referencia)"]
+        print(f"{'✅' if not diffs else '❌'} {name}" + "".join(f"\n     {d}" for d in diffs))
+        bad += bool(diffs)
+    print(f"\n{'✅ Sin diferencias' if not bad else f'❌ {bad} casos con diferencias'} ({len(prints)} casos)")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
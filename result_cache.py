@@ -0,0 +1,92 @@
+"""
+Content-addressed result cache for experiment sweeps:
+- Key = sha256 over the full scenario (seed, P, K, N, M, speeds, R_CAM,
+  policy, ...) plus a hash of the simulator sources (code_version()), so
+  editing a protocol file invalidates every cached case automatically.
+- The sources are found by following the local imports of run_simulation.py
+  (simulator_sources()), so a new module is covered as soon as the
+  simulator imports it; there is no list to keep up to date.
+- One small JSON file per completed case under the cache folder; writes are
+  atomic (tmp + os.replace), so a sweep killed mid-write never leaves a
+  corrupt entry and simply resumes from the cases already stored.
+"""
+
+import ast
+import hashlib
+import json
+import os
+from typing import Iterable, List, Optional
+
+SIM_ENTRY = "run_simulation.py"     # punto de entrada de una corrida
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def simulator_sources(entry: str = SIM_ENTRY, root: str = _HERE) -> List[str]:
+    """Módulos locales alcanzables por import desde `entry` (incluido), ordenados por nombre."""
+    seen = set()
+    todo = [entry]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(root, name), "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=name)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                mods = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                mods = [node.module]
+            else:
+                continue
+            for mod in mods:
+                path = mod.split(".")[0] + ".py"
+                if os.path.exists(os.path.join(root, path)):
+                    todo.append(path)
+    return sorted(seen)
+
+
+def code_version(files: Optional[Iterable[str]] = None, root: str = _HERE) -> str:
+    """Hash (hex, 16 chars) del contenido de las fuentes del simulador (por defecto simulator_sources())."""
+    if files is None:
+        files = simulator_sources(root=root)
+    h = hashlib.sha256()
+    for name in files:
+        h.update(name.encode("utf-8") + b"\0")
+        path = os.path.join(root, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+        h.update(b"\0")
+    return h.hexdigest()[:16]
+
+
+def scenario_key(scenario: dict, version: str) -> str:
+    """Clave estable del escenario: mismo dict (sin importar el orden) + misma versión → misma clave."""
+    blob = json.dumps({"scenario": scenario, "code": version}, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+
+    def __init__(self, cache_dir: str) -> None:
+        self.dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)["row"]
+        except (OSError, ValueError, KeyError):
+            return None     # ausente o ilegible → se recalcula
+
+    def put(self, key: str, scenario: dict, row: dict) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"scenario": scenario, "row": row}, f, sort_keys=True, default=str)
+        os.replace(tmp, path)
@@ -0,0 +1,80 @@
+"""
+Leader patrol routes for any number of leaders (config.EQC_ROUTE_LAYOUT):
+- "legacy": the four hand-made zig-zag routes of config.EQC_WAYPOINTS_BASE,
+  each one sweeping the whole L×L area (K <= 4, original).
+- "strips": the area is split into K vertical strips of equal width and
+  each leader sweeps only its own strip with a boustrophedon (lawn-mower)
+  path whose lanes run along y.
+- "cells": K equal cells on a rows × cols grid (rows·cols = K); of all the
+  factorisations, the one whose slowest cell finishes a pass first (a prime
+  K falls back to strips). Each cell is swept with lanes along its longer
+  side (fewer turns).
+- Lane spacing = diameter of the camera footprint on the ground,
+  2·sqrt(R_CAMERA² − h_eqc²)·(1 − overlap). A region gets the fewest lanes
+  that cover its width at that spacing, spread evenly, so one pass sees
+  every point of the region.
+- sweep_time(): seconds until the slowest leader finishes one pass, i.e.
+  the time to full coverage when the regions are disjoint.
+"""
+
+import math
+from typing import Dict, List, Sequence, Tuple
+
+Point = Tuple[float, float, float]
+
+ROUTE_LAYOUTS = ("legacy", "strips", "cells")
+
+
+def swath_spacing(r_camera: float, altitude: float, overlap: float = 0.0) -> float:
+    """Separación entre carriles: diámetro de la huella de la cámara en el suelo, menos el solape pedido."""
+    ground = math.sqrt(max(0.0, r_camera * r_camera - altitude * altitude))
+    if ground <= 0.0:
+        raise ValueError(f"la cámara no alcanza el suelo: R_CAMERA={r_camera} <= altura={altitude}")
+    return 2.0 * ground * (1.0 - overlap)
+
+
+def _lawnmower(x0: float, y0: float, x1: float, y1: float, spacing: float, z: float) -> List[Point]:
+    """Boustrophedon sobre [x0,x1]×[y0,y1] con carriles a lo largo del lado más largo."""
+    along_y = (y1 - y0) >= (x1 - x0)
+    lo, hi = (x0, x1) if along_y else (y0, y1)          # eje que se reparte entre carriles
+    a, b = (y0, y1) if along_y else (x0, x1)            # extremos de cada carril
+    n = max(1, math.ceil((hi - lo) / spacing - 1e-9))
+    step = (hi - lo) / n
+    pts: List[Point] = []
+    for i in range(n):
+        c = lo + (i + 0.5) * step
+        s, e = (a, b) if i % 2 == 0 else (b, a)
+        pts += [(c, s, z), (c, e, z)] if along_y else [(s, c, z), (e, c, z)]
+    return pts
+
+
+def generate_routes(k: int, L: float, spacing: float, z: float, layout: str = "strips") -> Dict[int, List[Point]]:
+    """Rutas (coordenadas del simulador) para k líderes sobre [0,L]², una región disjunta por líder."""
+    if layout not in ROUTE_LAYOUTS or layout == "legacy":
+        raise ValueError(f"layout generado desconocido: {layout!r} (opciones: strips, cells)")
+    if k < 1:
+        raise ValueError(f"hace falta al menos un líder (k={k})")
+    if layout == "strips":
+        return _grid_routes(1, k, L, spacing, z)
+    # cells: la rejilla filas × columnas = k con la pasada más corta (todas las celdas son iguales)
+    grids = [_grid_routes(r, k // r, L, spacing, z) for r in range(1, k + 1) if k % r == 0]
+    return min(grids, key=lambda routes: route_length(routes[0]))
+
+
+def _grid_routes(rows: int, cols: int, L: float, spacing: float, z: float) -> Dict[int, List[Point]]:
+    w, h = L / cols, L / rows
+    routes: Dict[int, List[Point]] = {}
+    for e in range(rows * cols):
+        r, c = divmod(e, cols)
+        routes[e] = _lawnmower(c * w, r * h, (c + 1) * w, (r + 1) * h, spacing, z)
+    return routes
+
+
+def route_length(waypoints: Sequence[Sequence[float]]) -> float:
+    """Longitud de una pasada (sin el regreso al primer waypoint del bucle)."""
+    return sum(math.dist(a, b) for a, b in zip(waypoints, waypoints[1:]))
+
+
+def sweep_time(routes: Dict[int, Sequence[Sequence[float]]], speed: float) -> float:
+    """Segundos hasta que el líder más lento termina una pasada de su ruta."""
+    return max((route_length(wps) for wps in routes.values()), default=0.0) / speed
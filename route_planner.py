@@ -0,0 +1,205 @@
+"""
+Visit-order planning for a follower's next2visit list:
+- "fifo": the original order (new PoIs of the ASSIGN first, then the old ones).
+- "insertion": incremental cheapest insertion. The stops already in the route
+  keep their relative order and each new stop goes where it adds the least
+  cost; with an empty route it builds the tour from the follower's position.
+- "nn_2opt": nearest-neighbour tour from the follower's position when the
+  route is empty, otherwise the insertion result as seed; then 2-opt on the
+  open path (no return to the start) until no move improves.
+- Cost = path length from the current position. With urgency_weight w > 0 it
+  becomes length + w · Σ urgency_i · (distance travelled until stop i), which
+  pulls urgent stops forward; w = 0 minimises the tour length only.
+- Stops are the (coord3d, urgency) tuples used by VQCProtocol; extra trailing
+  fields (FollowerRouteModel adds the PoI label) travel with the stop, so
+  identical coordinates never get mixed up. The selection of which stops are
+  kept (capacity M) is the caller's, only the order changes.
+- FollowerRouteModel: the leader's estimate of one follower's committed route
+  (PoIs it assigned and not yet served, ordered with the same planner), the
+  position dead-reckoned along that route since the last HELLO, and the
+  estimated time at which a new PoI would be reached (eta) — used by the
+  assignment policies with config.ASSIGN_SCORING = "eta".
+"""
+
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+Point = Tuple[float, float, float]
+Stop = Tuple[Point, int]          # (coord3d, urgency, ...), como en VQCProtocol.next2visit
+
+ROUTE_PLANNERS = ("fifo", "insertion", "nn_2opt")
+
+
+def route_cost(start: Point, stops: Sequence[Stop], urgency_weight: float = 0.0) -> float:
+    """Longitud del camino abierto start → stops[0] → …, más w · Σ urg·distancia hasta la parada si w > 0."""
+    cost = 0.0
+    travelled = 0.0
+    prev = start
+    for stop in stops:
+        coord = stop[0]
+        travelled += math.dist(prev, coord)
+        if urgency_weight:
+            cost += urgency_weight * stop[1] * travelled
+        prev = coord
+    return cost + travelled
+
+
+def _cheapest_insert(start: Point, route: List[Stop], stop: Stop, urgency_weight: float) -> None:
+    """Inserta `stop` en la posición de menor coste (in place)."""
+    best_k, best_cost = len(route), math.inf
+    for k in range(len(route) + 1):
+        if urgency_weight:
+            cost = route_cost(start, route[:k] + [stop] + route[k:], urgency_weight)
+        else:
+            # Solo cambia el coste local: prev → stop → next en lugar de prev → next
+            prev = start if k == 0 else route[k - 1][0]
+            add = math.dist(prev, stop[0])
+            if k < len(route):
+                add += math.dist(stop[0], route[k][0]) - math.dist(prev, route[k][0])
+            cost = add
+        if cost < best_cost:
+            best_k, best_cost = k, cost
+    route.insert(best_k, stop)
+
+
+def _nearest_neighbour(start: Point, stops: Sequence[Stop]) -> List[Stop]:
+    left = list(stops)
+    route: List[Stop] = []
+    prev = start
+    while left:
+        k = min(range(len(left)), key=lambda i: math.dist(prev, left[i][0]))
+        prev = left[k][0]
+        route.append(left.pop(k))
+    return route
+
+
+def _two_opt(start: Point, route: List[Stop], urgency_weight: float) -> List[Stop]:
+    """2-opt sobre el camino abierto: invierte route[i..j] mientras alguna inversión mejore."""
+    n = len(route)
+    improved = True
+    best = route_cost(start, route, urgency_weight) if urgency_weight else None
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                if urgency_weight:
+                    cand = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                    cost = route_cost(start, cand, urgency_weight)
+                    if cost < best - 1e-9:
+                        route, best, improved = cand, cost, True
+                    continue
+                # Sin urgencia: delta O(1) (las aristas internas del tramo invertido no cambian)
+                prev = start if i == 0 else route[i - 1][0]
+                a, b = route[i][0], route[j][0]
+                delta = math.dist(prev, b) - math.dist(prev, a)
+                if j + 1 < n:
+                    nxt = route[j + 1][0]
+                    delta += math.dist(a, nxt) - math.dist(b, nxt)
+                if delta < -1e-9:
+                    route[i:j + 1] = route[i:j + 1][::-1]
+                    improved = True
+    return route
+
+
+def plan_route(start: Point, kept: Sequence[Stop], new: Sequence[Stop],
+               method: str = "fifo", urgency_weight: float = 0.0) -> List[Stop]:
+    """
+    Orden de visita para las paradas `kept` (ruta vigente, en su orden) más las `new` de un ASSIGN,
+    partiendo de `start` (posición actual del VQC).
+    """
+    if method == "fifo":
+        return list(new) + list(kept)
+    if method not in ROUTE_PLANNERS:
+        raise ValueError(f"planificador desconocido: {method!r} (opciones: {', '.join(ROUTE_PLANNERS)})")
+    if method == "nn_2opt" and not kept:
+        route = _nearest_neighbour(start, new)
+    else:
+        route = list(kept)
+        for stop in new:
+            _cheapest_insert(start, route, stop, urgency_weight)
+    if method == "nn_2opt":
+        route = _two_opt(start, route, urgency_weight)
+    return route
+
+
+class FollowerRouteModel:
+
+    def __init__(self, speed: float, planner: str = "fifo", urgency_weight: float = 0.0) -> None:
+        self.speed = float(speed)
+        self.planner = planner
+        self.urgency_weight = urgency_weight
+        self.pos: Optional[Point] = None    # posición del último HELLO
+        self.t = 0.0                        # instante del último HELLO
+        self.route: List[Stop] = []         # paradas comprometidas (coord, urgency, label), en el orden que usará el VQC
+        self._pred = None                   # (now, pos, i0) del último predict()
+
+    def hello(self, pos: Sequence[float], t: float, outstanding: int) -> None:
+        """HELLO: nueva posición y nº de paradas que el VQC aún tiene (M − huecos)."""
+        self.pos = tuple(pos)
+        self.t = t
+        # Las paradas de más son las primeras de la ruta (ya visitadas o descartadas por el VQC)
+        extra = len(self.route) - max(0, outstanding)
+        if extra > 0:
+            del self.route[:extra]
+        self._pred = None
+
+    def assign(self, pois: Iterable[dict], now: float) -> None:
+        """PoIs asignados en `now` (dicts con label/coord/urgency): se ordenan como lo hará el VQC. Idempotente por label."""
+        known = {s[2] for s in self.route}
+        new = [p for p in pois if p["label"] not in known]
+        if not new:
+            return
+        start, _ = self.predict(now)
+        stops = [((p["coord"][0], p["coord"][1], 0.0), p["urgency"], p["label"]) for p in new]
+        self.route = plan_route(start, self.route, stops, self.planner, self.urgency_weight)
+        self._pred = None
+
+    def drop(self, labels) -> None:
+        """Quita las paradas ya servidas (DELIVER) o colectadas por otro (lock global)."""
+        keep = [s for s in self.route if s[2] not in labels]
+        if len(keep) != len(self.route):
+            self.route = keep
+            self._pred = None
+
+    def predict(self, now: float) -> Tuple[Point, int]:
+        """Posición estimada en `now` avanzando por la ruta desde el último HELLO, e índice de la próxima parada."""
+        if self._pred is not None and self._pred[0] == now:
+            return self._pred[1], self._pred[2]
+        cur = self.pos if self.pos is not None else (0.0, 0.0, 0.0)
+        budget = max(0.0, now - self.t) * self.speed
+        i0 = 0
+        for stop in self.route:
+            coord = stop[0]
+            d = math.dist(cur, coord)
+            if budget < d:
+                f = budget / d
+                cur = tuple(c + (e - c) * f for c, e in zip(cur, coord))
+                break
+            budget -= d
+            cur = coord
+            i0 += 1
+        self._pred = (now, cur, i0)
+        return cur, i0
+
+    def eta(self, coord: Sequence[float], now: float) -> float:
+        """Segundos estimados hasta que el VQC llegue a `coord` si se le asigna ahora."""
+        pos, i0 = self.predict(now)
+        c = (coord[0], coord[1], 0.0)
+        if self.planner == "fifo":
+            return math.dist(pos, c) / self.speed      # fifo: lo nuevo va primero
+        # insertion / nn_2opt: llegada en la posición de inserción más barata de la ruta restante
+        rest = self.route[i0:]
+        best_add, best_arrival = math.inf, 0.0
+        prev, travelled = pos, 0.0
+        for k in range(len(rest) + 1):
+            d_in = math.dist(prev, c)
+            add = d_in
+            if k < len(rest):
+                nxt = rest[k][0]
+                add += math.dist(c, nxt) - math.dist(prev, nxt)
+            if add < best_add:
+                best_add, best_arrival = add, travelled + d_in
+            if k < len(rest):
+                travelled += math.dist(prev, rest[k][0])
+                prev = rest[k][0]
+        return best_arrival / self.speed
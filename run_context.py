@@ -0,0 +1,90 @@
+"""
+Per-run simulation context:
+- Holds all state that belongs to a single run (global metrics, global
+  collection lock, VQC → leader mapping, PoI tables, index and field,
+  leader trajectory tables, detection schedules, message codec,
+  per-type message/byte counters, the per-PoI lifecycle table, the
+  cross-leader claim registry and the optional callback timing).
+- run_simulation.run_scenario() builds a fresh RunContext and activates it
+  before creating any node; the protocols take it in initialize() through
+  run_context.current(). Nothing per-run is left in module globals, so many
+  runs can execute back to back in one process without leaking state.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from quantiles import make_stats
+
+
+def new_metrics(latency_stats: str = "exact") -> dict:
+    """Acumuladores globales de una corrida (los que EQC.finish() va combinando/sumando)."""
+    return {
+        "unique_ids": set(),
+        "redundant": 0,
+        "global_score": 0,
+        "lat_service_all": make_stats(latency_stats),
+        "lat_contact_all": make_stats(latency_stats),
+        "lat_e2e_all": make_stats(latency_stats),
+        "t_detect_all": make_stats(latency_stats),
+        "cam_raw_all": 0,
+        "cam_hits_all": 0,
+        "eqc_reports": [],
+        "eqc_finished": 0,
+        "vqc_visit_dist": 0.0,    # suma de VQC.visit_dist (distancia volada en modo visiting)
+        "reassociations": 0,      # cambios de líder de los VQC (config.REASSOC_MODE = "load")
+    }
+
+
+@dataclass
+class RunContext:
+    pois: List[dict]
+    poi_index: Any                          # poi_index.POIGridIndex
+    poi_field: Optional[Any] = None         # poi_field.POIField (solo con --virtual_pois)
+    trajectories: Dict[int, Any] = field(default_factory=dict)   # líder → trajectory.LeaderTrajectory
+    detection_schedules: Dict[int, Any] = field(default_factory=dict)   # líder → DetectionSchedule (--detection schedule*)
+    codec: Optional[Any] = None             # message_codec.JsonCodec / CompactCodec (--codec)
+    msg_stats: Dict[str, List[int]] = field(default_factory=dict)   # tipo → [mensajes, bytes]
+    perf: Dict[str, float] = field(default_factory=dict)            # tiempos de setup/bucle, eventos
+    instr: Optional[Any] = None             # instrumentation.Instrumentation (solo con --instrument)
+    poi_table: Optional[Any] = None         # poi_table.POITable (ciclo de vida por PoI)
+    claims: Optional[Any] = None            # claim_registry.ClaimRegistry (solo con --claims registry)
+    num_eqcs: int = 1
+    metrics: dict = field(default_factory=new_metrics)
+    collected_labels: Set[str] = field(default_factory=set)
+    leader_of: Dict[int, int] = field(default_factory=dict)
+    poi_label2node: Dict[str, int] = field(default_factory=dict)
+    poi_id2node: Dict[str, int] = field(default_factory=dict)
+    poi_label2coord: Dict[str, tuple] = field(default_factory=dict)
+    poi_id2label: Dict[str, str] = field(default_factory=dict)
+    poi_by_label: Dict[str, dict] = field(default_factory=dict)   # label → PoI (de pois)
+    poi_by_id: Dict[str, dict] = field(default_factory=dict)      # id → PoI (de pois)
+
+    def __post_init__(self) -> None:
+        self.poi_by_label = {p["label"]: p for p in self.pois}
+        self.poi_by_id = {p["id"]: p for p in self.pois}
+
+    def count_message(self, mtype: str, nbytes: int) -> None:
+        st = self.msg_stats.setdefault(mtype, [0, 0])
+        st[0] += 1
+        st[1] += nbytes
+
+
+_CURRENT: Optional[RunContext] = None
+
+
+def activate(ctx: RunContext) -> RunContext:
+    global _CURRENT
+    _CURRENT = ctx
+    return ctx
+
+
+def deactivate() -> None:
+    global _CURRENT
+    _CURRENT = None
+
+
+def current() -> RunContext:
+    if _CURRENT is None:
+        raise RuntimeError("No hay RunContext activo: crea los nodos desde run_simulation.run_scenario()")
+    return _CURRENT
@@ -17,6 +17,11 @@ import os
 # === [NEW] plotting & data ===
 # === [NEW] Matplotlib backend para headless ===
 import math 
+import time
+import json
+import cProfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 import matplotlib
 matplotlib.use("Agg")
 
@@ -30,59 +35,240 @@ from gradysim.simulator.simulation import SimulationBuilder, SimulationConfigura
 from gradysim.simulator.handler.visualization import VisualizationHandler, VisualizationConfiguration
 
 from poi_protocol import POIProtocol
-from eqc_protocol import EQCProtocol
-from vqc_protocol import VQCProtocol
+from eqc_protocol import EQCProtocol, SCHEDULER_MODES, SCORING_MODES
+from vqc_protocol import VQCProtocol, HELLO_MODES, DELIVER_MODES, REASSOC_MODES
+from poi_index import POIGridIndex
+from poi_field import POIField
+from trajectory import INTERCEPT_SOLVERS, build_trajectories
+from route_planner import ROUTE_PLANNERS
+from claim_registry import CLAIM_MODES, ClaimRegistry
+from route_generator import ROUTE_LAYOUTS, generate_routes, swath_spacing, sweep_time
+from detection_schedule import DETECTION_MODES, build_schedules
+from message_codec import CODECS, make_codec
+from instrumentation import Instrumentation
+from poi_table import POITable
+from profiling import profile_path
 from config import EQC_INIT_POS
 import config
+import run_context
+from run_context import RunContext, new_metrics
+from quantiles import LATENCY_STATS_MODES
+
+@dataclass
+class ScenarioParams:
+    """Parámetros de una corrida. Mismos nombres que los flags de la CLI (ScenarioParams(**vars(args)))."""
+    seed: int
+    num_pois: int
+    num_vqcs: int
+    buffer_size: int
+    camera_reach: float
+    eqc_speed: Optional[float] = None
+    vqc_speed: Optional[float] = None
+    policy: str = "greedy"
+    num_eqcs: Optional[int] = None
+    save_figs: bool = False
+    figdir: str = "figs"
+    fig_prefix: str = "traj"
+    no_rt: bool = True
+    debug: bool = False
+    no_vis: bool = True
+    virtual_pois: bool = False
+    intercept: str = "fixed_point"
+    detection: str = "camera"
+    per_poi_assign: bool = False
+    codec: str = "compact"
+    duration: Optional[float] = None   # horizonte (s); None → config.DURATION_BASE
+    instrument: bool = False   # True → tiempos por callback (instrumentation.py)
+    latency_stats: str = "exact"   # exact | sketch (quantiles.py)
+    scheduler: str = "tick"    # tick (poll 1 s / 0.5 s) | event (timers solo ante cambios)
+    hello: str = "periodic"    # periodic (HELLO cada 1 s) | adaptive (solo ante cambios + keep-alive)
+    hello_keepalive: float = 5.0   # (adaptive) s máximos sin HELLO confirmado
+    deliver: str = "separate"  # separate (DELIVER tras HELLO_ACK) | piggyback (reporte dentro del HELLO)
+    route: str = "fifo"        # orden de next2visit: fifo | insertion | nn_2opt (route_planner.py)
+    route_urgency_weight: float = 0.0
+    assign_scoring: str = "distance"   # score del EQC: distance (último HELLO) | eta (ruta estimada del VQC)
+    claims: str = "off"        # off | registry (claims de PoIs entre líderes, claim_registry.py)
+    claim_lease: float = 300.0 # (registry) s que dura el claim de un ASSIGN
+    reassoc: str = "static"    # static (LEADER_OF = i % K) | load (re-asociación por backlog, vqc_protocol)
+    reassoc_hysteresis: float = 3.0   # (load) ganancia mínima en pending por follower para cambiar de líder
+    eqc_routes: str = "legacy" # rutas de los líderes: legacy (4 manuales) | strips | cells (route_generator.py)
+    profile: bool = False      # True → cProfile de la corrida en <fig_prefix>.prof (profiling.py)
+    quiet: bool = False        # True → solo log a fichero (sin StreamHandler), útil en barridos in-process
+
+
+@dataclass
+class RunResult:
+    """Métricas de una corrida: todo lo que emit_run_summary imprime y la línea RESULT."""
+    seed: int
+    K: int
+    rho: float
+    num_pois: int
+    num_vqcs: int
+    M: int
+    policy: str
+    speed: float
+    R_CAMERA: float
+    area_L: float
+    assigns_sent: int
+    assign_success: int
+    assign_rate: float
+    redundant_delivers: int
+    redundancy_rate: float
+    coverage: int
+    coverage_rate: float
+    global_score: float
+    cam_raw: int
+    cam_matches: int
+    avg_latency: float
+    p95_latency: float
+    ack_delay_mean: float
+    ack_delay_p95: float
+    e2e_mean: float
+    e2e_p95: float
+    t_detect_mean: float
+    t_detect_p95: float
+    assign_msgs: int = 0
+    msg_bytes: int = 0
+    msgs_total: int = 0
+    hello_msgs: int = 0
+    visit_dist: float = 0.0     # distancia volada por los VQC en modo visiting (suma)
+    dup_assigns: int = 0        # ASSIGNs de PoIs ya asignados antes (trabajo duplicado entre líderes)
+    claim_skips: int = 0        # (--claims registry) PoIs que un líder dejó por claim de otro (líder, PoI)
+    reassoc: int = 0            # (--reassoc load) cambios de líder de los VQC
+    # Percentiles extra (mismo acumulador que los p95)
+    p50_latency: float = float('nan')
+    p99_latency: float = float('nan')
+    max_latency: float = float('nan')
+    ack_delay_p50: float = float('nan')
+    ack_delay_p99: float = float('nan')
+    ack_delay_max: float = float('nan')
+    e2e_p50: float = float('nan')
+    e2e_p99: float = float('nan')
+    e2e_max: float = float('nan')
+    msg_stats: Dict[str, List[int]] = field(default_factory=dict)   # tipo → [mensajes, bytes]
+    # Rendimiento del simulador (wall-clock de este proceso)
+    setup_s: float = 0.0        # desde run_scenario() hasta arrancar el bucle de eventos
+    sim_wall_s: float = 0.0     # bucle de eventos
+    sim_events: int = 0         # eventos procesados por gradysim
+    sim_time: float = 0.0       # segundos simulados alcanzados
+    instrumentation: List[dict] = field(default_factory=list)   # filas de Instrumentation.rows() (--instrument)
+    eqc_reports: List[dict] = field(default_factory=list)
+    log_path: str = ""
+    summary_path: str = ""
+    profile_path: str = ""
+    poi_table_path: str = ""
+
+    def result_line(self) -> str:
+        """Línea plana para parsers (experiments.py)."""
+        return (
+            f"RESULT seed={self.seed} "
+            f"K={self.K} rho={self.rho:.2f} num_pois={self.num_pois} num_vqcs={self.num_vqcs} "
+            f"M={self.M} policy={self.policy} speed={self.speed:.3f} R_CAMERA={self.R_CAMERA:.1f} "
+            f"assigns_sent={self.assigns_sent} assign_success={self.assign_success} "
+            f"redundant_delivers={self.redundant_delivers} "
+            f"avg_latency={self.avg_latency:.4f}s p95_latency={self.p95_latency:.4f}s "
+            f"ack_delay_mean={self.ack_delay_mean:.4f}s ack_delay_p95={self.ack_delay_p95:.4f}s "
+            f"e2e_mean={self.e2e_mean:.4f}s e2e_p95={self.e2e_p95:.4f}s "
+            f"coverage={self.coverage}/{self.num_pois} coverage_rate={self.coverage_rate:.4f} "
+            f"global_score={self.global_score:.4f} "
+            f"cam_raw={self.cam_raw} cam_matches={self.cam_matches} "
+            f"assign_msgs={self.assign_msgs} msg_bytes={self.msg_bytes} "
+            f"p50_latency={self.p50_latency:.4f}s p99_latency={self.p99_latency:.4f}s max_latency={self.max_latency:.4f}s "
+            f"ack_delay_p50={self.ack_delay_p50:.4f}s ack_delay_p99={self.ack_delay_p99:.4f}s "
+            f"ack_delay_max={self.ack_delay_max:.4f}s "
+            f"e2e_p50={self.e2e_p50:.4f}s e2e_p99={self.e2e_p99:.4f}s e2e_max={self.e2e_max:.4f}s "
+            f"msgs_total={self.msgs_total} hello_msgs={self.hello_msgs} visit_dist={self.visit_dist:.1f} "
+            f"dup_assigns={self.dup_assigns} claim_skips={self.claim_skips} "
+            f"reassoc={self.reassoc}"
+        )
+
 
-def emit_run_summary(root, log_fname, args, leaders_used, mobility_speed):
-    import math
-    import config
+def collect_run_result(ctx: RunContext, params: ScenarioParams, leaders_used, mobility_speed) -> RunResult:
+    def _mean(v): return v.mean
+    def _p95(v): return v.quantile(0.95)
+    def _max(v): return v.max if len(v) else float('nan')
 
-    def _mean(v): return (sum(v)/len(v)) if v else float('nan')
-    def _p95(v):
-        if not v: return float('nan')
-        vs = sorted(v)
-        return vs[int(0.95 * (len(vs) - 1))]
+    m = ctx.metrics
 
     # Parámetros de la corrida
     K            = int(leaders_used or 0)
     NVQC         = int(getattr(config, "NUM_VQCS", 0))
-    M            = int(getattr(config, "M", 0))
-    policy       = getattr(config, "ASSIGNMENT_POLICY", "greedy")
-    speed        = float(mobility_speed)
-    rcam         = float(getattr(config, "R_CAMERA", 0.0))
-    seed         = int(getattr(args, "seed", -1))
-    area_L       = float(getattr(config, "L", 0.0))
-    num_pois     = len(getattr(config, "POIS", []))
+    num_pois     = len(ctx.pois)
 
     # Métricas globales
-    uniq         = len(config.METRICS.get("unique_ids", set()))
-    redundant    = int(config.METRICS.get("redundant", 0))
-    score        = float(config.METRICS.get("global_score", 0.0))
+    uniq         = len(m.get("unique_ids", set()))
+    redundant    = int(m.get("redundant", 0))
 
-    eqc_reports  = list(config.METRICS.get("eqc_reports", []))
+    eqc_reports  = list(m.get("eqc_reports", []))
     assigns_tot  = sum(int(r.get("assigns", 0)) for r in eqc_reports)
     success_tot  = sum(int(r.get("success", 0)) for r in eqc_reports)
-    success_rate = (success_tot/assigns_tot) if assigns_tot>0 else float('nan')
-
-    Ls_all   = list(config.METRICS.get("lat_service_all", []))
-    Lc_all   = list(config.METRICS.get("lat_contact_all", []))
-    Le2e_all = list(config.METRICS.get("lat_e2e_all", []))
-    Td_all   = list(config.METRICS.get("t_detect_all", []))
-
-    cam_raw_all  = int(config.METRICS.get("cam_raw_all", 0))
-    cam_hits_all = int(config.METRICS.get("cam_hits_all", 0))
+    msgs_tot     = sum(int(r.get("assign_msgs", 0)) for r in eqc_reports)
+
+    # quantiles.ExactStats / SketchStats ya combinados por EQC.finish()
+    Ls_all   = m["lat_service_all"]
+    Lc_all   = m["lat_contact_all"]
+    Le2e_all = m["lat_e2e_all"]
+    Td_all   = m["t_detect_all"]
+
+    return RunResult(
+        seed=int(params.seed),
+        K=K,
+        rho=NVQC / max(1, K),
+        num_pois=num_pois,
+        num_vqcs=NVQC,
+        M=int(getattr(config, "M", 0)),
+        policy=getattr(config, "ASSIGNMENT_POLICY", "greedy"),
+        speed=float(mobility_speed),
+        R_CAMERA=float(getattr(config, "R_CAMERA", 0.0)),
+        area_L=float(getattr(config, "L", 0.0)),
+        assigns_sent=assigns_tot,
+        assign_success=success_tot,
+        assign_rate=(success_tot/assigns_tot) if assigns_tot>0 else float('nan'),
+        redundant_delivers=redundant,
+        redundancy_rate=(redundant/max(uniq,1)) if uniq>0 else float('nan'),
+        coverage=uniq,
+        coverage_rate=(uniq/num_pois) if num_pois>0 else float('nan'),
+        global_score=float(m.get("global_score", 0.0)),
+        cam_raw=int(m.get("cam_raw_all", 0)),
+        cam_matches=int(m.get("cam_hits_all", 0)),
+        avg_latency=_mean(Ls_all),  p95_latency=_p95(Ls_all),
+        ack_delay_mean=_mean(Lc_all), ack_delay_p95=_p95(Lc_all),
+        e2e_mean=_mean(Le2e_all),   e2e_p95=_p95(Le2e_all),
+        t_detect_mean=_mean(Td_all), t_detect_p95=_p95(Td_all),
+        assign_msgs=msgs_tot,
+        msg_bytes=sum(b for _, b in ctx.msg_stats.values()),
+        msgs_total=sum(n for n, _ in ctx.msg_stats.values()),
+        hello_msgs=ctx.msg_stats.get("HELLO", [0, 0])[0],
+        visit_dist=float(m.get("vqc_visit_dist", 0.0)),
+        dup_assigns=ctx.poi_table.duplicate_assigns(),
+        claim_skips=ctx.claims.skips if ctx.claims is not None else 0,
+        reassoc=int(m.get("reassociations", 0)),
+        msg_stats={k: list(v) for k, v in sorted(ctx.msg_stats.items())},
+        p50_latency=Ls_all.quantile(0.50), p99_latency=Ls_all.quantile(0.99), max_latency=_max(Ls_all),
+        ack_delay_p50=Lc_all.quantile(0.50), ack_delay_p99=Lc_all.quantile(0.99), ack_delay_max=_max(Lc_all),
+        e2e_p50=Le2e_all.quantile(0.50), e2e_p99=Le2e_all.quantile(0.99), e2e_max=_max(Le2e_all),
+        setup_s=ctx.perf.get("setup_s", 0.0),
+        sim_wall_s=ctx.perf.get("sim_wall_s", 0.0),
+        sim_events=int(ctx.perf.get("sim_events", 0)),
+        sim_time=ctx.perf.get("sim_time", 0.0),
+        instrumentation=ctx.instr.rows(ctx.perf.get("sim_wall_s")) if ctx.instr is not None else [],
+        eqc_reports=eqc_reports,
+    )
 
-    # Derivadas útiles
-    coverage_rate   = (uniq/num_pois) if num_pois>0 else float('nan')
-    redundancy_rate = (redundant/max(uniq,1)) if uniq>0 else float('nan')
 
-    # Estadísticos globales con muestras crudas
-    Ls_mean,  Ls_p95  = _mean(Ls_all),  _p95(Ls_all)
-    Lc_mean,  Lc_p95  = _mean(Lc_all),  _p95(Lc_all)
-    Le_mean,  Le_p95  = _mean(Le2e_all), _p95(Le2e_all)
-    Td_mean,  Td_p95  = _mean(Td_all),  _p95(Td_all)
+def emit_run_summary(root, log_fname, res: RunResult) -> None:
+    # Alias locales (mismos nombres que usa la tabla)
+    K, NVQC, M, policy = res.K, res.num_vqcs, res.M, res.policy
+    speed, rcam, seed, area_L, num_pois = res.speed, res.R_CAMERA, res.seed, res.area_L, res.num_pois
+    uniq, redundant, score = res.coverage, res.redundant_delivers, res.global_score
+    eqc_reports = res.eqc_reports
+    assigns_tot, success_tot, success_rate = res.assigns_sent, res.assign_success, res.assign_rate
+    cam_raw_all, cam_hits_all = res.cam_raw, res.cam_matches
+    coverage_rate, redundancy_rate = res.coverage_rate, res.redundancy_rate
+    Ls_mean,  Ls_p95  = res.avg_latency, res.p95_latency
+    Lc_mean,  Lc_p95  = res.ack_delay_mean, res.ack_delay_p95
+    Le_mean,  Le_p95  = res.e2e_mean, res.e2e_p95
+    Td_mean,  Td_p95  = res.t_detect_mean, res.t_detect_p95
 
     # ===== TABLA (markdown) =====
     lines = []
@@ -102,6 +288,7 @@ def emit_run_summary(root, log_fname, args, leaders_used, mobility_speed):
     lines.append(f"| Área | {area_L}×{area_L} u |")
     lines.append(f"| PoIs totales | {num_pois} |")
     lines.append(f"| Assigns totales | {assigns_tot} |")
+    lines.append(f"| Mensajes ASSIGN | {res.assign_msgs} |")
     lines.append(f"| Successful delivers | {success_tot} |")
     lines.append(f"| Success rate | {success_rate:.2f} |")
     lines.append(f"| PoIs únicos (coverage) | {uniq} ({coverage_rate*100:.1f}%) |")
@@ -110,21 +297,60 @@ def emit_run_summary(root, log_fname, args, leaders_used, mobility_speed):
     lines.append(f"| Cámara detecciones (raw) | {cam_raw_all} |")
     lines.append(f"| Cámara match con PoIs | {cam_hits_all} |")
     lines.append(f"| Service latency μ / p95 (s) | {Ls_mean:.3f} / {Ls_p95:.3f} |")
+    lines.append(f"| Service latency p50 / p99 / máx (s) | {res.p50_latency:.3f} / {res.p99_latency:.3f} / {res.max_latency:.3f} |")
     lines.append(f"| Reporting–ACK delay μ / p95 (s) | {Lc_mean:.3f} / {Lc_p95:.3f} |")
+    lines.append(f"| Reporting–ACK delay p50 / p99 / máx (s) | {res.ack_delay_p50:.3f} / {res.ack_delay_p99:.3f} / {res.ack_delay_max:.3f} |")
     lines.append(f"| End-to-end μ / p95 (s) | {Le_mean:.3f} / {Le_p95:.3f} |")
+    lines.append(f"| End-to-end p50 / p99 / máx (s) | {res.e2e_p50:.3f} / {res.e2e_p99:.3f} / {res.e2e_max:.3f} |")
     lines.append(f"| Time-to-detect μ / p95 (s) | {Td_mean:.3f} / {Td_p95:.3f} |")
+    lines.append(f"| Beacon HELLO | {getattr(config, 'HELLO_MODE', 'periodic')}"
+                 + (f" (keep-alive {config.HELLO_KEEPALIVE:g} s)" if getattr(config, "HELLO_MODE", "periodic") == "adaptive" else "")
+                 + " |")
+    lines.append(f"| Entrega de hallazgos | {getattr(config, 'DELIVER_MODE', 'separate')} |")
+    lines.append(f"| Orden de visita / distancia en visitas (u) | {getattr(config, 'ROUTE_PLANNER', 'fifo')} / {res.visit_dist:.0f} |")
+    lines.append(f"| Score de asignación | {getattr(config, 'ASSIGN_SCORING', 'distance')} |")
+    lines.append(f"| Claims entre líderes / asignaciones duplicadas / PoIs saltados | {getattr(config, 'CLAIM_MODE', 'off')}"
+                 + (f" (lease {config.CLAIM_LEASE:g} s)" if getattr(config, "CLAIM_MODE", "off") == "registry" else "")
+                 + f" / {res.dup_assigns} / {res.claim_skips} |")
+    lines.append(f"| Re-asociación VQC → líder / cambios | {getattr(config, 'REASSOC_MODE', 'static')} / {res.reassoc} |")
+    lines.append(f"| Rutas de los líderes / una pasada (s) | {getattr(config, 'EQC_ROUTE_LAYOUT', 'legacy')} / "
+                 f"{sweep_time({k: config.EQC_WAYPOINTS[k] for k in range(res.K) if k in config.EQC_WAYPOINTS}, config.EQC_SPEED):.0f} |")
+    lines.append(f"| Mensajes totales / HELLO | {res.msgs_total} / {res.hello_msgs} |")
+    if res.sim_wall_s > 0:
+        lines.append(f"| Simulador: s simulados/s · eventos/s | {res.sim_time/res.sim_wall_s:.1f} · {res.sim_events/res.sim_wall_s:.0f} |")
 
     # ===== SUBTABLA: detalle por EQC =====
     lines.append("")
     lines.append("### 📦 Detalle por EQC (leader)")
     lines.append("")
-    lines.append("| EQC | Assigns | Success | Rate |")
-    lines.append("|---:|---:|---:|---:|")
+    lines.append("| EQC | Assigns | Msgs ASSIGN | Success | Rate |")
+    lines.append("|---:|---:|---:|---:|---:|")
     for rep in sorted(eqc_reports, key=lambda r: r.get("eqc_id", -1)):
         a = int(rep.get("assigns", 0))
         s = int(rep.get("success", 0))
         rate = (s/a) if a>0 else float('nan')
-        lines.append(f"| {rep.get('eqc_id','?')} | {a} | {s} | {rate:.2f} |")
+        lines.append(f"| {rep.get('eqc_id','?')} | {a} | {int(rep.get('assign_msgs', 0))} | {s} | {rate:.2f} |")
+
+    # ===== SUBTABLA: tráfico por tipo de mensaje =====
+    lines.append("")
+    lines.append(f"### 📨 Mensajes por tipo (codec {getattr(config, 'MESSAGE_CODEC', 'json')})")
+    lines.append("")
+    lines.append("| Tipo | Mensajes | Bytes | Bytes/msg |")
+    lines.append("|---|---:|---:|---:|")
+    for mtype, (n_msgs, n_bytes) in res.msg_stats.items():
+        lines.append(f"| {mtype} | {n_msgs} | {n_bytes} | {n_bytes/max(1, n_msgs):.1f} |")
+    lines.append(f"| **Total** | {res.msgs_total} | {res.msg_bytes} | |")
+
+    # ===== SUBTABLA: tiempos por callback (--instrument) =====
+    if res.instrumentation:
+        lines.append("")
+        lines.append(f"### ⏱️ Tiempo por callback (bucle de eventos: {res.sim_wall_s:.2f} s, tiempos inclusivos)")
+        lines.append("")
+        lines.append("| Rol | Callback | Llamadas | Total (s) | % bucle | μ (µs) | p50 (µs) | p99 (µs) | máx (µs) |")
+        lines.append("|---|---|---:|---:|---:|---:|---:|---:|---:|")
+        for r in res.instrumentation:
+            lines.append(f"| {r['role']} | {r['callback']} | {r['calls']} | {r['total_s']:.3f} | {r['pct_loop']:.1f} | "
+                         f"{r['mean_us']:.1f} | {r['p50_us']:.1f} | {r['p99_us']:.1f} | {r['max_us']:.1f} |")
 
     # ===== ANÁLISIS BREVE =====
     lines.append("")
@@ -141,6 +367,18 @@ def emit_run_summary(root, log_fname, args, leaders_used, mobility_speed):
     lines.append("## 📖 Glosario")
     lines.append("- **Assigns totales / Successful delivers**: asignaciones desde EQC / entregas recibidas por EQC.")
     lines.append("- **Success rate**: successful_delivers / assigns_totales.")
+    lines.append("- **Mensajes ASSIGN**: paquetes ASSIGN enviados (un paquete puede llevar varios PoIs).")
+    lines.append("- **Mensajes por tipo**: paquetes EQC↔VQC enviados y bytes del payload codificado.")
+    lines.append("- **Beacon HELLO**: periodic = HELLO cada 1 s; adaptive = solo ante cambios de huecos, "
+                 "descubrimientos por entregar, re-entrada en rango del líder o keep-alive.")
+    lines.append("- **Entrega de hallazgos**: separate = HELLO→HELLO_ACK→DELIVER→DELIVER_ACK; "
+                 "piggyback = el reporte viaja en el HELLO y se confirma en el HELLO_ACK.")
+    lines.append("- **Orden de visita**: planificador de next2visit (fifo = original); distancia = suma de lo volado por los VQC en modo visiting.")
+    lines.append("- **Score de asignación**: distance = urgencia / distancia desde el último HELLO; eta = urgencia / tiempo estimado de llegada con la ruta pendiente del VQC.")
+    lines.append("- **Claims entre líderes**: asignaciones duplicadas = ASSIGNs de un PoI ya asignado antes (por otro líder); saltados = pares (líder, PoI) descartados por claim vigente de otro líder.")
+    lines.append("- **Rutas de los líderes**: legacy = 4 zig-zags que barren todo el área; strips / cells = K regiones de igual área en boustrophedon. Una pasada = tiempo del líder más lento en recorrer su ruta una vez.")
+    lines.append("- **Re-asociación**: static = líder fijo i % K; load = un VQC ocioso cambia al líder con más pending por follower (con histéresis); cambios = total de cambios de líder.")
+    lines.append("- **Simulador**: segundos simulados y eventos de gradysim por segundo de reloj (bucle de eventos).")
     lines.append("- **PoIs únicos (coverage)**: PoIs distintos reportados (sin duplicados).")
     lines.append("- **Redundancias**: reportes de PoIs ya colectados previamente.")
     lines.append("- **Puntuación ponderada**: suma de pesos por urgencia de PoIs entregados (w₃≥w₂≥w₁).")
@@ -149,6 +387,10 @@ def emit_run_summary(root, log_fname, args, leaders_used, mobility_speed):
     lines.append("- **End-to-end**: `t_deliver_ack − t_spawn` (aprox. desde inicio de corrida).")
     lines.append("- **Time-to-detect**: `t_detect − t_spawn` (tiempo hasta que el EQC ve por 1ª vez el PoI).")
     lines.append("- **μ / p95**: media y percentil 95% de cada métrica.")
+    lines.append(f"- **p50 / p99 / máx**: percentiles 50/99 y máximo (acumulador `{getattr(config, 'LATENCY_STATS', 'exact')}`"
+                 + ("; error relativo <= 1%" if getattr(config, "LATENCY_STATS", "exact") == "sketch" else "") + ").")
+    if res.instrumentation:
+        lines.append("- **Tiempo por callback**: wall time de cada callback (incluye lo que llama; p50/p99 aprox. ±10%).")
 
     # Imprimir en log y guardar .summary.md
     block = "\n".join(lines)
@@ -158,36 +400,28 @@ def emit_run_summary(root, log_fname, args, leaders_used, mobility_speed):
     try:
         with open(summary_fname, "w", encoding="utf-8") as f:
             f.write(block + "\n")
+        res.summary_path = summary_fname
         root.info(f"📝 Summary written to: {summary_fname}")
     except Exception as e:
         root.warning(f"⚠️ Could not write summary file: {e}")
 
+    if res.instrumentation:
+        instr_fname = log_fname.replace(".txt", ".instrument.json")
+        try:
+            with open(instr_fname, "w", encoding="utf-8") as f:
+                json.dump(res.instrumentation, f, indent=2)
+            root.info(f"⏱️ Instrumentation written to: {instr_fname}")
+        except Exception as e:
+            root.warning(f"⚠️ Could not write instrumentation file: {e}")
+
     # ===== Línea plana para parsers (experiments.py) =====
     # Nota: "assign_success" = successful_delivers (suma global),
     #       "redundant_delivers" = redundant
-    try:
-        rho_val = NVQC / max(1, K)
-    except Exception:
-        rho_val = float('nan')
     # Línea corta para parsers antiguos (experiments.py)
     root.info(f"Assigns sent={assigns_tot}, successful delivers={success_tot} (rate={success_rate:.2f})")
     root.info(f"Global mission score = {score:.2f}")
     root.info(f"Cámara hizo {cam_raw_all} detecciones en total, {cam_hits_all} coincidencias")
-
-    result_line = (
-        f"RESULT seed={seed} "
-        f"K={K} rho={rho_val:.2f} num_pois={num_pois} num_vqcs={NVQC} "
-        f"M={M} policy={policy} speed={speed:.3f} R_CAMERA={rcam:.1f} "
-        f"assigns_sent={assigns_tot} assign_success={success_tot} "
-        f"redundant_delivers={redundant} "
-        f"avg_latency={Ls_mean:.4f}s p95_latency={Ls_p95:.4f}s "
-        f"ack_delay_mean={Lc_mean:.4f}s ack_delay_p95={Lc_p95:.4f}s "
-        f"e2e_mean={Le_mean:.4f}s e2e_p95={Le_p95:.4f}s "
-        f"coverage={uniq}/{num_pois} coverage_rate={coverage_rate:.4f} "
-        f"global_score={score:.4f} "
-        f"cam_raw={cam_raw_all} cam_matches={cam_hits_all}"
-    )
-    root.info(result_line)
+    root.info(res.result_line())
 
 
 def render_trajectory_figures(positions, poi_positions, L, K, rho, seed, prefix, leader_of):
@@ -270,98 +504,128 @@ def render_trajectory_figures(positions, poi_positions, L, K, rho, seed, prefix,
         plt.savefig(fname, dpi=200)
         plt.close(fig)
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Ejecuta simulaciones con parámetros variables")
-    # DESPUÉS (sin choices, acepta 6.0 y 60.0, etc.)
-    parser.add_argument('--num_pois',      type=int,   required=True, help='Cantidad de PoIs a usar')
-    parser.add_argument('--num_vqcs',      type=int,   required=True, help='Número de V-QCs')
-    parser.add_argument('--buffer_size',   type=int,   required=True, help='Tamaño máximo de buffer M')
-    parser.add_argument('--eqc_speed',  type=float, default=None,
-        help='Velocidad de los líderes (EQC) en m/s; si no se pasa, se usa config.EQC_SPEED_BASE')
-    parser.add_argument('--vqc_speed',  type=float, default=None,
-        help='Velocidad de los seguidores (VQC) en m/s; si no se pasa, se usa config.VQC_SPEED_BASE')
-
-
-    parser.add_argument('--camera_reach',  type=float, required=True, help='Alcance oblicuo de la cámara (R_CAMERA)')
+def apply_params(params: ScenarioParams) -> None:
+    """
+    Fija en config los parámetros de la corrida. Todo se recalcula desde los *_BASE,
+    de modo que una corrida anterior en el mismo proceso no deja overrides colgados.
+    """
+    config.NUM_VQCS   = params.num_vqcs
+    config.M          = params.buffer_size
+    config.R_CAMERA   = params.camera_reach * config.SCALE
+    # Overrides de velocidades por CLI (si vienen)
+    config.EQC_SPEED  = (params.eqc_speed if params.eqc_speed is not None else config.EQC_SPEED_BASE) * config.SCALE
+    config.VQC_SPEED  = (params.vqc_speed if params.vqc_speed is not None else config.VQC_SPEED_BASE) * config.SCALE
+    config.ASSIGNMENT_POLICY = params.policy
+    config.VIRTUAL_POIS = params.virtual_pois
+    config.INTERCEPT_SOLVER = params.intercept
+    config.DETECTION_MODE = params.detection
+    config.BATCH_ASSIGN_MESSAGES = not params.per_poi_assign
+    config.MESSAGE_CODEC = params.codec
+    config.LATENCY_STATS = params.latency_stats
+    config.SCHEDULER = params.scheduler
+    config.HELLO_MODE = params.hello
+    config.HELLO_KEEPALIVE = params.hello_keepalive
+    config.DELIVER_MODE = params.deliver
+    config.ROUTE_PLANNER = params.route
+    config.ROUTE_URGENCY_WEIGHT = params.route_urgency_weight
+    config.ASSIGN_SCORING = params.assign_scoring
+    config.CLAIM_MODE = params.claims
+    config.CLAIM_LEASE = params.claim_lease
+    config.REASSOC_MODE = params.reassoc
+    config.REASSOC_HYSTERESIS = params.reassoc_hysteresis
+    config.DURATION = params.duration if params.duration is not None else config.DURATION_BASE
+    # Rutas de los líderes: las 4 manuales o K generadas (sin tope de K)
+    config.EQC_ROUTE_LAYOUT = params.eqc_routes
+    if params.eqc_routes == "legacy":
+        config.EQC_WAYPOINTS = config._scale_wp_dict(config.EQC_WAYPOINTS_BASE)
+    else:
+        k = params.num_eqcs if params.num_eqcs is not None else len(config.EQC_WAYPOINTS_BASE)
+        spacing = swath_spacing(config.R_CAMERA, config.h_eqc, config.EQC_ROUTE_OVERLAP)
+        config.EQC_WAYPOINTS = generate_routes(max(1, k), config.L, spacing, config.h_eqc, params.eqc_routes)
 
-    
-    parser.add_argument('--seed',          type=int,required=True,help='Semilla para generar PoIs y posiciones iniciales')
-    parser.add_argument('--policy',        choices=['greedy','round_robin','load_balancing'], default='greedy', help='Política de asignación: greedy | round_robin | load_balancing')
-    parser.add_argument('--num_eqcs', type=int, default=None,
-        help='Nº de EQCs (líderes) a instanciar cuando USE_MANUAL_WAYPOINTS=True. '
-            'Si no se pasa, se usan todas las rutas definidas.')
-    parser.add_argument('--save_figs', action='store_true',
-        help='Si se activa, corre la simulación paso a paso y guarda trayectorias e imágenes.')
-    parser.add_argument('--figdir', type=str, default='figs',
-        help='Carpeta de salida para imágenes y CSV (por defecto: figs/).')
-    parser.add_argument('--fig_prefix', type=str, default='traj',
-        help='Prefijo base para los nombres de los PNGs (por defecto: "traj").')
 
-    # Control fino de tiempo real y debug:
-    parser.add_argument('--no_rt', action='store_true',
-        help='Fuerza real_time=False (útil para generar figuras rápido).')
-    parser.add_argument('--debug', action='store_true',
-        help='Activa debug=True en SimulationConfiguration.')
-    parser.add_argument('--no_vis', action='store_true',
-        help='No registra VisualizationHandler (más rápido para corridas masivas).')
+def run_scenario(params: ScenarioParams) -> RunResult:
+    """
+    Ejecuta UNA simulación en este proceso y devuelve sus métricas (RunResult).
+    Todo el estado de la corrida vive en un RunContext nuevo, así que se pueden
+    encadenar muchas corridas en el mismo proceso sin arrastrar estado.
+    """
+    t_start = time.perf_counter()
+    random.seed(params.seed)  
+    apply_params(params)
 
-    args = parser.parse_args()
-    random.seed(args.seed)  
-    config.POIS = config.get_pois(seed=args.seed, n=args.num_pois)
-    config.NUM_VQCS   = args.num_vqcs    
-    config.M          = args.buffer_size 
-    config.R_CAMERA   = args.camera_reach * config.SCALE   # antes: = args.camera_reach
-        # Overrides de velocidades por CLI (si vienen)
-    if args.eqc_speed is not None:
-        config.EQC_SPEED = args.eqc_speed * config.SCALE
-    if args.vqc_speed is not None:
-        config.VQC_SPEED = args.vqc_speed * config.SCALE
-
-    #mobility_speed    = args.speed * config.SCALE          # antes: = args.speed
+    #mobility_speed    = params.speed * config.SCALE          # antes: = params.speed
     # Default del mundo: hereda la velocidad efectiva de los EQC
     mobility_speed = float(config.EQC_SPEED)
 
-
-    config.ASSIGNMENT_POLICY = args.policy
-    # --- Reset de estado global para esta corrida (antes de crear ningún nodo) ---
-    config.METRICS = {
-        "unique_ids": set(),
-        "redundant": 0,
-        "global_score": 0,
-        # acumuladores globales que EQC.finish() va extendiendo/sumando
-        "lat_service_all": [],
-        "lat_contact_all": [],
-        "lat_e2e_all": [],
-        "t_detect_all": [],
-        "cam_raw_all": 0,
-        "cam_hits_all": 0,
-        "eqc_reports": [],
-        "eqc_finished": 0,
-    }
-    if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-        config.COLLECTED_LABELS = set()
-
+    # --- Estado de esta corrida (antes de crear ningún nodo) ---
+    pois = config.get_pois(seed=params.seed, n=params.num_pois)
+    index = POIGridIndex(pois, cell_size=config.POI_GRID_CELL)
+    ctx = RunContext(
+        pois=pois,
+        metrics=new_metrics(config.LATENCY_STATS),
+        poi_index=index,
+        poi_field=POIField(pois, index) if config.VIRTUAL_POIS else None,
+        trajectories=build_trajectories(config.EQC_WAYPOINTS, config.EQC_SPEED),
+        codec=make_codec(config.MESSAGE_CODEC, pois),
+        instr=Instrumentation() if params.instrument else None,
+        poi_table=POITable(pois),
+        claims=ClaimRegistry(config.CLAIM_LEASE) if config.CLAIM_MODE == "registry" else None,
+    )
+    ctx.perf["t_start"] = t_start
+    run_context.activate(ctx)
 
     # === LOGGING (usa fig_prefix como base del .txt y crea la carpeta si hace falta) ===
-    log_base = args.fig_prefix            # puede incluir subcarpetas
+    log_base = params.fig_prefix            # puede incluir subcarpetas
     log_dir = os.path.dirname(log_base)
     if log_dir:
         os.makedirs(log_dir, exist_ok=True)
     log_fname = f"{log_base}.txt"
 
     root = logging.getLogger()
-    root.setLevel(logging.DEBUG if args.debug else logging.INFO)
+    prev_level = root.level
+    root.setLevel(logging.DEBUG if params.debug else logging.INFO)
 
     fmt = logging.Formatter("%(asctime)s %(name)-12s %(levelname)-8s %(message)s")
-    ch = logging.StreamHandler(); ch.setFormatter(fmt); root.addHandler(ch)
+    handlers = []
+    if not params.quiet:
+        ch = logging.StreamHandler(); ch.setFormatter(fmt); handlers.append(ch)
     fh = logging.FileHandler(log_fname, mode="w", encoding="utf-8")
     fh.setFormatter(fmt)
-    root.addHandler(fh)
+    handlers.append(fh)
+    for h in handlers:
+        root.addHandler(h)
     root.info(f"✅ Logging to file: {log_fname}")
 
-
+    prof = cProfile.Profile() if params.profile else None
+    try:
+        if prof is not None:
+            prof.enable()
+        try:
+            res = _build_and_run(ctx, params, root, log_fname, mobility_speed)
+        finally:
+            if prof is not None:
+                prof.disable()
+                prof.dump_stats(profile_path(log_base))
+                root.info(f"📈 Profile written to: {profile_path(log_base)}")
+    finally:
+        # Los handlers y el contexto son de ESTA corrida: no deben sobrevivir a la siguiente
+        for h in handlers:
+            root.removeHandler(h)
+            h.close()
+        root.setLevel(prev_level)
+        if ctx.instr is not None:
+            ctx.instr.uninstall()
+        run_context.deactivate()
+    res.log_path = log_fname
+    if prof is not None:
+        res.profile_path = profile_path(log_base)
+    return res
+
+
+def _build_and_run(ctx: RunContext, params: ScenarioParams, root, log_fname, mobility_speed) -> RunResult:
     root.info(
-        f"✅ Simulation start — seed={args.seed}, num_pois={len(config.POIS)}, "
+        f"✅ Simulation start — seed={params.seed}, num_pois={len(ctx.pois)}, "
         f"duration={config.DURATION}s, VQCs={config.NUM_VQCS}, area={config.L}×{config.L}, "
         f"speed(default)={mobility_speed} m/s, "
         f"vEQC={config.EQC_SPEED} m/s, vVQC={config.VQC_SPEED} m/s, "
@@ -373,12 +637,12 @@ if __name__ == "__main__":
  #####################——— Construcción de la simulación ———
     # Si vamos a guardar figuras, conviene paso a paso y sin real_time para ir rápido
     real_time_flag = True
-    if args.save_figs or args.no_rt:
+    if params.save_figs or params.no_rt:
         real_time_flag = False
 
     sim_cfg = SimulationConfiguration(
         duration=config.DURATION,
-        debug=args.debug,              # << ahora toma el flag --debug
+        debug=params.debug,              # << ahora toma el flag --debug
         real_time=real_time_flag       # << respeta --save_figs / --no_rt
     )
     builder = SimulationBuilder(sim_cfg)
@@ -393,13 +657,26 @@ if __name__ == "__main__":
     if use_manual:
         all_routes = config.EQC_WAYPOINTS
         # Si no pasas --num_eqcs, usa todas las rutas definidas
-        E = args.num_eqcs if args.num_eqcs is not None else len(all_routes)
-        # Limita a [1, len(all_routes)] para evitar índices inválidos
+        E = params.num_eqcs if params.num_eqcs is not None else len(all_routes)
+        # Limita a [1, len(all_routes)] para evitar índices inválidos (con rutas generadas hay una por líder)
+        if E > len(all_routes):
+            root.warning(f"⚠️ --num_eqcs {E} > {len(all_routes)} rutas '{config.EQC_ROUTE_LAYOUT}': se usan "
+                         f"{len(all_routes)} líderes (usa --eqc_routes strips|cells para más)")
         E = max(1, min(E, len(all_routes)))
     else:
         # Si generas rutas dinámicas y no pasas --num_eqcs, por defecto 1 líder
-        E = args.num_eqcs if args.num_eqcs is not None else 1
+        E = params.num_eqcs if params.num_eqcs is not None else 1
         E = max(1, E)
+    ctx.num_eqcs = E
+
+    # --- Detección analítica: eventos de entrada en cámara precalculados por líder ---
+    if config.DETECTION_MODE != "camera":
+        ctx.detection_schedules = build_schedules(
+            config.EQC_WAYPOINTS, range(E), config.EQC_SPEED, ctx.pois, ctx.poi_index,
+            reach=config.R_CAMERA, horizon=config.DURATION, mode=config.DETECTION_MODE,
+        )
+        root.info(f"📅 Detection schedule ({config.DETECTION_MODE}): "
+                  f"{ {e: len(s) for e, s in ctx.detection_schedules.items()} } eventos por líder")
 
     # --- Añade SOLO esos E EQCs (¡no añadas un EQC suelto en EQC_INIT_POS!) ---
     for e in range(E):
@@ -410,13 +687,12 @@ if __name__ == "__main__":
 
 
     # --- Construye el mapeo VQC → líder (una sola vez) ---
-    config.LEADER_OF = {}
     offset = E  # los VQCs van después de los EQCs en el orden de creación
     for i in range(config.NUM_VQCS):
         vid_runtime = offset + i
         leader_id   = i % E                         # reparto uniforme (0..E-1, 0..E-1, …)
-        config.LEADER_OF[vid_runtime] = leader_id
-    root.info(f"👥 LEADER_OF: {config.LEADER_OF}")
+        ctx.leader_of[vid_runtime] = leader_id
+    root.info(f"👥 LEADER_OF: {ctx.leader_of}")
 
     for i in range(config.NUM_VQCS):
         # Asignación de líder ya hecha antes: leader_id = i % E (ver LEADER_OF)
@@ -436,25 +712,23 @@ if __name__ == "__main__":
         root.info(f"➕ VQC-{i} (ldr={leader_idx}) @ {spawn_pos}")
 
 
-    if not hasattr(config, "POI_LABEL2NODE"):   config.POI_LABEL2NODE = {}
-    if not hasattr(config, "POI_ID2NODE"):      config.POI_ID2NODE    = {}
-    if not hasattr(config, "POI_LABEL2COORD"):  config.POI_LABEL2COORD= {}
-    if not hasattr(config, "POI_ID2LABEL"):     config.POI_ID2LABEL   = {}
-
     poi_ids = []  # ya lo tienes
-    for poi in config.POIS:
-        pid = builder.add_node(POIProtocol, (poi["coord"][0], poi["coord"][1], 0.0))
-        poi_ids.append(pid)
+    for poi in ctx.pois:
+        label = poi["label"]   # p.ej. "POI-95"
+        if not config.VIRTUAL_POIS:
+            pid = builder.add_node(POIProtocol, (poi["coord"][0], poi["coord"][1], 0.0))
+            poi_ids.append(pid)
+            ctx.poi_label2node[label] = pid
+            ctx.poi_id2node[poi["id"]] = pid
 
         # Registra mapeos
-        label = poi["label"]   # p.ej. "POI-95"
-        pid_s = str(poi["id"]) # si tu 'id' es numérico, lo conservamos como str y como int
-        config.POI_LABEL2NODE[label] = pid
-        config.POI_ID2NODE[poi["id"]] = pid
-        config.POI_LABEL2COORD[label] = tuple(poi["coord"])
-        config.POI_ID2LABEL[poi["id"]] = label
+        ctx.poi_label2coord[label] = tuple(poi["coord"])
+        ctx.poi_id2label[poi["id"]] = label
 
-    root.info(f"➕ Added {len(config.POIS)} POIProtocol nodes")
+    if config.VIRTUAL_POIS:
+        root.info(f"🧩 {len(ctx.pois)} PoIs virtuales (sin nodos); nodos simulados={len(eqc_ids) + len(vqc_ids)}")
+    else:
+        root.info(f"➕ Added {len(ctx.pois)} POIProtocol nodes")
 
 
  # ——— Handler
@@ -465,7 +739,7 @@ if __name__ == "__main__":
 
     # Visualization solo si no lo desactivan y/o si realmente vamos a pintar
     # === Visualización con rangos alineados al escenario (0..L) y alturas ~40/60 u ===
-    if not args.no_vis:
+    if not params.no_vis:
         z_top = max(getattr(config, "h_eqc", 60.0), getattr(config, "h_vqc", 40.0)) + 500.0
         viz_cfg = VisualizationConfiguration(
             x_range=(0.0, float(config.L)),
@@ -478,13 +752,19 @@ if __name__ == "__main__":
 
     root.info("🔧 Handlers added")
  # ——— Ejecución ———
+    if ctx.instr is not None:
+        # Antes de build(): el dispatcher de plugins captura los métodos en initialize()
+        ctx.instr.install(ctx.codec)
+        root.info("⏱️ Instrumentation on")
     sim = builder.build()
     root.info("▶️ Starting simulation")
     # Crear carpeta de salida si vamos a guardar figuras
-    if args.save_figs:
-        os.makedirs(args.figdir, exist_ok=True)
+    if params.save_figs:
+        os.makedirs(params.figdir, exist_ok=True)
 
-    if not args.save_figs:
+    t_loop = time.perf_counter()
+    ctx.perf["setup_s"] = t_loop - ctx.perf.get("t_start", t_loop)
+    if not params.save_figs:
         # Camino original (rápido)
         sim.start_simulation()
         root.info("🏁 Simulation complete")
@@ -497,6 +777,8 @@ if __name__ == "__main__":
         for pid in poi_ids:
             px, py, pz = sim.get_node(pid).position
             poi_positions.append({"x": px, "y": py, "z": pz})
+        if config.VIRTUAL_POIS:
+            poi_positions = [{"x": p["coord"][0], "y": p["coord"][1], "z": 0.0} for p in ctx.pois]
 
         # Loop de simulación paso a paso
         step_count = 0
@@ -523,13 +805,128 @@ if __name__ == "__main__":
                 L=config.L,
                 K=len(eqc_ids),
                 rho=(len(vqc_ids) / max(1, len(eqc_ids))),
-                seed=args.seed,
-                prefix=os.path.join(args.figdir, args.fig_prefix),
-                leader_of=config.LEADER_OF
+                seed=params.seed,
+                prefix=os.path.join(params.figdir, params.fig_prefix),
+                leader_of=ctx.leader_of
             )
             root.info("🖼️ Figures written successfully.")
         except Exception as e:
             root.warning(f"⚠️ Could not render figures: {e}")
 
     root.info("🏁 Simulation complete")
-    emit_run_summary(root, log_fname, args, E, mobility_speed)
+    ctx.perf["sim_wall_s"] = time.perf_counter() - t_loop
+    ctx.perf["sim_events"] = getattr(sim, "_iteration", 0)          # eventos sacados del event loop
+    ctx.perf["sim_time"] = getattr(sim, "_current_timestamp", 0.0)
+    res = collect_run_result(ctx, params, E, mobility_speed)
+    emit_run_summary(root, log_fname, res)
+
+    # Tabla por PoI (poi_table.py) con las columnas de identificación del raw de REPRODUCIBILITY/
+    try:
+        res.poi_table_path = ctx.poi_table.save(log_fname.replace(".txt", ".poi.npz"), {
+            "seed": res.seed, "K": res.K, "rho": res.rho, "num_pois": res.num_pois, "num_vqcs": res.num_vqcs,
+            "M": res.M, "policy": res.policy, "R_CAM": params.camera_reach,
+            "eqc_speed": params.eqc_speed if params.eqc_speed is not None else config.EQC_SPEED_BASE,
+            "vqc_speed": params.vqc_speed if params.vqc_speed is not None else config.VQC_SPEED_BASE,
+        })
+        root.info(f"🗂️ PoI table written to: {res.poi_table_path}")
+    except Exception as e:
+        root.warning(f"⚠️ Could not write PoI table: {e}")
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta simulaciones con parámetros variables")
+    # DESPUÉS (sin choices, acepta 6.0 y 60.0, etc.)
+    parser.add_argument('--num_pois',      type=int,   required=True, help='Cantidad de PoIs a usar')
+    parser.add_argument('--num_vqcs',      type=int,   required=True, help='Número de V-QCs')
+    parser.add_argument('--buffer_size',   type=int,   required=True, help='Tamaño máximo de buffer M')
+    parser.add_argument('--eqc_speed',  type=float, default=None,
+        help='Velocidad de los líderes (EQC) en m/s; si no se pasa, se usa config.EQC_SPEED_BASE')
+    parser.add_argument('--vqc_speed',  type=float, default=None,
+        help='Velocidad de los seguidores (VQC) en m/s; si no se pasa, se usa config.VQC_SPEED_BASE')
+
+
+    parser.add_argument('--camera_reach',  type=float, required=True, help='Alcance oblicuo de la cámara (R_CAMERA)')
+
+    
+    parser.add_argument('--seed',          type=int,required=True,help='Semilla para generar PoIs y posiciones iniciales')
+    parser.add_argument('--policy',        choices=['greedy','round_robin','load_balancing','optimal'], default='greedy', help='Política de asignación: greedy | round_robin | load_balancing | optimal (lote Hungarian)')
+    parser.add_argument('--num_eqcs', type=int, default=None,
+        help='Nº de EQCs (líderes) a instanciar cuando USE_MANUAL_WAYPOINTS=True. '
+            'Si no se pasa, se usan todas las rutas definidas (4). Con --eqc_routes legacy el máximo es 4.')
+    parser.add_argument('--save_figs', action='store_true',
+        help='Si se activa, corre la simulación paso a paso y guarda trayectorias e imágenes.')
+    parser.add_argument('--figdir', type=str, default='figs',
+        help='Carpeta de salida para imágenes y CSV (por defecto: figs/).')
+    parser.add_argument('--fig_prefix', type=str, default='traj',
+        help='Prefijo base para los nombres de los PNGs (por defecto: "traj").')
+
+    # Control fino de tiempo real y debug:
+    parser.add_argument('--no_rt', action='store_true',
+        help='Fuerza real_time=False (útil para generar figuras rápido).')
+    parser.add_argument('--debug', action='store_true',
+        help='Activa debug=True en SimulationConfiguration.')
+    parser.add_argument('--no_vis', action='store_true',
+        help='No registra VisualizationHandler (más rápido para corridas masivas).')
+    parser.add_argument('--virtual_pois', action='store_true',
+        help='No crea un nodo POIProtocol por PoI: los PoIs viven en un campo virtual '
+             'que la cámara del EQC consulta por rango (nodos simulados: K+N en vez de P+K+N).')
+    parser.add_argument('--intercept', choices=INTERCEPT_SOLVERS, default='fixed_point',
+        help='Solver de intercepción de los VQC: fixed_point (5 refinamientos, original) '
+             'o closed_form (instante exacto, una cuadrática por tramo).')
+    parser.add_argument('--per_poi_assign', action='store_true',
+        help='load_balancing: un paquete ASSIGN por PoI (comportamiento original) en vez de uno por VQC y tick.')
+    parser.add_argument('--duration', type=float, default=None,
+        help='Horizonte de simulación en s (por defecto config.DURATION_BASE).')
+    parser.add_argument('--instrument', action='store_true',
+        help='Mide llamadas y wall time por callback (handle_timer/packet/telemetry, _viz_push, '
+             'assign_to_vqcs, take_picture) y rol; tabla en el .summary.md y .instrument.json.')
+    parser.add_argument('--latency_stats', choices=LATENCY_STATS_MODES, default='exact',
+        help='Acumulador de latencias: exact (todas las muestras, percentiles exactos del paper) o '
+             'sketch (streaming, memoria acotada, error relativo <= 1%% en p50/p95/p99).')
+    parser.add_argument('--profile', action='store_true',
+        help='Perfila la corrida con cProfile y guarda <fig_prefix>.prof junto al log '
+             '(agregable con profiling.py o experiments.py --profile).')
+    parser.add_argument('--codec', choices=CODECS, default='compact',
+        help='Codificación de los mensajes EQC↔VQC: compact (binario, índices de PoI) o json (legible, depuración).')
+    parser.add_argument('--detection', choices=DETECTION_MODES, default='camera',
+        help='Detección de PoIs del EQC: camera (take_picture() cada 1 s), schedule (eventos de entrada '
+             'precalculados, cuantizados a 1 s como la cámara) o schedule_exact (instante exacto de entrada).')
+    parser.add_argument('--scheduler', choices=SCHEDULER_MODES, default='tick',
+        help='Timers de los protocolos: tick (EQC asigna/detecta cada 1 s, VQC check_roam cada 0.5 s; original) '
+             'o event (asignación solo tras HELLO/DELIVER/detección nueva, check_roam al terminar misión). '
+             'Con --detection camera el EQC sigue muestreando la cámara cada 1 s.')
+    parser.add_argument('--hello', choices=HELLO_MODES, default='periodic',
+        help='Beacon HELLO de los VQC: periodic (cada 1 s, original) o adaptive (solo si cambian los huecos, '
+             'hay descubrimientos por entregar o el VQC re-entra en rango del líder; con keep-alive).')
+    parser.add_argument('--hello_keepalive', type=float, default=5.0,
+        help='(--hello adaptive) máximo de s sin HELLO confirmado mientras el líder está en rango.')
+    parser.add_argument('--route', choices=ROUTE_PLANNERS, default='fifo',
+        help='Orden de visita de next2visit tras cada ASSIGN: fifo (nuevos primero, original), insertion '
+             '(inserción más barata incremental) o nn_2opt (vecino más cercano / inserción + 2-opt).')
+    parser.add_argument('--route_urgency_weight', type=float, default=0.0,
+        help='(--route insertion|nn_2opt) peso w de la urgencia: coste = longitud + w·Σ urgencia·distancia hasta la parada.')
+    parser.add_argument('--assign_scoring', choices=SCORING_MODES, default='distance',
+        help='Score de las políticas greedy / load_balancing / optimal: distance (urgencia / distancia desde el último '
+             'HELLO, original) o eta (urgencia / tiempo estimado hasta que el VQC llegue, según su ruta comprometida).')
+    parser.add_argument('--claims', choices=CLAIM_MODES, default='off',
+        help='Coordinación entre líderes: off (cada EQC asigna su pending, original) o registry (un ASSIGN reserva '
+             'el PoI --claim_lease s y los demás líderes no lo asignan; los entregados salen de su pending).')
+    parser.add_argument('--claim_lease', type=float, default=300.0,
+        help='(--claims registry) duración en s del claim de un ASSIGN; al vencer otro líder puede reasignar el PoI.')
+    parser.add_argument('--reassoc', choices=REASSOC_MODES, default='static',
+        help='Asociación VQC → líder: static (i %% K fijo, original) o load (un VQC ocioso pasa al líder con más '
+             'backlog sin cubrir por follower, según la carga que los líderes envían en HELLO_ACK/ASSIGN, si la ganancia '
+             'supera --reassoc_hysteresis; ver REASSOC_* en config.py).')
+    parser.add_argument('--eqc_routes', choices=ROUTE_LAYOUTS, default='legacy',
+        help='Rutas de los líderes: legacy (las 4 de config.EQC_WAYPOINTS_BASE; --num_eqcs <= 4), strips (K franjas '
+             'verticales de igual ancho) o cells (K celdas en rejilla); en ambas cada líder barre su región en '
+             'boustrophedon con carriles separados por la huella de la cámara (route_generator.py).')
+    parser.add_argument('--reassoc_hysteresis', type=float, default=3.0,
+        help='(--reassoc load) ganancia mínima en PoIs sin cubrir por follower para cambiar de líder.')
+    parser.add_argument('--deliver', choices=DELIVER_MODES, default='separate',
+        help='Entrega de hallazgos: separate (HELLO→HELLO_ACK→DELIVER→DELIVER_ACK, original) o piggyback '
+             '(el HELLO lleva el buffer y el HELLO_ACK lo confirma; HELLO inmediato al descubrir si el líder está en rango).')
+
+    args = parser.parse_args()
+    run_scenario(ScenarioParams(**vars(args)))
@@ -0,0 +1,158 @@
+"""
+Precomputed leader trajectories:
+- One LeaderTrajectory per route in config.EQC_WAYPOINTS, built once per run
+  (run_simulation.run_scenario) and shared by all followers via RunContext.
+- Cumulative arc-length / time arrays + per-segment headings; position(t) is a
+  bisect lookup instead of recomputing every segment length on each call.
+- Linear interpolation at constant speed, as the original
+  VQCProtocol.predict_eqc_position. The route is periodic like the leader's
+  LoopMission.RESTART: a closing leg last → first waypoint is appended and
+  lookups use t mod total (t <= 0 → first waypoint). The original clamped
+  to the last waypoint, which only matched while DURATION <= one pass.
+- Intercept solvers: "fixed_point" (the original 5-step refinement, now on the
+  table) and "closed_form" (exact earliest interception, one quadratic per
+  segment, wrapping around the loop).
+"""
+
+import math
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+Point = Tuple[float, float, float]
+
+INTERCEPT_SOLVERS = ("fixed_point", "closed_form")
+INTERCEPT_MAX_LOOPS = 2     # vueltas de la ruta que closed_form examina antes de caer en fixed_point
+
+
+class LeaderTrajectory:
+
+    def __init__(self, waypoints: Sequence[Sequence[float]], speed: float) -> None:
+        if speed <= 0:
+            raise ValueError(f"speed debe ser > 0 (recibido {speed})")
+        self.waypoints: List[Point] = [tuple(float(c) for c in w) for w in waypoints]
+        if len(self.waypoints) > 1 and self.waypoints[-1] != self.waypoints[0]:
+            self.waypoints.append(self.waypoints[0])    # tramo de regreso del bucle (RESTART)
+        self.speed = float(speed)
+        self.lengths: List[float] = []      # longitud de cada tramo
+        self.durations: List[float] = []    # duración de cada tramo (mín. 1e-9, como el original)
+        self.t_start: List[float] = []      # instante de inicio de cada tramo
+        self.t_end: List[float] = []        # instante de fin de cada tramo (lista para bisect)
+        self.s_end: List[float] = []        # longitud de arco acumulada al final de cada tramo
+        self.headings: List[float] = []     # rumbo XY de cada tramo (rad)
+        self.velocities: List[Point] = []   # vector velocidad de cada tramo
+
+        elapsed = 0.0
+        arc = 0.0
+        for a, b in zip(self.waypoints, self.waypoints[1:]):
+            length = math.dist(a, b)
+            dur = max(1e-9, length / self.speed)
+            self.lengths.append(length)
+            self.durations.append(dur)
+            self.t_start.append(elapsed)
+            elapsed += dur
+            arc += length
+            self.t_end.append(elapsed)
+            self.s_end.append(arc)
+            self.headings.append(math.atan2(b[1] - a[1], b[0] - a[0]))
+            self.velocities.append(tuple((b[k] - a[k]) / dur for k in range(3)))
+        self.total = elapsed
+
+    def __len__(self) -> int:
+        return len(self.durations)
+
+    def _phase(self, t: float) -> float:
+        """t reducido a [0, total) (posición dentro de la vuelta actual)."""
+        return t % self.total if t >= self.total else t
+
+    def segment_at(self, t: float) -> int:
+        """Índice del tramo activo en t (primer tramo cuyo fin es >= t mod total), o -1 si t <= 0."""
+        if t <= 0 or not self.durations:
+            return -1
+        return min(bisect_left(self.t_end, self._phase(t)), len(self.durations) - 1)
+
+    def position(self, t: float) -> Point:
+        """Posición del líder en t (s desde el inicio de la simulación)."""
+        if t <= 0 or not self.durations:
+            return self.waypoints[0]
+        t = self._phase(t)
+        i = min(bisect_left(self.t_end, t), len(self.durations) - 1)
+        a, b = self.waypoints[i], self.waypoints[i + 1]
+        frac = (t - self.t_start[i]) / self.durations[i]
+        return (
+            a[0] + frac * (b[0] - a[0]),
+            a[1] + frac * (b[1] - a[1]),
+            a[2] + frac * (b[2] - a[2]),
+        )
+
+    def heading(self, t: float) -> float:
+        """Rumbo XY del tramo activo en t (t <= 0: el del primer tramo)."""
+        if not self.headings:
+            return 0.0
+        return self.headings[max(0, self.segment_at(t))]
+
+    # ---------- Intercepción ----------
+    def intercept_fixed_point(self, p: Sequence[float], v: float, now: float, iters: int = 5) -> Tuple[Point, float]:
+        """Refinamiento original: dt ← |p − L(now+dt)| / v, 1 + iters evaluaciones. Devuelve (punto, dt)."""
+        pred = self.position(now)
+        dt = math.dist(p, pred) / v
+        for _ in range(iters):
+            pred = self.position(now + dt)
+            dt = math.dist(p, pred) / v
+        return pred, dt
+
+    def intercept_closed_form(self, p: Sequence[float], v: float, now: float) -> Tuple[Point, float]:
+        """
+        Primer τ >= 0 con |p − L(now+τ)| = v·τ. En cada tramo L es lineal, así que
+        basta una cuadrática por tramo desde el activo, dando la vuelta a la ruta
+        (hasta INTERCEPT_MAX_LOOPS vueltas; si no, fixed_point).
+        """
+        n = len(self.durations)
+        if n == 0:
+            return self.waypoints[0], math.dist(p, self.waypoints[0]) / v
+        px, py, pz = p[0], p[1], p[2]
+        i = max(0, self.segment_at(now))
+        origin = now - self._phase(now) if now > 0 else 0.0     # inicio de la vuelta en curso
+        for _ in range(n * INTERCEPT_MAX_LOOPS + 1):
+            a = self.waypoints[i]
+            ux, uy, uz = self.velocities[i]
+            # L(now+τ) − p = w + u·τ
+            back = now - origin - self.t_start[i]
+            wx = a[0] + ux * back - px
+            wy = a[1] + uy * back - py
+            wz = a[2] + uz * back - pz
+            qa = ux * ux + uy * uy + uz * uz - v * v
+            qb = 2.0 * (wx * ux + wy * uy + wz * uz)
+            qc = wx * wx + wy * wy + wz * wz
+            lo = max(0.0, origin + self.t_start[i] - now)
+            hi = origin + self.t_end[i] - now
+            tau = _smallest_root_in(qa, qb, qc, lo, hi)
+            if tau is not None:
+                return self.position(now + tau), tau
+            i += 1
+            if i == n:
+                i, origin = 0, origin + self.total
+        # VQC más lento que el líder (o muy lejos): sin intercepción exacta en el horizonte
+        return self.intercept_fixed_point(p, v, now)
+
+
+def _smallest_root_in(a: float, b: float, c: float, lo: float, hi: float):
+    """Menor raíz de a·τ² + b·τ + c = 0 en [lo, hi], o None."""
+    if abs(a) < 1e-12:
+        if abs(b) < 1e-12:
+            return None
+        roots = [-c / b]
+    else:
+        disc = b * b - 4.0 * a * c
+        if disc < 0:
+            return None
+        sq = math.sqrt(disc)
+        roots = sorted(((-b - sq) / (2.0 * a), (-b + sq) / (2.0 * a)))
+    for r in roots:
+        if lo - 1e-9 <= r <= hi + 1e-9:
+            return max(r, lo)
+    return None
+
+
+def build_trajectories(routes: Dict[int, Sequence[Sequence[float]]], speed: float) -> Dict[int, LeaderTrajectory]:
+    """Una tabla por ruta de líder (mismas claves que config.EQC_WAYPOINTS)."""
+    return {k: LeaderTrajectory(wps, speed) for k, wps in routes.items()}
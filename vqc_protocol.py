@@ -3,6 +3,25 @@ Visiting Quadcopter (V-QC) protocol:
 - Initial random roaming.
 - Receives ASSIGN and visits PoIs.
 - Locally detects PoI IDs and delivers them back.
+- Roam checks (config.SCHEDULER): "tick" polls check_roam every 0.5 s
+  (original); "event" reacts to the mission becoming idle in telemetry —
+  end of a visiting mission → satellite mode at once, satellite intercept
+  reached → one check_roam 0.5 s later (same dwell as the polling).
+- HELLO beacon (config.HELLO_MODE): "periodic" sends a HELLO every second
+  (original); "adaptive" checks every second but only sends when free slots
+  changed since the last acknowledged HELLO, there are discoveries to
+  deliver, the follower re-enters the leader's range, or the keep-alive
+  (config.HELLO_KEEPALIVE) expired. Out of range nothing is sent.
+- Delivery (config.DELIVER_MODE): "separate" reports findings with
+  HELLO → HELLO_ACK → DELIVER → DELIVER_ACK (original); "piggyback" carries
+  the buffered discoveries inside the HELLO, the leader acknowledges them in
+  the HELLO_ACK, and a new discovery sends a HELLO at once when the leader
+  is in range instead of waiting for the next beacon.
+- Visit order (config.ROUTE_PLANNER, route_planner.py): after an ASSIGN merge
+  the kept stops are re-ordered from the current position ("fifo" keeps the
+  original new-first order). visit_dist sums the distance flown while visiting.
+- Leader re-association (config.REASSOC_MODE): "load" moves an idle follower
+  to a busier leader, judged from the "loads" its leaders sent it.
 """
 
 import json
@@ -17,26 +36,27 @@ from gradysim.protocol.plugin.random_mobility import RandomMobilityPlugin, Rando
 from gradysim.protocol.plugin.mission_mobility import MissionMobilityPlugin, MissionMobilityConfiguration, LoopMission
 
 import config
+import run_context
 from config import EQC_INIT_POS
-from scipy.spatial.distance import euclidean
+from message_codec import merge_loads
+from route_planner import plan_route
+
+HELLO_MODES = ("periodic", "adaptive")
+DELIVER_MODES = ("separate", "piggyback")
+REASSOC_MODES = ("static", "load")
 
 class VQCProtocol(IProtocol):
     def initialize(self) -> None:
         self.id = self.provider.get_id()
+        self.ctx = run_context.current()
         self.log = logging.getLogger(f"VQC-{self.id}")
 
         self.pos = (0.0, 0.0, config.h_vqc)
 
-        self.leader_id = getattr(config, "LEADER_OF", {}).get(self.id, 0)
+        self.leader_id = self.ctx.leader_of.get(self.id, 0)
         self.log.debug(f"Líder de VQC-{self.id}: EQC-{self.leader_id}")
         # >>> BEGIN PATCH: rank local de formación por líder
-        try:
-            followers = sorted([vid for vid, lid in getattr(config, "LEADER_OF", {}).items()
-                                if lid == self.leader_id])
-            self.formation_rank = followers.index(self.id) if self.id in followers else 0
-        except Exception:
-            # Fallback robusto si LEADER_OF no está completo; no rompe nada
-            self.formation_rank = 0
+        self._update_formation_rank()
         self.log.info(f"VQC-{self.id} → líder EQC-{self.leader_id} | rank local={self.formation_rank}")
         # >>> END PATCH
 
@@ -46,21 +66,39 @@ class VQCProtocol(IProtocol):
         #### [/LATENCY]
         self.xy3d_warns = 0          # cuántas veces XY<=R pero 3D>R
         self.xy3d_samples = []       # hasta N ejemplos de la discrepancia
-        self.discovered: List[Dict[str,str]] = []
-        self.visited: List[str] = []
+        self.discovered: Dict[str, Dict[str, str]] = {}   # id → {"id", "label"}, en orden de llegada
+        self.visited: Dict[str, None] = {}                 # ids ya confirmados (conjunto ordenado)
         # índice rápido coord->label para no recorrer todos los POIs cada vez
         # índice rápido (coord, urgency) -> label  para resolver etiquetas sin O(N)
         self.coordurg2label = {
             (p["coord"], p["urgency"]): p["label"]
-            for p in config.POIS
+            for p in self.ctx.pois
         }
         self.coordurg2id = {
             (p["coord"], p["urgency"]): p["id"]
-            for p in config.POIS
+            for p in self.ctx.pois
         }
 
         self.delivering = False
         self.state = "satellite"   
+        self.scheduler = config.SCHEDULER
+        self._roam_timer_armed = False   # (event) check_roam ya programado
+        # Beacon HELLO (config.HELLO_MODE)
+        self.hello_mode = config.HELLO_MODE
+        self._hello_sent_free = None     # huecos anunciados en el último HELLO enviado
+        self._hello_acked_free = None    # huecos del último HELLO confirmado (HELLO_ACK)
+        self._last_hello_ack = float("-inf")
+        self._leader_in_range = False
+        self.deliver_mode = config.DELIVER_MODE
+        # Re-asociación de líder (config.REASSOC_MODE)
+        self.reassoc_mode = config.REASSOC_MODE
+        self._next_reassoc_check = self.provider.current_time() + config.REASSOC_PERIOD
+        self._last_reassoc = self.provider.current_time()
+        self.reassociations = 0
+        self.leader_loads: Dict[int, list] = {}   # líder → última entrada "loads" recibida [líder, backlog, huecos, followers, t]
+        self._last_assign_rx = self.provider.current_time()   # último ASSIGN recibido (o cambio de líder)
+        self._explored = False      # ya fue a conocer a un líder sin datos (una vez por VQC)
+        self._share_loads = False   # hay que contarle al líder nuevo lo que sabemos de los demás
 
         # Siembra la posición real del líder (primer waypoint), en vez de EQC_INIT_POS
         try:
@@ -90,7 +128,8 @@ class VQCProtocol(IProtocol):
         self.log.info("Modo satélite iniciado")
         t0 = self.provider.current_time()
         self.provider.schedule_timer("hello", t0+1)
-        self.provider.schedule_timer("check_roam", t0+1)
+        if self.scheduler == "tick":
+            self.provider.schedule_timer("check_roam", t0+1)
         # === [LOG] Resumen inicial del VQC ===
         try:
             self.log.info(
@@ -105,6 +144,7 @@ class VQCProtocol(IProtocol):
         # Métricas de descubrimiento
         self.disc_casual   = 0   # fuera de misión
         self.disc_assigned = 0   # dentro de misión dirigida
+        self.visit_dist    = 0.0 # distancia recorrida en modo visiting (longitud real de las rutas)
         # Flags ejecución
         self._exec = {
             "handle_telemetry": False,
@@ -160,58 +200,101 @@ class VQCProtocol(IProtocol):
         except Exception as e:
             self.log.debug(f"[viz] VQC publish error: {e}")
 
+    def _update_formation_rank(self) -> None:
+        """Rank local en la V: posición del VQC entre los followers de su líder (ctx.leader_of), por id."""
+        try:
+            followers = sorted([vid for vid, lid in self.ctx.leader_of.items()
+                                if lid == self.leader_id])
+            self.formation_rank = followers.index(self.id) if self.id in followers else 0
+        except Exception:
+            # Fallback robusto si LEADER_OF no está completo; no rompe nada
+            self.formation_rank = 0
+
+    def _maybe_reassociate(self, now: float) -> None:
+        """
+        (load) Si el VQC está ocioso, pasa al líder cuyo backlog sin cubrir por follower (pending − huecos
+        de sus followers, según la última carga recibida) supera al del actual en REASSOC_HYSTERESIS, descontando
+        el viaje. Sin ganancia conocida, el último de la V de un líder con más followers que el reparto parejo,
+        que cubre su backlog sin él, va (una sola vez) a conocer al líder más cercano del que no sabe nada, tras
+        REASSOC_EXPLORE_IDLE s sin ASSIGN y si el viaje no cuesta más de REASSOC_HYSTERESIS PoIs: su carga
+        llega así al resto por los HELLO_ACK.
+        """
+        if self.state != "satellite" or self.next2visit or self.discovered:
+            return
+        if now - self._last_reassoc < config.REASSOC_DWELL:
+            return
+        mine = self.leader_loads.get(self.leader_id)
+        if mine is None or mine[3] <= 1:
+            return      # sin carga del líder actual aún, o somos su único follower
+        free = config.M - len(self.next2visit)
+
+        def need(entry, joining):
+            # backlog que los huecos de sus followers no cubren, por follower (contando a este VQC)
+            _, backlog, slots, followers, _ = entry
+            return max(0, backlog - slots) / max(1, followers + joining)
+
+        here = need(mine, 0)
+        fair = len(self.ctx.leader_of) / max(1, self.ctx.num_eqcs)     # followers por líder en reparto parejo
+        scout = (not self._explored and mine[3] > fair and self.formation_rank + 1 >= mine[3]
+                 and now - self._last_assign_rx >= config.REASSOC_EXPLORE_IDLE
+                 and mine[1] <= mine[2] - free)     # el resto de followers cubre el backlog sin nosotros
+        best, best_key = None, None
+        for lid in range(self.ctx.num_eqcs):
+            if lid == self.leader_id:
+                continue
+            dist = math.dist(self.pos, self.ctx.trajectories[lid].position(now))
+            entry = self.leader_loads.get(lid)
+            if entry is None:
+                # exploración: solo sin ganancia conocida y si el viaje no cuesta más que la histéresis
+                near = dist <= config.REASSOC_HYSTERESIS * config.REASSOC_DIST_PER_POI
+                key = (float("-inf"), -dist) if scout and near else None
+            else:
+                gain = need(entry, 1) - here - dist / config.REASSOC_DIST_PER_POI   # el viaje hasta el líder descuenta
+                key = (gain, -dist) if gain >= config.REASSOC_HYSTERESIS else None
+            if key is not None and (best_key is None or key > best_key):
+                best, best_key = lid, key
+        if best is None:
+            return
+        entry = self.leader_loads.get(best)
+        why = "explorando" if entry is None else f"backlog sin cubrir/follower {here:.1f} → {need(entry, 1):.1f}"
+        self._explored = self._explored or entry is None
+
+        self.log.info(f"🔀 VQC-{self.id}: EQC-{self.leader_id} → EQC-{best} ({why})")
+        self.ctx.leader_of[self.id] = best
+        self.leader_id = best
+        self._last_reassoc = now
+        self._last_assign_rx = now
+        self._share_loads = True
+        self.reassociations += 1
+        # El nuevo líder aún no nos conoce: primer HELLO en cuanto esté en rango
+        self._hello_sent_free = None
+        self._hello_acked_free = None
+        self._last_hello_ack = float("-inf")
+        self._leader_in_range = False
+        self.maintain_satellite_mode()
+
     def predict_eqc_position(self, t: float) -> Tuple[float, float, float]:
         """
         Predice la posición del EQC a t segundos desde el inicio de la simulación,
-        interpolando linealmente entre waypoints.
+        interpolando linealmente entre waypoints (tabla precomputada del líder, ver trajectory.py).
         """
-        waypoints = config.EQC_WAYPOINTS[self.leader_id]
-
-        v_eqc = config.EQC_SPEED
-
-        # calcular duración de cada tramo
-        durations = [max(1e-9, euclidean(a, b) / v_eqc)
-                    for a, b in zip(waypoints, waypoints[1:])]
-        
-
-        total = sum(durations)
-
-        if t <= 0:
-            return waypoints[0]
-        if t >= total:
-            return waypoints[-1]
-
-        elapsed = 0.0
-        for (a, b), dur in zip(zip(waypoints, waypoints[1:]), durations):
-            if elapsed + dur >= t:
-                frac = (t - elapsed) / dur
-                return (
-                    a[0] + frac * (b[0] - a[0]),
-                    a[1] + frac * (b[1] - a[1]),
-                    a[2] + frac * (b[2] - a[2]),
-                )
-            elapsed += dur
-
-        return waypoints[-1]
+        return self.ctx.trajectories[self.leader_id].position(t)
     # --- 2) Método auxiliar: calcular punto de intercepción predictiva ---
     def compute_intercept(self) -> Tuple[float, float, float]:
         """
-        Itera para encontrar Δt tal que el VQC llegue justo donde estará el EQC.
+        Busca Δt tal que el VQC llegue justo donde estará el EQC
+        (config.INTERCEPT_SOLVER: "fixed_point" = 5 refinamientos, "closed_form" = exacto).
         """
         now = self.provider.current_time()
         pos_vqc = self.pos                         # usa tu posición interna
         v_vqc = config.VQC_SPEED
+        traj = self.ctx.trajectories[self.leader_id]
 
-        # estimación inicial: EQC en t = now
-        pred = self.predict_eqc_position(now)
-        dt = euclidean(pos_vqc, pred) / v_vqc
-
-        # refinar con 5 iteraciones para converger
-        for _ in range(5):
-            T = now + dt
-            pred = self.predict_eqc_position(T)
-            dt = euclidean(pos_vqc, pred) / v_vqc
-
+        if config.INTERCEPT_SOLVER == "closed_form":
+            pred, _ = traj.intercept_closed_form(pos_vqc, v_vqc, now)
+        else:
+            # estimación inicial en t = now y 5 iteraciones para converger
+            pred, _ = traj.intercept_fixed_point(pos_vqc, v_vqc, now, iters=5)
 
         angle   = math.radians(150)  # apertura de 30°
         spacing = 1.0               # 1 m entre cada “paso” de la V
@@ -220,15 +303,20 @@ class VQCProtocol(IProtocol):
         # lado: alterna izquierda/derecha; profundidad: ceil(id/2)
 
         # >>> BEGIN PATCH: lado/profundidad en base a rank local dentro del grupo
+        if getattr(self, "reassoc_mode", "static") == "load":
+            self._update_formation_rank()   # los followers del líder pueden haber cambiado
         rank = getattr(self, "formation_rank", 0)
         side  = -1 if (rank % 2) == 0 else 1    # alterna: izq/dcha
         depth = (rank // 2) + 1                  # 1,1,2,2,3,3,...
         # >>> END PATCH
 
         # Aproximar rumbo (heading) del EQC en este instante
-        curr  = self.predict_eqc_position(now)
-        fut   = self.predict_eqc_position(now + 0.1)
-        heading = math.atan2(fut[1] - curr[1], fut[0] - curr[0])
+        if config.INTERCEPT_SOLVER == "closed_form":
+            heading = traj.heading(now)
+        else:
+            curr  = traj.position(now)
+            fut   = traj.position(now + 0.1)
+            heading = math.atan2(fut[1] - curr[1], fut[0] - curr[0])
 
         # Vector de offset en V
         dx = spacing * depth * math.cos(heading + side * angle)
@@ -276,18 +364,16 @@ class VQCProtocol(IProtocol):
             self.xy3d_warns = getattr(self, "xy3d_warns", 0) + 1
             self.xy3d_samples = getattr(self, "xy3d_samples", [])
 
-            # Buscar label de forma tolerante a float
-            label_guess = None
-            try:
-                # tolerancia pequeña para coord XY
-                tol = 1e-6
-                cx, cy = coord3d[0], coord3d[1]
+            # Label por el índice exacto (coord, urgency); solo si falla, búsqueda tolerante a float
+            cx, cy = coord3d[0], coord3d[1]
+            label_guess = self.coordurg2label.get(((cx, cy), urg))
+            if label_guess is None:
+                tol = 1e-6   # tolerancia pequeña para coord XY
                 label_guess = next(
-                    p["label"] for p in config.POIS
-                    if abs(p["coord"][0] - cx) < tol and abs(p["coord"][1] - cy) < tol and p["urgency"] == urg
+                    (p["label"] for p in self.ctx.pois
+                     if abs(p["coord"][0] - cx) < tol and abs(p["coord"][1] - cy) < tol and p["urgency"] == urg),
+                    None,
                 )
-            except StopIteration:
-                pass
 
             max_samp = int(getattr(config, "XY3D_MAX_SAMPLES", 5))
             if len(self.xy3d_samples) < max_samp:
@@ -312,7 +398,10 @@ class VQCProtocol(IProtocol):
 
         old = self.pos
         self.pos = telemetry.current_position
+        n_disc = len(self.discovered)
         self.log.debug(f"📡 Telemetry: from {old} to {self.pos}")
+        if self.state == "visiting":
+            self.visit_dist += math.dist(old, self.pos)
 
         for coord3d, urg in list(self.next2visit):
             dx, dy, dz = (
@@ -329,7 +418,7 @@ class VQCProtocol(IProtocol):
                 poi_label = self.coordurg2label.get(((coord3d[0], coord3d[1]), urg))
 
                 # NEW: si ya fue colectado globalmente por otro VQC, salta y limpia misión
-                if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (poi_label in config.COLLECTED_LABELS):
+                if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (poi_label in self.ctx.collected_labels):
                     entry = (coord3d, urg)
                     if entry in self.next2visit:
                         self.next2visit.remove(entry)
@@ -340,7 +429,7 @@ class VQCProtocol(IProtocol):
                     continue  # no lo agregues al buffer
 
                 # (tu código de siempre)
-                already_discovered = any(d["id"] == poi_id for d in self.discovered)
+                already_discovered = poi_id in self.discovered
                 if poi_id not in self.visited and not already_discovered:
                     if len(self.discovered) < config.M:
                         #### [LATENCY] marca llegada real (assigned)
@@ -351,11 +440,11 @@ class VQCProtocol(IProtocol):
                         #### [/LATENCY]                        
                         # NEW: marcar candado global ANTES de añadir al buffer
                         if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-                            config.COLLECTED_LABELS.add(poi_label)
+                            self.ctx.collected_labels.add(poi_label)
                             self.log.info(f"🔒 Lock global activado por VQC-{self.id} para {poi_label}")
 
                         # ➞ lo añadimos al buffer discovered (sin cambios)
-                        self.discovered.append({"id": poi_id, "label": poi_label})
+                        self.discovered[poi_id] = {"id": poi_id, "label": poi_label}
 
                         # ➞ clasificar y limpiar next2visit como ya hacías
                         entry = (coord3d, urg)
@@ -369,6 +458,7 @@ class VQCProtocol(IProtocol):
                         else:
                             self.disc_casual += 1
                             kind = "casual"
+                        self.ctx.poi_table.arrive(poi_label, now, self.id, kind)
 
                         self.log.info(f"🔍 Local detect ({kind}): {poi_id} ({poi_label})")
                     else:
@@ -378,7 +468,9 @@ class VQCProtocol(IProtocol):
                 # break
         # 2) detección casual cuando no estamos en misión:
         if not self.next2visit:
-            for poi in config.POIS:
+            # Solo los PoIs a distancia XY <= R_DETECT pueden cumplir el umbral 3D
+            for i in self.ctx.poi_index.query_radius(self.pos[0], self.pos[1], config.R_DETECT * (1 + 1e-9)):
+                poi = self.ctx.pois[i]
                 px, py = poi["coord"]
                 dx, dy, dz = self.pos[0]-px, self.pos[1]-py, self.pos[2]-0.0
 
@@ -389,11 +481,11 @@ class VQCProtocol(IProtocol):
                     poi_label = poi["label"]
 
                     # NEW: si ya está colectado globalmente, ignora
-                    if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (poi_label in config.COLLECTED_LABELS):
+                    if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False) and (poi_label in self.ctx.collected_labels):
                         self.log.debug(f"⛔ Ya colectado globalmente: {poi_label} → ignoro (casual)")
                         continue
 
-                    already_discovered = any(d["id"] == poi_id for d in self.discovered)
+                    already_discovered = poi_id in self.discovered
                     if poi_id not in self.visited and not already_discovered:
                         if len(self.discovered) < config.M:
                             #### [LATENCY] marca llegada real (casual)
@@ -404,15 +496,26 @@ class VQCProtocol(IProtocol):
                             #### [/LATENCY]
                             # NEW: marcar candado global ANTES de añadir al buffer
                             if getattr(config, "USE_GLOBAL_COLLECTION_LOCK", False):
-                                config.COLLECTED_LABELS.add(poi_label)
+                                self.ctx.collected_labels.add(poi_label)
                                 self.log.info(f"🔒 Lock global activado por VQC-{self.id} para {poi_label}")
 
-                            self.discovered.append({"id": poi_id, "label": poi_label})
+                            self.discovered[poi_id] = {"id": poi_id, "label": poi_label}
                             self.disc_casual += 1
+                            self.ctx.poi_table.arrive(poi_label, now, self.id, "casual")
                             self.log.info(f"🔍 Casual detect: {poi_id} ({poi_label})")
                         else:
                             self.log.debug("Buffer discovered lleno")
 
+        # (piggyback) descubrimiento nuevo → HELLO con el reporte ya, sin esperar al siguiente beacon
+        if self.deliver_mode == "piggyback" and len(self.discovered) > n_disc:
+            now = self.provider.current_time()
+            if self._leader_in_range_at(now):
+                self._send_hello(now, config.M - len(self.next2visit))
+
+        # 3) scheduler event: el fin de misión se observa aquí (el plugin de misión procesa la telemetría antes)
+        if self.scheduler == "event" and self.mission.is_idle:
+            self._on_mission_idle()
+
 
     def handle_timer(self, timer: str) -> None:
 
@@ -436,58 +539,112 @@ class VQCProtocol(IProtocol):
                 #self.discovered.clear()    """ 
 
                        
+            now = self.provider.current_time()
+            if self.reassoc_mode == "load" and now >= self._next_reassoc_check:
+                self._next_reassoc_check = now + config.REASSOC_PERIOD
+                self._maybe_reassociate(now)
             free = config.M - len(self.next2visit)
-            msg = {"type":"HELLO","v_id":self.id,"huecos":free,"position":list(self.pos)}
-
             self.free = free
             self._viz_push()
+            if self._should_send_hello(self.provider.current_time(), free):
+                self._send_hello(self.provider.current_time(), free)
 
-            self.log.debug(f"📤 HELLO payload: {msg}")
-            cmd = CommunicationCommand(CommunicationCommandType.SEND, json.dumps(msg),self.leader_id)
-            self.provider.send_communication_command(cmd)
-            self.log.debug(f"📤 HELLO sent: free={free}")
-
-            # === [LOG] Resumen del VQC en cada HELLO ===
-            try:
-                self.log.info(
-                    f"[VQC-{self.id}] tick: state={self.state}, "
-                    f"visited={len(self.visited)}, discovered={len(self.discovered)}, "
-                    f"next2visit={len(self.next2visit)}, buffer={len(self.discovered)}"
-                )
-            except Exception as e:
-                self.log.warning(f"[VQC-{self.id}] No se pudo loguear el resumen HELLO: {e}")
-            # ===========================================
+                # === [LOG] Resumen del VQC en cada HELLO ===
+                try:
+                    self.log.info(
+                        f"[VQC-{self.id}] tick: state={self.state}, "
+                        f"visited={len(self.visited)}, discovered={len(self.discovered)}, "
+                        f"next2visit={len(self.next2visit)}, buffer={len(self.discovered)}"
+                    )
+                except Exception as e:
+                    self.log.warning(f"[VQC-{self.id}] No se pudo loguear el resumen HELLO: {e}")
+                # ===========================================
 
 
             self.provider.schedule_timer("hello", self.provider.current_time()+1)
 
         elif timer == "check_roam": #¿Estoy libre de misiones (mission.is_idle) y no estoy ya vagando de forma aleatoria (random._trip_ongoing)
-            self.log.debug(f"🔥 check_roam: idle={self.mission.is_idle}")
-            if self.mission.is_idle:
-                if self.state == "visiting":
-                    self.log.info("🏁 Fin de misión → modo satélite")
-                    # === [LOG] Resumen al cerrar misión ===
-                    try:
-                        self.log.info(
-                            f"[VQC-{self.id}] fin_mision: visited_total={len(self.visited)}, "
-                            f"discovered_total={len(self.discovered)}, next2visit={len(self.next2visit)}"
-                        )
-                    except Exception as e:
-                        self.log.warning(f"[VQC-{self.id}] No se pudo loguear fin_mision: {e}")
-                    # ======================================
-                    self.state = "satellite"
-                self.maintain_satellite_mode()
-                # si estoy en satellite y la misión idle, no hago nada
+            if self.scheduler == "event":
+                self._roam_timer_armed = False
+                self._check_roam()
+                return
+            self._check_roam()
+            self.provider.schedule_timer("check_roam", self.provider.current_time()+0.5)
+
+    def _send_hello(self, now: float, free: int) -> None:
+        """HELLO al líder; en modo piggyback lleva además los descubrimientos pendientes de ACK."""
+        msg = {"type":"HELLO","v_id":self.id,"huecos":free,"position":list(self.pos)}
+        if self.deliver_mode == "piggyback" and self.discovered:
+            msg["pids"] = self._deliver_entries(now)
+            self.last_deliver_time = now
+        if self._share_loads:
+            # lo que sabemos de otros líderes viaja al nuevo, hasta su primer HELLO_ACK
+            shared = [e for lid, e in self.leader_loads.items() if lid != self.leader_id]
+            if shared:
+                msg["loads"] = shared
+
+        self.log.debug(f"📤 HELLO payload: {msg}")
+        self._send(msg, self.leader_id)
+        self._hello_sent_free = free
+        self.log.debug(f"📤 HELLO sent: free={free}")
+
+    def _leader_in_range_at(self, now: float) -> bool:
+        """¿Está el líder dentro de R_COMM? Su patrulla es determinista: posición de la tabla de trayectoria."""
+        leader_pos = self.ctx.trajectories[self.leader_id].position(now)
+        return math.dist(self.pos, leader_pos) <= config.R_COMM
+
+    def _should_send_hello(self, now: float, free: int) -> bool:
+        """(adaptive) HELLO solo en rango del líder y si cambió algo, hay que entregar o venció el keep-alive."""
+        if self.hello_mode == "periodic":
+            return True
+        in_range = self._leader_in_range_at(now)
+        entered = in_range and not self._leader_in_range
+        self._leader_in_range = in_range
+        if not in_range:
+            return False
+        return (entered
+                or bool(self.discovered)                       # DELIVER va detrás del HELLO_ACK
+                or free != self._hello_acked_free
+                or now - self._last_hello_ack >= config.HELLO_KEEPALIVE)
+
+    def _check_roam(self) -> None:
+        self.log.debug(f"🔥 check_roam: idle={self.mission.is_idle}")
+        if self.mission.is_idle:
+            if self.state == "visiting":
+                self.log.info("🏁 Fin de misión → modo satélite")
+                # === [LOG] Resumen al cerrar misión ===
+                try:
+                    self.log.info(
+                        f"[VQC-{self.id}] fin_mision: visited_total={len(self.visited)}, "
+                        f"discovered_total={len(self.discovered)}, next2visit={len(self.next2visit)}"
+                    )
+                except Exception as e:
+                    self.log.warning(f"[VQC-{self.id}] No se pudo loguear fin_mision: {e}")
+                # ======================================
+                self.state = "satellite"
+            self.maintain_satellite_mode()
+            # si estoy en satellite y la misión idle, no hago nada
+
+    def _on_mission_idle(self) -> None:
+        """(event) La misión terminó en esta telemetría: fin de visita → satélite ya; intercept alcanzado → check_roam en 0.5 s."""
+        if self.state == "visiting":
+            self._check_roam()
+        elif not self._roam_timer_armed:
+            self._roam_timer_armed = True
             self.provider.schedule_timer("check_roam", self.provider.current_time()+0.5)
 
     def handle_packet(self, message: str) -> None:
-        self.log.debug(f"📥 handle_packet ASSIGN: {message}")
-        msg = json.loads(message)
+        msg = self.ctx.codec.decode(message)
+        self.log.debug(f"📥 handle_packet ASSIGN: {msg}")
 
         t = msg.get("type")
         
+        if "loads" in msg:
+            merge_loads(self.leader_loads, msg["loads"])
+
         if t == "ASSIGN":
             self._exec["handle_packet.ASSIGN"] = True
+            self._last_assign_rx = self.provider.current_time()
             self.log.info(f"📥 ASSIGN received: {msg['pois']}")
  
 #
@@ -511,24 +668,28 @@ class VQCProtocol(IProtocol):
 
             antiguos = list(self.next2visit)
 
-            self.next2visit.clear()
-            # 3) Cargar primero las nuevas tareas que envía el EQC
+            # 3) Primero las nuevas tareas que envía el EQC
+            nuevos = []
             nuevos_ids = set()
             for p in msg["pois"]:
                 x, y = p["coord"]
                 urg = p["urgency"]
                 coord3d = (x, y, 0.0) #config.h_vqc
-                self.next2visit.append((coord3d, urg))
+                nuevos.append((coord3d, urg))
                 nuevos_ids.add(p["label"])      # usa "label" o "id" según tu POIS
             # 4) Volver a añadir las antiguas que no estén ya en los nuevos,
             #    hasta completar la capacidad M
-
+            kept = []
             for coord3d, urg in antiguos:
                 # clave por (coord, urgency) para evitar ambigüedad
                 key   = ((coord3d[0], coord3d[1]), urg)
                 label = self.coordurg2label.get(key)
-                if label not in nuevos_ids and len(self.next2visit) < config.M:
-                    self.next2visit.append((coord3d, urg))
+                if label not in nuevos_ids and len(nuevos) + len(kept) < config.M:
+                    kept.append((coord3d, urg))
+
+            # Orden de visita (route_planner.py): fifo = nuevos primero, como el original
+            self.next2visit = plan_route(self.pos, kept, nuevos,
+                                         config.ROUTE_PLANNER, config.ROUTE_URGENCY_WEIGHT)
 
             # 5) Si tras el merge no queda nada, reanudar roaming
             if not self.next2visit:
@@ -557,50 +718,62 @@ class VQCProtocol(IProtocol):
             
         elif t == "HELLO_ACK":
                 self._exec["handle_packet.HELLO_ACK"] = True
+                self._hello_acked_free = self._hello_sent_free
+                self._last_hello_ack = self.provider.current_time()
+                self._share_loads = False
                 self.last_assign = {
                     "eqc_pos":  tuple(msg.get("eqc_pos", self.pos)),
                     "eqc_time": msg.get("eqc_time", self.provider.current_time())
                 }
+                if self.deliver_mode == "piggyback":
+                    # ACK combinado: el HELLO ya llevaba el reporte
+                    if msg.get("pids"):
+                        self._on_deliver_ack(msg["pids"])
+                    return
                 self.log.debug(f"✅ VQC-{self.id} recebeu HELLO_ACK, enviando DELIVER en {self.last_assign['eqc_pos']} t={self.last_assign['eqc_time']}")
                 self.send_deliver() 
 
         elif t == "DELIVER_ACK":
-            self._exec["handle_packet.DELIVER_ACK"] = True
-            acked = msg.get("pids", [])  # lista de IDs como strings
-            self.log.info(f"📥 DELIVER_ACK recibido: {acked}")
-
-            # Reemplaza tu loop antiguo por:
-            for poi_id in acked:
-                # quita cualquier dict con .["id"] == poi_id
-                self.discovered = [d for d in self.discovered if d["id"] != poi_id]
-                self.visited.append(poi_id)
-                #### [LATENCY] cleanup de arrival_ts para el label correspondiente
-                try:
-                    label = next(p["label"] for p in config.POIS if p["id"] == poi_id)
-                    self.arrival_ts.pop(label, None)
-                except StopIteration:
-                    pass
-                #### [/LATENCY]
-            self.log.debug(f"🗂️ discovered tras ACK: {self.discovered}, visited: {self.visited}")
-            self._viz_push()
-            # === [LOG] Resumen tras DELIVER_ACK ===
-            try:
-                pendientes_locales = max(0, len(self.discovered))
-                self.log.info(
-                    f"[VQC-{self.id}] deliver_ack: visited_total={len(self.visited)}, "
-                    f"next2visit={len(self.next2visit)}, pendientes_locales={pendientes_locales}"
-                )
-            except Exception as e:
-                self.log.warning(f"[VQC-{self.id}] No se pudo loguear post-ACK: {e}")
-            # ======================================
-
+            self._on_deliver_ack(msg.get("pids", []))  # lista de IDs como strings
 
         else:
             self.log.debug(f"⚠️ VQC-{self.id} recebeu mensagem desconhecida: {t}")
 
+    def _on_deliver_ack(self, acked) -> None:
+        """PoIs confirmados por el líder (DELIVER_ACK o, en piggyback, HELLO_ACK): pasan de discovered a visited."""
+        self._exec["handle_packet.DELIVER_ACK"] = True
+        self.log.info(f"📥 DELIVER_ACK recibido: {acked}")
+
+        for poi_id in acked:
+            self.discovered.pop(poi_id, None)
+            self.visited[poi_id] = None
+            #### [LATENCY] cleanup de arrival_ts para el label correspondiente
+            poi = self.ctx.poi_by_id.get(poi_id)
+            if poi is not None:
+                self.arrival_ts.pop(poi["label"], None)
+            #### [/LATENCY]
+        self.log.debug(f"🗂️ discovered tras ACK: {list(self.discovered.values())}, visited: {list(self.visited)}")
+        self._viz_push()
+        # === [LOG] Resumen tras DELIVER_ACK ===
+        try:
+            pendientes_locales = max(0, len(self.discovered))
+            self.log.info(
+                f"[VQC-{self.id}] deliver_ack: visited_total={len(self.visited)}, "
+                f"next2visit={len(self.next2visit)}, pendientes_locales={pendientes_locales}"
+            )
+        except Exception as e:
+            self.log.warning(f"[VQC-{self.id}] No se pudo loguear post-ACK: {e}")
+        # ======================================
+        # (load) recién vaciado el buffer es cuando el VQC puede quedar ocioso
+        if self.reassoc_mode == "load" and not self.discovered:
+            self._maybe_reassociate(self.provider.current_time())
+
     def finish(self) -> None:
-        self.log.info(f"🏁 VQC-{self.id} finished — next2visit={self.next2visit}, visited={self.visited}")
+        self.log.info(f"🏁 VQC-{self.id} finished — next2visit={self.next2visit}, visited={list(self.visited)}")
         self.log.info(f"📊 Discoveries: casual={self.disc_casual}, assigned={self.disc_assigned}")
+        self.log.info(f"🗺️ Distancia en visitas: {self.visit_dist:.1f} u (planner={config.ROUTE_PLANNER})")
+        self.ctx.metrics["vqc_visit_dist"] += self.visit_dist
+        self.ctx.metrics["reassociations"] += self.reassociations
         never = [k for k,v in self._exec.items() if not v]
         if never:
             self.log.warning(f"⚠️ Métodos VQC nunca ejecutados: {never}")
@@ -618,6 +791,12 @@ class VQCProtocol(IProtocol):
 
         
 
+    def _send(self, msg: dict, dest: int) -> None:
+        """Codifica con el codec de la corrida (ctx.codec), contabiliza bytes por tipo y envía."""
+        data = self.ctx.codec.encode(msg)
+        self.ctx.count_message(msg["type"], len(data))
+        self.provider.send_communication_command(CommunicationCommand(CommunicationCommandType.SEND, data, dest))
+
     def send_deliver(self) -> None:
         #### [DELIVER] no envíes si no hay nada que reportar
         if not self.discovered:
@@ -627,15 +806,7 @@ class VQCProtocol(IProtocol):
 
         # Construye pids con t_arrive piggybacked
         now = self.provider.current_time()
-        pids = []
-        for d in self.discovered:
-            label = d["label"]
-            poi_id = d["id"]
-            t_arr = self.arrival_ts.get(label)
-            if t_arr is None:
-                # Fallback defensivo (no debería ocurrir si marcamos al llegar)
-                t_arr = now
-            pids.append({"id": poi_id, "label": label, "t_arrive": t_arr})
+        pids = self._deliver_entries(now)
 
         msg = {
             "type": "DELIVER",
@@ -643,12 +814,7 @@ class VQCProtocol(IProtocol):
             "pids": pids
         }
 
-        cmd = CommunicationCommand(
-            CommunicationCommandType.SEND,
-            json.dumps(msg),
-            self.leader_id
-        )
-        self.provider.send_communication_command(cmd)
+        self._send(msg, self.leader_id)
         self.log.info(f"📤 DELIVER enviado con t_arrive: {[e['id'] for e in pids]}")
 
         try:
@@ -656,3 +822,16 @@ class VQCProtocol(IProtocol):
         except Exception:
             pass
         self._viz_push()
+
+    def _deliver_entries(self, now: float) -> List[dict]:
+        """Entradas del reporte (id, label, t_arrive) para todo el buffer discovered."""
+        pids = []
+        for d in self.discovered.values():
+            label = d["label"]
+            poi_id = d["id"]
+            t_arr = self.arrival_ts.get(label)
+            if t_arr is None:
+                # Fallback defensivo (no debería ocurrir si marcamos al llegar)
+                t_arr = now
+            pids.append({"id": poi_id, "label": label, "t_arrive": t_arr})
+        return pids